@@ -1,27 +1,73 @@
-import tensorflow as tf
-from tensorflow.keras import layers, models
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from sklearn.metrics import classification_report, confusion_matrix, f1_score, precision_score, recall_score, accuracy_score
+import argparse
+import contextlib
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
-import pandas as pd
-from pathlib import Path
-import cv2
-from PIL import Image
+from packed_dataset import is_packed_dataset, load_packed_split
+
+# TensorFlow, scikit-learn, matplotlib, seaborn and pandas are imported inside
+# the methods that use them, so --help and data checks start instantly.
 
 class ChairPoseClassifier:
-    def __init__(self, img_height=224, img_width=224, batch_size=32):
+    def __init__(self, img_height=224, img_width=224, batch_size=32, class_names=None):
         self.img_height = img_height
         self.img_width = img_width
         self.batch_size = batch_size
+        # Class names in label-index order; more than two gives a softmax head
+        self.class_names = list(class_names) if class_names else None
         self.model = None
         self.history = None
+        # Classification head of the transfer-learning model (see train_transfer_model)
+        self.head = None
+        # tf.distribute strategy for multi-worker training (None trains in-process)
+        self.strategy = None
+        
+    @property
+    def is_chief(self):
+        """Worker that saves checkpoints and reports (always True without a strategy)"""
+        from cpu_training import worker_info
+        return self.strategy is None or worker_info()[1] == 0
+    
+    @property
+    def num_classes(self):
+        return len(self.class_names) if self.class_names else 2
+    
+    @property
+    def class_mode(self):
+        """Keras class mode: binary labels for two classes, sparse indices otherwise"""
+        return 'binary' if self.num_classes == 2 else 'sparse'
         
     def create_model(self):
-        """Create CNN model for chair pose classification"""
-        model = models.Sequential([
+        """Create CNN model for chair pose classification
+
+        With two classes the head is a single sigmoid unit; with more it is
+        a softmax over every pose, sharing one feature extractor.
+        """
+        import tensorflow as tf
+        from tensorflow.keras import layers, models
+        
+        # float32 output keeps probabilities and the loss stable under mixed precision
+        if self.num_classes == 2:
+            output_layer = layers.Dense(1, activation='sigmoid', dtype='float32')
+            loss = 'binary_crossentropy'
+        else:
+            output_layer = layers.Dense(self.num_classes, activation='softmax', dtype='float32')
+            loss = 'sparse_categorical_crossentropy'
+        
+        # Variables must be created inside the distribution strategy's scope
+        scope = self.strategy.scope() if self.strategy else contextlib.nullcontext()
+        with scope:
+            model = self._build_model(layers, models, output_layer)
+            model.compile(
+                optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
+                loss=loss,
+                metrics=['accuracy']
+            )
+        
+        self.model = model
+        return model
+    
+    def _build_model(self, layers, models, output_layer):
+        return models.Sequential([
             # First Convolutional Block
             layers.Conv2D(32, (3, 3), activation='relu', input_shape=(self.img_height, self.img_width, 3)),
             layers.BatchNormalization(),
@@ -55,22 +101,15 @@ class ChairPoseClassifier:
             layers.BatchNormalization(),
             layers.Dropout(0.5),
             
-            # Output layer (binary classification)
-            layers.Dense(1, activation='sigmoid')
+            # Output layer (sigmoid for binary, softmax for multi-class)
+            output_layer
         ])
-        
-        model.compile(
-            optimizer=tf.keras.optimizers.Adam(learning_rate=0.001),
-            loss='binary_crossentropy',
-            metrics=['accuracy']
-        )
-        
-        self.model = model
-        return model
     
-    def prepare_data_generators(self, train_dir, validation_dir):
-        """Prepare data generators with augmentation"""
-        train_datagen = ImageDataGenerator(
+    def _augmenting_datagen(self):
+        """Training-time augmentation shared by every data source"""
+        from tensorflow.keras.preprocessing.image import ImageDataGenerator
+        
+        return ImageDataGenerator(
             rescale=1./255,
             rotation_range=20,
             width_shift_range=0.2,
@@ -80,6 +119,12 @@ class ChairPoseClassifier:
             shear_range=0.2,
             fill_mode='nearest'
         )
+    
+    def prepare_data_generators(self, train_dir, validation_dir):
+        """Prepare data generators with augmentation"""
+        from tensorflow.keras.preprocessing.image import ImageDataGenerator
+        
+        train_datagen = self._augmenting_datagen()
         
         validation_datagen = ImageDataGenerator(rescale=1./255)
         
@@ -87,7 +132,8 @@ class ChairPoseClassifier:
             train_dir,
             target_size=(self.img_height, self.img_width),
             batch_size=self.batch_size,
-            class_mode='binary',  # binary classification
+            class_mode=self.class_mode,
+            classes=self.class_names,
             shuffle=True
         )
         
@@ -95,14 +141,169 @@ class ChairPoseClassifier:
             validation_dir,
             target_size=(self.img_height, self.img_width),
             batch_size=self.batch_size,
-            class_mode='binary',
+            class_mode=self.class_mode,
+            classes=self.class_names,
             shuffle=False
         )
         
         return train_generator, validation_generator
     
+    def prepare_manifest_data_generators(self, manifest_path, fold=None):
+        """Prepare data generators from a split manifest
+
+        Images are read in place from the paths listed in the manifest.
+        Passing a fold re-splits train/validation for cross-validation
+        without touching any files.
+        """
+        from tensorflow.keras.preprocessing.image import ImageDataGenerator
+        from split_manifest import load_split_manifest, select_fold, split_frame
+        
+        manifest = load_split_manifest(manifest_path)
+        if fold is not None:
+            manifest = select_fold(manifest, fold)
+        class_names = self.class_names or sorted(manifest['label'].unique())
+        
+        train_datagen = self._augmenting_datagen()
+        
+        validation_datagen = ImageDataGenerator(rescale=1./255)
+        
+        train_generator = train_datagen.flow_from_dataframe(
+            split_frame(manifest, 'train'),
+            x_col='path',
+            y_col='label',
+            classes=class_names,
+            target_size=(self.img_height, self.img_width),
+            batch_size=self.batch_size,
+            class_mode=self.class_mode,
+            shuffle=True
+        )
+        
+        validation_generator = validation_datagen.flow_from_dataframe(
+            split_frame(manifest, 'validation'),
+            x_col='path',
+            y_col='label',
+            classes=class_names,
+            target_size=(self.img_height, self.img_width),
+            batch_size=self.batch_size,
+            class_mode=self.class_mode,
+            shuffle=False
+        )
+        
+        return train_generator, validation_generator
+    
+    def manifest_test_generator(self, manifest_path):
+        """Prepare a non-shuffled test generator from a split manifest"""
+        from tensorflow.keras.preprocessing.image import ImageDataGenerator
+        from split_manifest import load_split_manifest, split_frame
+        
+        manifest = load_split_manifest(manifest_path)
+        test_datagen = ImageDataGenerator(rescale=1./255)
+        return test_datagen.flow_from_dataframe(
+            split_frame(manifest, 'test'),
+            x_col='path',
+            y_col='label',
+            classes=self.class_names or sorted(manifest['label'].unique()),
+            target_size=(self.img_height, self.img_width),
+            batch_size=self.batch_size,
+            class_mode=self.class_mode,
+            shuffle=False
+        )
+    
+    def prepare_packed_data_generators(self, packed_dir):
+        """Prepare generators that stream from a packed (memory-mapped) dataset"""
+        from packed_sequence import PackedImageSequence
+        
+        train_datagen = self._augmenting_datagen()
+        
+        train_images, train_labels, _ = load_packed_split(packed_dir, 'train')
+        val_images, val_labels, _ = load_packed_split(packed_dir, 'validation')
+        
+        train_generator = PackedImageSequence(train_images, train_labels, self.batch_size,
+                                              shuffle=True, datagen=train_datagen)
+        validation_generator = PackedImageSequence(val_images, val_labels, self.batch_size)
+        
+        print(f"Streaming {len(train_labels)} training and {len(val_labels)} validation images from {packed_dir}")
+        return train_generator, validation_generator
+    
+    def packed_test_generator(self, packed_dir):
+        """Prepare a non-shuffled test generator from a packed dataset"""
+        from packed_sequence import PackedImageSequence
+        
+        test_images, test_labels, _ = load_packed_split(packed_dir, 'test')
+        return PackedImageSequence(test_images, test_labels, self.batch_size)
+    
+    def split_generator(self, data_path, split):
+        """Non-shuffled, non-augmented generator over any one split
+
+        data_path is a packed dataset directory, a split manifest (.csv) or
+        a data directory holding <split>/<class> folders.
+        """
+        if is_packed_dataset(data_path, split):
+            from packed_sequence import PackedImageSequence
+            images, labels, _ = load_packed_split(data_path, split)
+            return PackedImageSequence(images, labels, self.batch_size)
+        
+        from tensorflow.keras.preprocessing.image import ImageDataGenerator
+        datagen = ImageDataGenerator(rescale=1./255)
+        
+        if data_path.endswith('.csv'):
+            from split_manifest import load_split_manifest, split_frame
+            manifest = load_split_manifest(data_path)
+            return datagen.flow_from_dataframe(
+                split_frame(manifest, split),
+                x_col='path',
+                y_col='label',
+                classes=self.class_names or sorted(manifest['label'].unique()),
+                target_size=(self.img_height, self.img_width),
+                batch_size=self.batch_size,
+                class_mode=self.class_mode,
+                shuffle=False
+            )
+        
+        return datagen.flow_from_directory(
+            os.path.join(data_path, split),
+            target_size=(self.img_height, self.img_width),
+            batch_size=self.batch_size,
+            class_mode=self.class_mode,
+            classes=self.class_names,
+            shuffle=False
+        )
+    
+    def train_transfer_model(self, backbone, weights_path, data_path, cache_dir='data/bottleneck', epochs=100):
+        """Train a classification head on cached features of a frozen pretrained backbone
+
+        The backbone runs once per split and its features are cached in
+        cache_dir/<backbone>; later runs only train the head. self.model
+        becomes the combined image classifier. Returns the cached test
+        features as (x, y) batches for evaluate_model.
+        """
+        from transfer_learning import (bottleneck_signature, build_feature_extractor,
+                                       cached_bottleneck_features, combine_model, create_head,
+                                       feature_batches, train_head)
+        
+        extractor = build_feature_extractor(backbone, weights_path, self.img_height, self.img_width)
+        
+        features = {}
+        for split in ['train', 'validation', 'test']:
+            batches = self.split_generator(data_path, split)
+            signature = bottleneck_signature(backbone, weights_path, data_path, split, batches,
+                                             self.class_names, self.img_height, self.img_width)
+            features[split] = cached_bottleneck_features(extractor, batches, os.path.join(cache_dir, backbone),
+                                                         split, signature)
+        
+        print(f"Training classification head on {len(features['train'][1])} cached feature vectors...")
+        head = create_head(features['train'][0].shape[1], self.num_classes)
+        self.history = train_head(head, *features['train'], *features['validation'],
+                                  epochs=epochs, batch_size=self.batch_size)
+        
+        self.head = head
+        self.model = combine_model(extractor, head)
+        return feature_batches(*features['test'])
+    
     def train_model(self, train_generator, validation_generator, epochs=50):
         """Train the model with callbacks"""
+        import tensorflow as tf
+        
         # Define callbacks
         early_stopping = tf.keras.callbacks.EarlyStopping(
             monitor='val_loss',
@@ -118,35 +319,76 @@ class ChairPoseClassifier:
             verbose=1
         )
         
+        # Only the chief writes the real checkpoint; other workers write to a scratch file
+        checkpoint_path = 'best_chair_pose_model.h5'
+        if not self.is_chief:
+            import tempfile
+            checkpoint_path = os.path.join(tempfile.mkdtemp(), checkpoint_path)
+        
         model_checkpoint = tf.keras.callbacks.ModelCheckpoint(
-            'best_chair_pose_model.h5',
+            checkpoint_path,
             monitor='val_accuracy',
             save_best_only=True,
             verbose=1
         )
         
+        steps_per_epoch = validation_steps = None
+        if self.strategy is not None:
+            # Each worker reads its own shard of the batches
+            from cpu_training import distributed_dataset
+            train_generator, steps_per_epoch = distributed_dataset(self.strategy, train_generator)
+            validation_generator, validation_steps = distributed_dataset(self.strategy, validation_generator)
+        
         # Train the model
         self.history = self.model.fit(
             train_generator,
             epochs=epochs,
+            steps_per_epoch=steps_per_epoch,
             validation_data=validation_generator,
+            validation_steps=validation_steps,
             callbacks=[early_stopping, reduce_lr, model_checkpoint]
         )
         
+        if self.strategy is not None:
+            # Copy the trained weights out of the strategy, so evaluating and
+            # saving on the chief does not wait on collectives with other workers
+            local_model = tf.keras.models.clone_model(self.model)
+            local_model.set_weights(self.model.get_weights())
+            local_model.compile(loss=self.model.loss, metrics=['accuracy'])
+            self.model = local_model
+        
         return self.history
     
-    def evaluate_model(self, test_generator):
-        """Evaluate model and calculate all metrics"""
-        # Get predictions
-        predictions = self.model.predict(test_generator)
-        y_pred = (predictions > 0.5).astype(int).flatten()
-        y_true = test_generator.classes
+    def evaluate_model(self, test_generator, report_mode='interactive', model=None):
+        """Evaluate model and calculate all metrics
+
+        report_mode is 'interactive', 'headless' or 'none' (see
+        evaluate_metrics.save_chart); metrics and the confusion matrix are
+        always written to evaluation_metrics.json. model defaults to
+        self.model (the transfer head is passed to score cached features).
+        """
+        from evaluate_metrics import save_chart, write_metrics_json
+        from streaming_metrics import accumulate_predictions, metrics_accumulator
+        
+        model = self.model if model is None else model
+        
+        # Get predictions, keeping only per-batch confusion counts
+        accumulator = accumulate_predictions(model, test_generator,
+                                             metrics_accumulator(model.output_shape[-1]))
+        
+        if self.num_classes == 2:
+            target_names = ['Not Chair Pose', 'Chair Pose']
+        else:
+            # Multi-class: macro-average metrics over every pose
+            target_names = [name.replace('_', ' ').title() for name in self.class_names]
+        average = accumulator.average
         
         # Calculate metrics
-        accuracy = accuracy_score(y_true, y_pred)
-        precision = precision_score(y_true, y_pred, average='binary')
-        recall = recall_score(y_true, y_pred, average='binary')
-        f1 = f1_score(y_true, y_pred, average='binary')
+        metrics = accumulator.metrics()
+        accuracy = metrics['accuracy']
+        precision = metrics['precision']
+        recall = metrics['recall']
+        f1 = metrics['f1_score']
         
         # Print results
         print("\n" + "="*50)
@@ -160,57 +402,70 @@ class ChairPoseClassifier:
         
         # Detailed classification report
         print("\nDetailed Classification Report:")
-        print(classification_report(y_true, y_pred, target_names=['Not Chair Pose', 'Chair Pose']))
+        print(accumulator.report(target_names))
         
         # Confusion Matrix
-        cm = confusion_matrix(y_true, y_pred)
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                   xticklabels=['Not Chair Pose', 'Chair Pose'],
-                   yticklabels=['Not Chair Pose', 'Chair Pose'])
-        plt.title('Confusion Matrix - Chair Pose Classification')
-        plt.ylabel('True Label')
-        plt.xlabel('Predicted Label')
-        plt.tight_layout()
-        plt.savefig('confusion_matrix.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
-        return {
+        cm = accumulator.confusion_matrix()
+        title = ('Confusion Matrix - Pose Classification' if average == 'macro'
+                 else 'Confusion Matrix - Chair Pose Classification')
+        save_chart(_draw_confusion_matrix, (cm, target_names, title), (8, 6),
+                   'confusion_matrix.png', report_mode)
+        
+        metrics = {
             'accuracy': accuracy,
             'precision': precision,
             'recall': recall,
             'f1_score': f1
         }
+        write_metrics_json(dict(metrics, samples=accumulator.count, average=average,
+                                class_names=target_names, confusion_matrix=cm.tolist()),
+                           'evaluation_metrics.json')
+        return metrics
     
-    def plot_training_history(self):
+    def plot_training_history(self, report_mode='interactive'):
         """Plot training history"""
+        from evaluate_metrics import save_chart
+        
         if self.history is None:
             print("No training history available. Train the model first.")
             return
         
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 5))
-        
-        # Plot accuracy
-        ax1.plot(self.history.history['accuracy'], label='Training Accuracy', marker='o')
-        ax1.plot(self.history.history['val_accuracy'], label='Validation Accuracy', marker='s')
-        ax1.set_title('Model Accuracy Over Epochs')
-        ax1.set_xlabel('Epoch')
-        ax1.set_ylabel('Accuracy')
-        ax1.legend()
-        ax1.grid(True)
-        
-        # Plot loss
-        ax2.plot(self.history.history['loss'], label='Training Loss', marker='o')
-        ax2.plot(self.history.history['val_loss'], label='Validation Loss', marker='s')
-        ax2.set_title('Model Loss Over Epochs')
-        ax2.set_xlabel('Epoch')
-        ax2.set_ylabel('Loss')
-        ax2.legend()
-        ax2.grid(True)
-        
-        plt.tight_layout()
-        plt.savefig('training_history.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        save_chart(_draw_training_history, (self.history.history,), (15, 5),
+                   'training_history.png', report_mode)
+
+def _draw_confusion_matrix(fig, cm, target_names, title):
+    """Confusion matrix heatmap for evaluate_model"""
+    import seaborn as sns
+    
+    ax = fig.add_subplot()
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
+               xticklabels=target_names,
+               yticklabels=target_names, ax=ax)
+    ax.set_title(title)
+    ax.set_ylabel('True Label')
+    ax.set_xlabel('Predicted Label')
+
+def _draw_training_history(fig, history):
+    """Accuracy and loss curves for plot_training_history"""
+    ax1, ax2 = fig.subplots(1, 2)
+    
+    # Plot accuracy
+    ax1.plot(history['accuracy'], label='Training Accuracy', marker='o')
+    ax1.plot(history['val_accuracy'], label='Validation Accuracy', marker='s')
+    ax1.set_title('Model Accuracy Over Epochs')
+    ax1.set_xlabel('Epoch')
+    ax1.set_ylabel('Accuracy')
+    ax1.legend()
+    ax1.grid(True)
+    
+    # Plot loss
+    ax2.plot(history['loss'], label='Training Loss', marker='o')
+    ax2.plot(history['val_loss'], label='Validation Loss', marker='s')
+    ax2.set_title('Model Loss Over Epochs')
+    ax2.set_xlabel('Epoch')
+    ax2.set_ylabel('Loss')
+    ax2.legend()
+    ax2.grid(True)
 
 def create_sample_dataset():
     """Create sample dataset structure for demonstration"""
@@ -237,7 +492,50 @@ def create_sample_dataset():
     print("- data/validation/other_poses/")
     print("- data/test/other_poses/")
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the yoga pose CNN classifier")
+    parser.add_argument('--epochs', type=int, default=30, help="Number of training epochs")
+    parser.add_argument('--batch-size', type=int, default=32, help="Training batch size")
+    parser.add_argument('--fold', type=int, default=None,
+                        help="Cross-validation fold to hold out (split manifest only)")
+    parser.add_argument('--report', choices=['interactive', 'headless', 'none'], default='interactive',
+                        help="Chart handling: show windows (interactive), render in the background "
+                             "without a display (headless) or skip charts (none)")
+    
+    cpu = parser.add_argument_group('CPU training')
+    cpu.add_argument('--workers', type=int, default=1,
+                     help="Local worker processes for multi-worker data-parallel training")
+    cpu.add_argument('--intra-op-threads', type=int, default=None,
+                     help="Threads used inside each op (default: TensorFlow's choice)")
+    cpu.add_argument('--inter-op-threads', type=int, default=None,
+                     help="Ops run concurrently (default: TensorFlow's choice)")
+    cpu.add_argument('--mixed-precision', choices=['off', 'auto', 'bfloat16'], default='off',
+                     help="bfloat16 mixed precision; 'auto' enables it only on CPUs with native bfloat16")
+    
+    transfer = parser.add_argument_group('Transfer learning')
+    transfer.add_argument('--backbone', choices=['mobilenet_v2', 'mobilenet_v3_small', 'mobilenet_v3_large',
+                                                 'efficientnet_b0'], default=None,
+                          help="Train only a head on features of this frozen pretrained backbone")
+    transfer.add_argument('--backbone-weights', default=None,
+                          help="Local 'no top' weights file for the backbone (nothing is downloaded)")
+    transfer.add_argument('--bottleneck-dir', default='data/bottleneck',
+                          help="Cache of backbone features, reused across runs")
+    args = parser.parse_args(argv)
+    if args.backbone and not args.backbone_weights:
+        parser.error("--backbone requires --backbone-weights")
+    if args.backbone and args.workers > 1:
+        # Head training on cached features is single-process; workers would race on the cache and outputs
+        parser.error("--backbone does not support --workers; train the head with a single worker")
+    if args.workers > 1:
+        from cpu_training import multi_worker_problem
+        problem = multi_worker_problem()
+        if problem:
+            parser.error(f"--workers {args.workers}: {problem}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     # Create sample dataset structure if it doesn't exist
     if not os.path.exists('data'):
         print("Creating sample dataset structure...")
@@ -245,52 +543,98 @@ def main():
         print("\nPlease organize your yoga pose images in the created directories and run again.")
         return
     
-    # Initialize classifier
-    classifier = ChairPoseClassifier()
-    
-    # Create model
-    print("Creating CNN model...")
-    model = classifier.create_model()
-    print(model.summary())
-    
     # Check if data directories exist and have images
     train_dir = 'data/train'
     validation_dir = 'data/validation'
     test_dir = 'data/test'
+    packed_dir = 'data/packed'
+    manifest_path = 'data/splits.csv'
+    use_packed = all(is_packed_dataset(packed_dir, split) for split in ['train', 'validation', 'test'])
+    use_manifest = not use_packed and os.path.exists(manifest_path)
     
-    if not all(os.path.exists(d) for d in [train_dir, validation_dir, test_dir]):
+    if not use_packed and not use_manifest and not all(os.path.exists(d) for d in [train_dir, validation_dir, test_dir]):
         print("Error: Please ensure data directories exist with proper structure.")
         print("Run create_sample_dataset() first.")
         return
     
-    # Prepare data generators
-    print("Preparing data generators...")
-    train_generator, validation_generator = classifier.prepare_data_generators(
-        train_dir, validation_dir
-    )
+    # One class per pose found in the data (chair_pose/other_poses gives the binary model)
+    if use_packed:
+        _, _, class_names = load_packed_split(packed_dir, 'train')
+    elif use_manifest:
+        from split_manifest import load_split_manifest
+        class_names = sorted(load_split_manifest(manifest_path)['label'].unique())
+    else:
+        class_names = sorted(d for d in os.listdir(train_dir) if os.path.isdir(os.path.join(train_dir, d)))
+    print(f"Classes: {', '.join(class_names)}")
+    
+    # Multi-worker training relaunches this script once per worker, joined through TF_CONFIG
+    if args.workers > 1 and 'TF_CONFIG' not in os.environ:
+        import sys
+        from cpu_training import launch_local_workers
+        sys.exit(launch_local_workers(args.workers, sys.argv[1:] if argv is None else list(argv),
+                                      script=os.path.abspath(__file__)))
+    
+    from cpu_training import configure_cpu_training, multi_worker_strategy
+    configure_cpu_training(args.intra_op_threads, args.inter_op_threads, args.mixed_precision)
+    
+    # Initialize classifier
+    classifier = ChairPoseClassifier(batch_size=args.batch_size, class_names=class_names)
+    if 'TF_CONFIG' in os.environ:
+        classifier.strategy = multi_worker_strategy()
     
-    # Train model
-    print("Starting training...")
-    history = classifier.train_model(train_generator, validation_generator, epochs=30)
+    evaluation_model = None
+    if args.backbone:
+        # Transfer learning: frozen pretrained backbone, cached features, head-only training
+        data_path = packed_dir if use_packed else manifest_path if use_manifest else 'data'
+        print(f"Training a classification head on {args.backbone} features...")
+        test_generator = classifier.train_transfer_model(args.backbone, args.backbone_weights, data_path,
+                                                         cache_dir=args.bottleneck_dir, epochs=args.epochs)
+        # Score the cached test features instead of re-running the backbone
+        evaluation_model = classifier.head
+    else:
+        # Create model
+        print("Creating CNN model...")
+        model = classifier.create_model()
+        print(model.summary())
+        
+        # Prepare data generators
+        print("Preparing data generators...")
+        if use_packed:
+            train_generator, validation_generator = classifier.prepare_packed_data_generators(packed_dir)
+        elif use_manifest:
+            train_generator, validation_generator = classifier.prepare_manifest_data_generators(
+                manifest_path, fold=args.fold
+            )
+        else:
+            train_generator, validation_generator = classifier.prepare_data_generators(
+                train_dir, validation_dir
+            )
+        
+        # Train model
+        print("Starting training...")
+        history = classifier.train_model(train_generator, validation_generator, epochs=args.epochs)
+        
+        # Other workers are done once the shared weights are trained
+        if not classifier.is_chief:
+            return
+        
+        # Prepare test generator
+        if use_packed:
+            test_generator = classifier.packed_test_generator(packed_dir)
+        elif use_manifest:
+            test_generator = classifier.manifest_test_generator(manifest_path)
+        else:
+            test_generator = classifier.split_generator('data', 'test')
     
     # Plot training history
-    classifier.plot_training_history()
-    
-    # Prepare test generator
-    test_datagen = tf.keras.preprocessing.image.ImageDataGenerator(rescale=1./255)
-    test_generator = test_datagen.flow_from_directory(
-        test_dir,
-        target_size=(classifier.img_height, classifier.img_width),
-        batch_size=classifier.batch_size,
-        class_mode='binary',
-        shuffle=False
-    )
+    classifier.plot_training_history(report_mode=args.report)
     
     # Evaluate model
     print("Evaluating model...")
-    metrics = classifier.evaluate_model(test_generator)
+    metrics = classifier.evaluate_model(test_generator, report_mode=args.report, model=evaluation_model)
     
     # Save metrics to file
+    import pandas as pd
     metrics_df = pd.DataFrame([metrics])
     metrics_df.to_csv('evaluation_metrics.csv', index=False)
     print("\nMetrics saved to 'evaluation_metrics.csv'")
@@ -298,6 +642,10 @@ def main():
     # Save model
     classifier.model.save('chair_pose_classifier_final.h5')
     print("Model saved as 'chair_pose_classifier_final.h5'")
+    
+    # Headless charts were rendering in the background while the model was saved
+    from evaluate_metrics import wait_for_charts
+    wait_for_charts()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""
+Compare many trained checkpoints on one shared test set
+The test images are decoded once into a memory-mapped packed cache, then
+every checkpoint (Keras .h5/.keras or exported .tflite) is scored against
+that cache, optionally in parallel worker processes. Results are written as
+one comparison table plus a decision-threshold sweep for binary models.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from packed_dataset import is_packed_dataset, list_directory_samples, load_packed_split, pack_samples
+from streaming_metrics import metrics_accumulator
+
+# Thresholds applied to the sigmoid output of binary models
+DEFAULT_THRESHOLDS = np.round(np.arange(0.05, 1.0, 0.05), 2)
+
+
+def _test_samples(test_data_path):
+    """(path, label) samples and class names of a manifest or directory test split"""
+    if test_data_path.endswith('.csv'):
+        from split_manifest import load_split_manifest, split_frame
+        manifest = load_split_manifest(test_data_path)
+        class_names = sorted(manifest['label'].unique())
+        rows = split_frame(manifest, 'test')
+        samples = [(path, class_names.index(label)) for path, label in zip(rows['path'], rows['label'])]
+        return samples, class_names
+    return list_directory_samples(test_data_path)
+
+
+def _samples_fingerprint(samples, class_names, img_height, img_width):
+    """Hash of the test images (path, size, mtime) and the decode settings"""
+    digest = hashlib.sha1(json.dumps([class_names, img_height, img_width]).encode())
+    for path, label in samples:
+        stat = os.stat(path)
+        digest.update(f"{path}|{label}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def prepare_test_cache(test_data_path, cache_dir='data/eval_cache', img_height=224, img_width=224):
+    """Return a packed directory holding the decoded test split
+
+    A packed dataset is used as-is. A split manifest or test directory is
+    decoded once into cache_dir and reused until its images change.
+    """
+    if is_packed_dataset(test_data_path, 'test'):
+        return test_data_path
+
+    samples, class_names = _test_samples(test_data_path)
+    fingerprint = _samples_fingerprint(samples, class_names, img_height, img_width)
+    fingerprint_path = os.path.join(cache_dir, 'test_fingerprint.txt')
+
+    if is_packed_dataset(cache_dir, 'test') and os.path.exists(fingerprint_path):
+        with open(fingerprint_path) as f:
+            if f.read().strip() == fingerprint:
+                print(f"Using decoded test set cached in {cache_dir}")
+                return cache_dir
+
+    print(f"Decoding {len(samples)} test images into {cache_dir}...")
+    pack_samples(samples, class_names, cache_dir, 'test', img_height=img_height, img_width=img_width)
+    with open(fingerprint_path, 'w') as f:
+        f.write(fingerprint)
+    return cache_dir
+
+
+def _load_checkpoint(model_path):
+    """Load a checkpoint and return (model, expects_uint8_pixels)"""
+    if model_path.endswith('.tflite'):
+        from pose_model_runtime import TFLitePoseModel
+        # Raw pixels go straight to the quantized input without a float copy
+        return TFLitePoseModel(model_path), True
+
+    import tensorflow as tf
+    return tf.keras.models.load_model(model_path, compile=False), False
+
+
+def predict_checkpoint(model_path, cache_dir, batch_size=32):
+    """Accumulate one checkpoint's predictions over the cached test split
+
+    Returns a streaming_metrics accumulator; predictions are consumed batch
+    by batch and never concatenated.
+    """
+    model, uint8_input = _load_checkpoint(model_path)
+    images, labels, _ = load_packed_split(cache_dir, 'test')
+
+    if tuple(model.input_shape[1:3]) != images.shape[1:3]:
+        raise ValueError(f"expects {tuple(model.input_shape[1:3])} input, "
+                         f"test cache holds {images.shape[1:3]} images")
+
+    accumulator = metrics_accumulator(model.output_shape[-1])
+    for start in range(0, len(images), batch_size):
+        batch = np.asarray(images[start:start + batch_size])
+        if not uint8_input:
+            batch = batch.astype(np.float32) / 255.0
+        accumulator.update(labels[start:start + batch_size], model.predict_on_batch(batch))
+    return accumulator
+
+
+def evaluate_checkpoint(model_path, cache_dir, batch_size=32, thresholds=DEFAULT_THRESHOLDS):
+    """Score one checkpoint; returns (summary row, threshold sweep rows)
+
+    Multi-class heads are scored on argmax with macro averaging; binary
+    heads also get a threshold sweep and ROC AUC.
+    """
+    try:
+        accumulator = predict_checkpoint(model_path, cache_dir, batch_size)
+    except Exception as e:
+        return {'checkpoint': model_path, 'error': str(e)}, []
+
+    row = {'checkpoint': model_path}
+    sweep_rows = []
+
+    if accumulator.average == 'binary':
+        sweep = accumulator.sweep(thresholds)
+        sweep_rows = [dict(checkpoint=model_path, **{key: float(values[i]) for key, values in sweep.items()})
+                      for i in range(len(thresholds))]
+
+        best = int(np.argmax(sweep['f1_score']))
+        row['best_threshold'] = float(sweep['threshold'][best])
+        row['best_f1_score'] = float(sweep['f1_score'][best])
+        if accumulator.positives.sum() and accumulator.negatives.sum():
+            row['roc_auc'] = accumulator.roc_auc()
+
+    row.update(accumulator.metrics())
+    return row, sweep_rows
+
+
+def _evaluate_checkpoint_task(task):
+    """Process pool entry point; worker processes keep TensorFlow out of the parent"""
+    model_path, cache_dir, batch_size, thresholds = task
+    return evaluate_checkpoint(model_path, cache_dir, batch_size, thresholds)
+
+
+def _report_progress(row):
+    if 'error' in row:
+        print(f"❌ {row['checkpoint']}: {row['error']}")
+    else:
+        print(f"Evaluated {row['checkpoint']}: F1 {row['f1_score']:.4f}")
+
+
+def find_checkpoints(patterns):
+    """Expand glob patterns into a sorted, de-duplicated list of model files"""
+    paths = set()
+    for pattern in patterns:
+        paths.update(glob.glob(pattern))
+    return sorted(paths)
+
+
+def sweep_checkpoints(checkpoints, test_data_path, cache_dir='data/eval_cache', img_height=224, img_width=224,
+                      batch_size=32, workers=1, thresholds=DEFAULT_THRESHOLDS,
+                      output_path='checkpoint_comparison.csv', sweep_path='checkpoint_threshold_sweep.csv'):
+    """Evaluate every checkpoint on the shared test cache and write the comparison tables
+
+    With workers > 1 checkpoints are scored in separate processes; they all
+    read the same memory-mapped cache, so the test set is decoded only once.
+    """
+    import pandas as pd
+
+    cache_dir = prepare_test_cache(test_data_path, cache_dir, img_height, img_width)
+    tasks = [(path, cache_dir, batch_size, thresholds) for path in checkpoints]
+
+    rows = []
+    sweep_rows = []
+    if workers > 1 and len(tasks) > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # spawn: TensorFlow is not fork-safe once initialised
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = executor.map(_evaluate_checkpoint_task, tasks)
+            for row, checkpoint_sweep in results:
+                _report_progress(row)
+                rows.append(row)
+                sweep_rows.extend(checkpoint_sweep)
+    else:
+        for task in tasks:
+            row, checkpoint_sweep = _evaluate_checkpoint_task(task)
+            _report_progress(row)
+            rows.append(row)
+            sweep_rows.extend(checkpoint_sweep)
+
+    comparison = pd.DataFrame(rows)
+    if 'f1_score' in comparison:
+        comparison = comparison.sort_values('f1_score', ascending=False, na_position='last')
+    comparison.to_csv(output_path, index=False)
+    print(f"\n✅ Comparison of {len(rows)} checkpoints saved to '{output_path}'")
+
+    if sweep_rows:
+        pd.DataFrame(sweep_rows).to_csv(sweep_path, index=False)
+        print(f"✅ Threshold sweep saved to '{sweep_path}'")
+
+    return comparison
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare many trained checkpoints on one decoded test set")
+    parser.add_argument('checkpoints', nargs='*', default=['*.h5', '*.keras', '*.tflite'],
+                        help="Model files or glob patterns (default: *.h5 *.keras *.tflite)")
+    parser.add_argument('--test-data', default=None,
+                        help="Packed dataset directory, split manifest (.csv) or test directory "
+                             "(default: data/packed, data/splits.csv or data/test, whichever exists)")
+    parser.add_argument('--cache-dir', default='data/eval_cache', help="Where the decoded test set is cached")
+    parser.add_argument('--workers', type=int, default=1, help="Checkpoints evaluated in parallel processes")
+    parser.add_argument('--batch-size', type=int, default=32, help="Prediction batch size")
+    parser.add_argument('--img-size', type=int, default=224, help="Image height and width of the models")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.test_data:
+        test_data_path = args.test_data
+    elif is_packed_dataset('data/packed', 'test'):
+        test_data_path = 'data/packed'
+    elif os.path.exists('data/splits.csv'):
+        test_data_path = 'data/splits.csv'
+    else:
+        test_data_path = 'data/test'
+
+    checkpoints = find_checkpoints(args.checkpoints)
+    if not checkpoints or not os.path.exists(test_data_path):
+        print("❌ No checkpoints or test data found!")
+        print(f"Looked for {' '.join(args.checkpoints)} and '{test_data_path}'")
+        return
+
+    print(f"Comparing {len(checkpoints)} checkpoints on {test_data_path}")
+    comparison = sweep_checkpoints(checkpoints, test_data_path, args.cache_dir, args.img_size, args.img_size,
+                                   args.batch_size, args.workers)
+    print()
+    print(comparison.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
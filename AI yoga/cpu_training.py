@@ -0,0 +1,179 @@
+"""
+CPU training configuration for many-core servers
+Thread pool sizes, bfloat16 mixed precision and multi-worker data
+parallelism (tf.distribute.MultiWorkerMirroredStrategy) with local worker
+processes, used by chair_pose_classifier.py.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+MIXED_PRECISION_MODES = ['off', 'auto', 'bfloat16']
+
+
+def cpu_supports_bfloat16():
+    """Whether the CPU has native bfloat16 instructions (AVX512-BF16 or AMX)"""
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    flags = line.split(':', 1)[1].split()
+                    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+    except OSError:
+        pass
+    return False
+
+
+def configure_cpu_training(intra_op_threads=None, inter_op_threads=None, mixed_precision='off'):
+    """Set TensorFlow thread pools and precision policy
+
+    Must run before TensorFlow executes any op. Thread counts left as None
+    keep TensorFlow's defaults. mixed_precision 'auto' enables
+    mixed_bfloat16 only when the CPU supports bfloat16 natively; on older
+    CPUs bfloat16 is emulated and slower than float32.
+    Returns True when mixed precision was enabled.
+    """
+    import tensorflow as tf
+
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+    use_bfloat16 = mixed_precision == 'bfloat16' or (mixed_precision == 'auto' and cpu_supports_bfloat16())
+    if use_bfloat16:
+        tf.keras.mixed_precision.set_global_policy('mixed_bfloat16')
+    elif mixed_precision == 'auto':
+        print("CPU has no native bfloat16 support, training in float32")
+
+    print(f"CPU training: intra-op threads {intra_op_threads or 'default'}, "
+          f"inter-op threads {inter_op_threads or 'default'}, "
+          f"precision {'mixed_bfloat16' if use_bfloat16 else 'float32'}")
+    return use_bfloat16
+
+
+def worker_info():
+    """(number of workers, this worker's index) from TF_CONFIG, (1, 0) when unset"""
+    tf_config = json.loads(os.environ.get('TF_CONFIG', '{}'))
+    workers = tf_config.get('cluster', {}).get('worker', [])
+    return max(len(workers), 1), tf_config.get('task', {}).get('index', 0)
+
+
+def multi_worker_problem():
+    """Why multi-worker training cannot run with the installed Keras, or None when it can
+
+    The input pipeline hands model.fit a dataset already distributed by
+    tf.distribute, which only Keras 2 (tf.keras / tf_keras) accepts; Keras 3
+    fails inside fit on the PerReplica batches. Reads package metadata, so
+    TensorFlow is not imported.
+    """
+    from importlib import metadata
+
+    if os.environ.get('TF_USE_LEGACY_KERAS', '').lower() in ('1', 'true'):
+        try:
+            metadata.version('tf_keras')
+            return None
+        except metadata.PackageNotFoundError:
+            return "TF_USE_LEGACY_KERAS is set but the tf_keras package is not installed"
+    try:
+        version = metadata.version('keras')
+    except metadata.PackageNotFoundError:
+        return None
+    if int(version.split('.')[0]) >= 3:
+        return (f"multi-worker training needs Keras 2, but Keras {version} is installed; "
+                "install tf_keras and set TF_USE_LEGACY_KERAS=1, or train with a single worker")
+    return None
+
+
+def multi_worker_strategy():
+    """MultiWorkerMirroredStrategy for the cluster described by TF_CONFIG"""
+    import tensorflow as tf
+    return tf.distribute.MultiWorkerMirroredStrategy()
+
+
+def launch_local_workers(num_workers, argv, script=None, base_port=23456):
+    """Run a training script as num_workers local processes joined through TF_CONFIG
+
+    Each worker gets an equal share of the cores as intra-op threads.
+    Returns the first non-zero exit code, or 0 when every worker succeeded.
+    When a worker fails the others are terminated: they would otherwise
+    wait forever in collective ops for the missing peer.
+    """
+    script = script or sys.argv[0]
+    cluster = {'worker': [f'localhost:{base_port + i}' for i in range(num_workers)]}
+    threads = max(1, (os.cpu_count() or 1) // num_workers)
+
+    processes = []
+    for index in range(num_workers):
+        env = dict(os.environ, TF_CONFIG=json.dumps({'cluster': cluster,
+                                                     'task': {'type': 'worker', 'index': index}}))
+        command = [sys.executable, script, *argv, '--intra-op-threads', str(threads)]
+        processes.append(subprocess.Popen(command, env=env))
+    print(f"Started {num_workers} local training workers with {threads} threads each")
+
+    try:
+        while True:
+            exit_codes = [process.poll() for process in processes]
+            failed = next((code for code in exit_codes if code), None)
+            if failed is not None:
+                print(f"A training worker exited with code {failed}; stopping the others")
+                return failed
+            if all(code == 0 for code in exit_codes):
+                return 0
+            time.sleep(0.5)
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+def distributed_dataset(strategy, batches, seed=42):
+    """Distribute a Keras-style batch generator across the workers of a strategy
+
+    Worker i takes every n-th batch starting at i, so each batch is decoded
+    by one worker only and the global batch is n times the generator's.
+    Every worker runs the same number of steps (trailing batches that
+    cannot be split evenly are dropped), as the collective all-reduce
+    requires. Shuffling generators are reseeded identically on every worker
+    each epoch so the shards never overlap.
+    Returns (dataset, steps per epoch); the dataset repeats indefinitely.
+    """
+    import tensorflow as tf
+
+    num_workers, _ = worker_info()
+    steps = len(batches) // num_workers
+    if steps == 0:
+        raise ValueError(f"{len(batches)} batches cannot be shared by {num_workers} workers")
+
+    x, y = batches[0][:2]
+    signature = (tf.TensorSpec((None,) + x.shape[1:], tf.float32),
+                 tf.TensorSpec((None,) + np.shape(y)[1:], tf.float32))
+
+    def dataset_fn(input_context):
+        worker_index = input_context.input_pipeline_id
+        epoch = [0]
+
+        def generate():
+            if getattr(batches, 'shuffle', False):
+                np.random.seed(seed + epoch[0])
+                batches.on_epoch_end()
+            epoch[0] += 1
+            for step in range(steps):
+                x, y = batches[step * num_workers + worker_index][:2]
+                yield x.astype(np.float32), np.asarray(y, dtype=np.float32)
+
+        dataset = tf.data.Dataset.from_generator(generate, output_signature=signature)
+        return dataset.repeat().prefetch(tf.data.AUTOTUNE)
+
+    return strategy.distribute_datasets_from_function(dataset_fn), steps
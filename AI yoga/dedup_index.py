@@ -0,0 +1,130 @@
+"""
+Duplicate detection for the yoga pose training corpus
+Combines an exact content hash (SHA-1) with a 64-bit perceptual hash
+(difference hash) so re-encoded, resized or lightly edited copies of the
+same photo are grouped together before the data is split.
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+
+def difference_hash(gray_image, hash_size=8):
+    """64-bit difference hash of a grayscale image"""
+    small = cv2.resize(gray_image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two integer hashes"""
+    return bin(a ^ b).count('1')
+
+
+def _hash_image(path):
+    """Exact and perceptual hash of one image file (runs in a worker process)"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        gray = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            return path, None, None
+        return path, hashlib.sha1(data).hexdigest(), difference_hash(gray)
+    except Exception:
+        return path, None, None
+
+
+def compute_image_hashes(paths, workers=None):
+    """Hash many images in parallel; returns a list of (path, sha1, phash)"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 64:
+        return [_hash_image(path) for path in paths]
+
+    chunksize = max(1, min(64, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_hash_image, paths, chunksize=chunksize))
+
+
+class PerceptualHashIndex:
+    """Nearest-neighbour index over 64-bit hashes under Hamming distance
+
+    Uses multi-index hashing: each hash is split into max_distance + 1
+    bands and every band is stored in its own exact-match table. By the
+    pigeonhole principle two hashes within max_distance bits agree exactly
+    on at least one band, so a query only verifies the few hashes sharing a
+    band instead of scanning the whole corpus.
+    """
+
+    def __init__(self, max_distance=4, hash_bits=64):
+        self.max_distance = max_distance
+        num_bands = max_distance + 1
+        edges = np.linspace(0, hash_bits, num_bands + 1).astype(int)
+        self.bands = [(int(lo), (1 << int(hi - lo)) - 1) for lo, hi in zip(edges[:-1], edges[1:])]
+        self.tables = [{} for _ in self.bands]
+        self.hashes = {}
+
+    def _band_keys(self, h):
+        return [(h >> shift) & mask for shift, mask in self.bands]
+
+    def add(self, key, h):
+        """Insert a hash under the given key"""
+        self.hashes[key] = h
+        for table, band_key in zip(self.tables, self._band_keys(h)):
+            table.setdefault(band_key, []).append(key)
+
+    def query(self, h):
+        """Return [(key, distance)] for every stored hash within max_distance bits"""
+        candidates = set()
+        for table, band_key in zip(self.tables, self._band_keys(h)):
+            candidates.update(table.get(band_key, ()))
+
+        matches = []
+        for key in candidates:
+            distance = hamming_distance(h, self.hashes[key])
+            if distance <= self.max_distance:
+                matches.append((key, distance))
+        return matches
+
+
+def find_duplicate_groups(hashed_images, max_distance=4):
+    """Group images that are exact or near duplicates
+
+    hashed_images is a list of (path, sha1, phash). Returns a dict mapping
+    every path to its group representative (the first path of the group in
+    sorted order), so the result is deterministic.
+    """
+    hashed_images = sorted(h for h in hashed_images if h[1] is not None)
+    parent = {path: path for path, _, _ in hashed_images}
+
+    def find(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            # Keep the lexicographically smallest path as the root
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            parent[root_b] = root_a
+
+    exact = {}
+    index = PerceptualHashIndex(max_distance=max_distance)
+
+    for path, sha1, phash in hashed_images:
+        if sha1 in exact:
+            union(exact[sha1], path)
+            continue
+        exact[sha1] = path
+
+        for match, _ in index.query(phash):
+            union(match, path)
+        index.add(path, phash)
+
+    return {path: find(path) for path in parent}
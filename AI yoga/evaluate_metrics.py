@@ -1,42 +1,218 @@
-import tensorflow as tf
+import argparse
+import json
 import numpy as np
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-from sklearn.metrics import classification_report, confusion_matrix
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
 import os
+from packed_dataset import is_packed_dataset, load_packed_split
 
-def load_and_evaluate_model(model_path, test_data_path, img_height=224, img_width=224, batch_size=32):
+# TensorFlow, scikit-learn, matplotlib, seaborn and pandas are imported inside
+# the functions that use them, so --help and missing-file checks start instantly.
+
+REPORT_MODES = ['interactive', 'headless', 'none']
+
+# Single background thread that renders charts in headless mode
+_chart_executor = None
+_chart_futures = []
+
+def write_metrics_json(report, output_path):
+    """Write a metrics report (including the confusion matrix) as JSON"""
+    def to_builtin(value):
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        raise TypeError(f"Cannot serialize {type(value).__name__}")
+    
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=2, default=to_builtin)
+
+def draw_confusion_matrix(fig, cm, target_names):
+    """Draw the annotated confusion matrix heatmap on a figure"""
+    import seaborn as sns
+    
+    ax = fig.add_subplot()
+    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
+                xticklabels=target_names,
+                yticklabels=target_names,
+                cbar_kws={'label': 'Count'}, ax=ax)
+    
+    ax.set_title('Confusion Matrix - Chair Pose vs Other Poses\\nYoga Classification Model', 
+                 fontsize=14, fontweight='bold')
+    ax.set_ylabel('True Label', fontsize=12)
+    ax.set_xlabel('Predicted Label', fontsize=12)
+    
+    # Add text annotations for better understanding
+    ax.text(0.5, -0.1, f'Total Test Samples: {int(cm.sum())}', 
+            transform=ax.transAxes, ha='center', fontsize=10)
+
+def draw_metrics_chart(fig, metrics_values):
+    """Draw the accuracy/precision/recall/F1 bar chart on a figure"""
+    metrics_names = ['Accuracy', 'Precision', 'Recall', 'F1 Score']
+    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
+    
+    ax = fig.add_subplot()
+    bars = ax.bar(metrics_names, metrics_values, color=colors, alpha=0.8, edgecolor='black')
+    
+    # Add value labels on bars
+    for bar, value in zip(bars, metrics_values):
+        ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01,
+                f'{value:.3f}\\n({value*100:.1f}%)', 
+                ha='center', va='bottom', fontweight='bold')
+    
+    ax.set_title('Chair Pose Classification - Performance Metrics', 
+                 fontsize=14, fontweight='bold', pad=20)
+    ax.set_ylabel('Score', fontsize=12)
+    ax.set_ylim(0, 1.1)
+    ax.grid(True, alpha=0.3, axis='y')
+    
+    # Add horizontal reference lines
+    ax.axhline(y=0.8, color='green', linestyle='--', alpha=0.5, label='Good (80%)')
+    ax.axhline(y=0.9, color='blue', linestyle='--', alpha=0.5, label='Excellent (90%)')
+    ax.legend()
+
+def _render_chart_file(draw, args, figsize, output_path, dpi):
+    """Render one chart off-screen with the Agg canvas (no pyplot, thread-safe)"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    draw(fig, *args)
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    return output_path
+
+def save_chart(draw, args, figsize, output_path, report_mode='interactive', dpi=300):
+    """Draw a chart with draw(fig, *args) and save it according to the report mode
+
+    interactive: pyplot figure, saved and shown (blocks until closed)
+    headless:    rendered off-screen on a background thread; returns a future
+                 at once, call wait_for_charts() before exiting
+    none:        skipped
+    """
+    global _chart_executor
+    
+    if report_mode == 'none':
+        return None
+    
+    if report_mode == 'headless':
+        from concurrent.futures import ThreadPoolExecutor
+        if _chart_executor is None:
+            _chart_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='charts')
+        future = _chart_executor.submit(_render_chart_file, draw, args, figsize, output_path, dpi)
+        _chart_futures.append(future)
+        return future
+    
+    import matplotlib.pyplot as plt
+    
+    fig = plt.figure(figsize=figsize)
+    draw(fig, *args)
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
+    print(f"📊 Chart saved as '{output_path}'")
+    plt.show()
+    return None
+
+def save_evaluation_charts(cm, target_names, metrics_values, report_mode='interactive',
+                           confusion_path='chair_pose_confusion_matrix.png',
+                           chart_path='chair_pose_metrics_chart.png'):
+    """Save the confusion matrix and metrics charts according to the report mode"""
+    futures = [save_chart(draw_confusion_matrix, (cm, target_names), (10, 8), confusion_path, report_mode),
+               save_chart(draw_metrics_chart, (metrics_values,), (12, 6), chart_path, report_mode)]
+    if report_mode == 'headless':
+        print(f"📊 Rendering '{confusion_path}' and '{chart_path}' in the background")
+    return [future for future in futures if future is not None]
+
+def wait_for_charts():
+    """Block until every chart queued in headless mode has been written"""
+    global _chart_executor
+    while _chart_futures:
+        future = _chart_futures.pop(0)
+        try:
+            print(f"📊 Chart saved as '{future.result()}'")
+        except Exception as e:
+            print(f"❌ Chart rendering failed: {e}")
+    if _chart_executor is not None:
+        _chart_executor.shutdown(wait=True)
+        _chart_executor = None
+
+def load_and_evaluate_model(model_path, test_data_path, img_height=224, img_width=224, batch_size=32,
+                            report_mode='interactive'):
     """
     Load a trained model and evaluate it on test data
     Returns F1 score, Precision, Accuracy, and Recall
+
+    report_mode selects how charts are produced: 'interactive' (show
+    windows), 'headless' (background rendering, never blocks) or 'none'.
+    A JSON report with the confusion matrix is always written.
     """
+    from streaming_metrics import accumulate_predictions, metrics_accumulator
+    import pandas as pd
     
     print("Loading trained model...")
-    model = tf.keras.models.load_model(model_path)
+    if model_path.endswith('.tflite'):
+        # Exported (int8) model through the lightweight interpreter wrapper
+        from pose_model_runtime import TFLitePoseModel
+        model = TFLitePoseModel(model_path)
+    else:
+        import tensorflow as tf
+        model = tf.keras.models.load_model(model_path)
+    # A single sigmoid unit is the binary chair pose model, wider heads are multi-class
+    class_mode = 'binary' if model.output_shape[-1] == 1 else 'sparse'
     
     print("Preparing test data...")
-    test_datagen = tf.keras.preprocessing.image.ImageDataGenerator(rescale=1./255)
-    
-    test_generator = test_datagen.flow_from_directory(
-        test_data_path,
-        target_size=(img_height, img_width),
-        batch_size=batch_size,
-        class_mode='binary',
-        shuffle=False
-    )
+    if is_packed_dataset(test_data_path, 'test'):
+        # Stream the memory-mapped test split instead of decoding JPEGs
+        from packed_sequence import PackedImageSequence
+        test_images, test_labels, class_names = load_packed_split(test_data_path, 'test')
+        test_generator = PackedImageSequence(test_images, test_labels, batch_size)
+    elif test_data_path.endswith('.csv'):
+        # Read the test split of a split manifest in place
+        from tensorflow.keras.preprocessing.image import ImageDataGenerator
+        from split_manifest import load_split_manifest, split_frame
+        manifest = load_split_manifest(test_data_path)
+        class_names = sorted(manifest['label'].unique())
+        test_datagen = ImageDataGenerator(rescale=1./255)
+        
+        test_generator = test_datagen.flow_from_dataframe(
+            split_frame(manifest, 'test'),
+            x_col='path',
+            y_col='label',
+            classes=class_names,
+            target_size=(img_height, img_width),
+            batch_size=batch_size,
+            class_mode=class_mode,
+            shuffle=False
+        )
+    else:
+        from tensorflow.keras.preprocessing.image import ImageDataGenerator
+        test_datagen = ImageDataGenerator(rescale=1./255)
+        
+        test_generator = test_datagen.flow_from_directory(
+            test_data_path,
+            target_size=(img_height, img_width),
+            batch_size=batch_size,
+            class_mode=class_mode,
+            shuffle=False
+        )
+        class_names = sorted(test_generator.class_indices, key=test_generator.class_indices.get)
     
     print("Making predictions...")
-    predictions = model.predict(test_generator, verbose=1)
-    y_pred = (predictions > 0.5).astype(int).flatten()
-    y_true = test_generator.classes
+    # Confusion counts are accumulated per batch instead of keeping every prediction
+    accumulator = accumulate_predictions(model, test_generator, metrics_accumulator(model.output_shape[-1]))
+    
+    if class_mode == 'binary':
+        target_names = ['Not Chair Pose', 'Chair Pose']
+    else:
+        # Multi-class: macro-average metrics over every pose
+        target_names = [name.replace('_', ' ').title() for name in class_names]
+    average = accumulator.average
     
     # Calculate metrics
-    accuracy = accuracy_score(y_true, y_pred)
-    precision = precision_score(y_true, y_pred, average='binary')
-    recall = recall_score(y_true, y_pred, average='binary')
-    f1 = f1_score(y_true, y_pred, average='binary')
+    metrics = accumulator.metrics()
+    accuracy = metrics['accuracy']
+    precision = metrics['precision']
+    recall = metrics['recall']
+    f1 = metrics['f1_score']
     
     # Display results
     print("\\n" + "="*60)
@@ -73,63 +249,19 @@ def load_and_evaluate_model(model_path, test_data_path, img_height=224, img_widt
     
     # Detailed classification report
     print("\\nDetailed Classification Report:")
-    target_names = ['Not Chair Pose', 'Chair Pose']
-    print(classification_report(y_true, y_pred, target_names=target_names))
+    print(accumulator.report(target_names))
     
     # Confusion Matrix
-    cm = confusion_matrix(y_true, y_pred)
+    cm = accumulator.confusion_matrix()
     
-    plt.figure(figsize=(10, 8))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
-                xticklabels=target_names,
-                yticklabels=target_names,
-                cbar_kws={'label': 'Count'})
+    # Structured metrics artifact for unattended runs
+    report = dict(metrics_data, model=model_path, test_data=test_data_path, samples=accumulator.count,
+                  average=average, class_names=target_names, confusion_matrix=cm.tolist())
+    write_metrics_json(report, 'chair_pose_metrics.json')
+    print("📄 Metrics and confusion matrix saved to 'chair_pose_metrics.json'")
     
-    plt.title('Confusion Matrix - Chair Pose vs Other Poses\\nYoga Classification Model', 
-              fontsize=14, fontweight='bold')
-    plt.ylabel('True Label', fontsize=12)
-    plt.xlabel('Predicted Label', fontsize=12)
-    
-    # Add text annotations for better understanding
-    plt.text(0.5, -0.1, f'Total Test Samples: {len(y_true)}', 
-             transform=plt.gca().transAxes, ha='center', fontsize=10)
-    
-    plt.tight_layout()
-    plt.savefig('chair_pose_confusion_matrix.png', dpi=300, bbox_inches='tight')
-    print("\\n📊 Confusion matrix saved as 'chair_pose_confusion_matrix.png'")
-    plt.show()
-    
-    # Create metrics visualization
-    plt.figure(figsize=(12, 6))
-    
-    # Bar plot of metrics
-    metrics_names = ['Accuracy', 'Precision', 'Recall', 'F1 Score']
-    metrics_values = [accuracy, precision, recall, f1]
-    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
-    
-    bars = plt.bar(metrics_names, metrics_values, color=colors, alpha=0.8, edgecolor='black')
-    
-    # Add value labels on bars
-    for bar, value in zip(bars, metrics_values):
-        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01,
-                f'{value:.3f}\\n({value*100:.1f}%)', 
-                ha='center', va='bottom', fontweight='bold')
-    
-    plt.title('Chair Pose Classification - Performance Metrics', 
-              fontsize=14, fontweight='bold', pad=20)
-    plt.ylabel('Score', fontsize=12)
-    plt.ylim(0, 1.1)
-    plt.grid(True, alpha=0.3, axis='y')
-    
-    # Add horizontal reference lines
-    plt.axhline(y=0.8, color='green', linestyle='--', alpha=0.5, label='Good (80%)')
-    plt.axhline(y=0.9, color='blue', linestyle='--', alpha=0.5, label='Excellent (90%)')
-    plt.legend()
-    
-    plt.tight_layout()
-    plt.savefig('chair_pose_metrics_chart.png', dpi=300, bbox_inches='tight')
-    print("📈 Metrics chart saved as 'chair_pose_metrics_chart.png'")
-    plt.show()
+    save_evaluation_charts(cm, target_names, [accuracy, precision, recall, f1], report_mode,
+                           'chair_pose_confusion_matrix.png', 'chair_pose_metrics_chart.png')
     
     return metrics_data
 
@@ -137,10 +269,13 @@ def evaluate_predictions_array(y_true, y_pred):
     """
     Evaluate predictions given true labels and predicted labels
     """
-    accuracy = accuracy_score(y_true, y_pred)
-    precision = precision_score(y_true, y_pred, average='binary')
-    recall = recall_score(y_true, y_pred, average='binary')
-    f1 = f1_score(y_true, y_pred, average='binary')
+    from streaming_metrics import BinaryMetricsAccumulator
+    
+    metrics = BinaryMetricsAccumulator().update(y_true, y_pred).metrics()
+    accuracy = metrics['accuracy']
+    precision = metrics['precision']
+    recall = metrics['recall']
+    f1 = metrics['f1_score']
     
     print("\\n" + "="*50)
     print("EVALUATION RESULTS")
@@ -158,27 +293,51 @@ def evaluate_predictions_array(y_true, y_pred):
         'f1_score': f1
     }
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a trained yoga pose classifier")
+    parser.add_argument('--model', default='chair_pose_classifier_final.h5',
+                        help="Keras (.h5) or exported (.tflite) model to evaluate")
+    parser.add_argument('--test-data', default=None,
+                        help="Packed dataset directory, split manifest (.csv) or test directory "
+                             "(default: data/packed, data/splits.csv or data/test, whichever exists)")
+    parser.add_argument('--report', choices=REPORT_MODES, default='interactive',
+                        help="Chart handling: show windows (interactive), render in the background "
+                             "without a display (headless) or skip charts (none)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main evaluation function"""
+    args = parse_args(argv)
+    
     print("Chair Pose Classification - Metrics Evaluation")
     print("=" * 50)
     
     # Check if model exists
-    model_path = 'chair_pose_classifier_final.h5'
-    test_data_path = 'data/test'
+    model_path = args.model
+    if args.test_data:
+        test_data_path = args.test_data
+    elif is_packed_dataset('data/packed', 'test'):
+        test_data_path = 'data/packed'
+    elif os.path.exists('data/splits.csv'):
+        test_data_path = 'data/splits.csv'
+    else:
+        test_data_path = 'data/test'
     
     if os.path.exists(model_path) and os.path.exists(test_data_path):
         print(f"Found model: {model_path}")
         print(f"Found test data: {test_data_path}")
         
         # Evaluate the model
-        metrics = load_and_evaluate_model(model_path, test_data_path)
+        metrics = load_and_evaluate_model(model_path, test_data_path, report_mode=args.report)
+        wait_for_charts()
         
         print("\\n🎉 Evaluation complete!")
         print("Files generated:")
         print("- chair_pose_metrics.csv")
-        print("- chair_pose_confusion_matrix.png")
-        print("- chair_pose_metrics_chart.png")
+        print("- chair_pose_metrics.json")
+        if args.report != 'none':
+            print("- chair_pose_confusion_matrix.png")
+            print("- chair_pose_metrics_chart.png")
         
     else:
         print("❌ Model or test data not found!")
@@ -0,0 +1,115 @@
+"""
+Export a trained pose classifier to an int8-quantized TFLite model
+Post-training quantization is calibrated on a random sample of the
+training set, giving a smaller artifact with faster CPU inference that
+pose_model_runtime.TFLitePoseModel can load without full TensorFlow.
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from packed_dataset import is_packed_dataset, list_directory_samples, load_packed_split
+
+
+def calibration_images(data_path, num_samples=200, img_height=224, img_width=224, seed=42):
+    """Yield a seeded random sample of training images as RGB uint8 arrays
+
+    data_path may be a packed dataset directory, a split manifest (.csv) or
+    a class-per-subdirectory training directory.
+    """
+    import cv2
+
+    rng = np.random.RandomState(seed)
+
+    if is_packed_dataset(data_path, 'train'):
+        images, _, _ = load_packed_split(data_path, 'train')
+        # Sorted indices keep memory-mapped reads moving forward through the file
+        indices = np.sort(rng.choice(len(images), min(num_samples, len(images)), replace=False))
+        for i in indices:
+            yield np.asarray(images[i])
+        return
+
+    if data_path.endswith('.csv'):
+        from split_manifest import load_split_manifest, split_frame
+        paths = list(split_frame(load_split_manifest(data_path), 'train')['path'])
+    else:
+        paths = [path for path, _ in list_directory_samples(data_path)[0]]
+
+    for i in rng.choice(len(paths), min(num_samples, len(paths)), replace=False):
+        img = cv2.imread(paths[i])
+        if img is not None:
+            img = cv2.resize(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), (img_width, img_height))
+            yield img
+
+
+def export_quantized_tflite(model, output_path, calibration_data, num_samples=200):
+    """Convert a Keras model to a full-integer (int8) TFLite model
+
+    The model input becomes uint8 so raw RGB pixels can be fed directly;
+    the output stays float32 probabilities.
+    """
+    import tensorflow as tf
+
+    if isinstance(model, str):
+        model = tf.keras.models.load_model(model)
+    img_height, img_width = model.input_shape[1:3]
+
+    def representative_dataset():
+        for img in calibration_images(calibration_data, num_samples, img_height, img_width):
+            # Same [0, 1] scaling as the training generators
+            yield [img[None].astype(np.float32) / 255.0]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.uint8
+
+    tflite_model = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+    print(f"Quantized model saved as '{output_path}' ({len(tflite_model) / 1024:.1f} KB)")
+    return output_path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export an int8-quantized TFLite pose model")
+    parser.add_argument('--model', default='chair_pose_classifier_final.h5', help="Trained Keras model")
+    parser.add_argument('--output', default='chair_pose_classifier_int8.tflite', help="TFLite output path")
+    parser.add_argument('--calibration-samples', type=int, default=200,
+                        help="Training images used to calibrate quantization ranges")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    model_path = args.model
+    output_path = args.output
+
+    if is_packed_dataset('data/packed', 'train'):
+        calibration_data = 'data/packed'
+    elif os.path.exists('data/splits.csv'):
+        calibration_data = 'data/splits.csv'
+    else:
+        calibration_data = 'data/train'
+
+    if not os.path.exists(model_path) or not os.path.exists(calibration_data):
+        print("❌ Model or training data not found!")
+        print(f"Please ensure you have '{model_path}' and '{calibration_data}'")
+        print("Run the training script first: python chair_pose_classifier.py")
+        return
+
+    print(f"Calibrating int8 quantization on samples from {calibration_data}...")
+    export_quantized_tflite(model_path, output_path, calibration_data, args.calibration_samples)
+
+    keras_size = os.path.getsize(model_path) / 1024
+    tflite_size = os.path.getsize(output_path) / 1024
+    print(f"Size: {keras_size:.1f} KB (Keras) -> {tflite_size:.1f} KB (int8 TFLite)")
+    print(f"Evaluate it with: load_and_evaluate_model('{output_path}', ...)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Packed dataset format for yoga pose training
+Stores each split as one memory-mapped uint8 image array plus a label index,
+so training and evaluation stream large sequential reads instead of
+decoding thousands of small JPEG files.
+
+Layout of a packed directory (one set of files per split):
+    <split>_images.npy   uint8 array of shape (capacity, height, width, 3), RGB
+    <split>_labels.npy   int64 array of class indices
+    <split>_index.csv    source path and class name of every packed sample
+    <split>_meta.json    sample count, image size and class names
+"""
+
+import csv
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def _split_paths(packed_dir, split):
+    packed_dir = Path(packed_dir)
+    return {
+        'images': packed_dir / f"{split}_images.npy",
+        'labels': packed_dir / f"{split}_labels.npy",
+        'index': packed_dir / f"{split}_index.csv",
+        'meta': packed_dir / f"{split}_meta.json",
+    }
+
+
+def is_packed_dataset(packed_dir, split='test'):
+    """Check whether a directory holds a packed copy of the given split"""
+    return _split_paths(packed_dir, split)['meta'].exists()
+
+
+class PackedDatasetWriter:
+    """Append fixed-size RGB images to a memory-mapped uint8 array"""
+
+    def __init__(self, output_dir, split, capacity, class_names, img_height=224, img_width=224):
+        os.makedirs(output_dir, exist_ok=True)
+        self.paths = _split_paths(output_dir, split)
+        self.split = split
+        self.capacity = capacity
+        self.class_names = list(class_names)
+        self.img_height = img_height
+        self.img_width = img_width
+
+        self.images = np.lib.format.open_memmap(
+            self.paths['images'], mode='w+', dtype=np.uint8,
+            shape=(capacity, img_height, img_width, 3)
+        )
+        self.labels = np.zeros(capacity, dtype=np.int64)
+        self.sources = []
+        self.count = 0
+
+    def add(self, image, label, source=''):
+        """Append one RGB image; it is resized if it does not match the packed size"""
+        if self.count >= self.capacity:
+            raise ValueError(f"Packed split '{self.split}' is full ({self.capacity} samples)")
+
+        if image.shape[:2] != (self.img_height, self.img_width):
+            import cv2
+            image = cv2.resize(image, (self.img_width, self.img_height), interpolation=cv2.INTER_AREA)
+
+        self.images[self.count] = image
+        self.labels[self.count] = label
+        self.sources.append(source)
+        self.count += 1
+
+    def add_batch(self, images, labels, sources=None):
+        """Append a batch of already-sized RGB images with one contiguous write"""
+        n = len(images)
+        if self.count + n > self.capacity:
+            raise ValueError(f"Packed split '{self.split}' is full ({self.capacity} samples)")
+
+        self.images[self.count:self.count + n] = images
+        self.labels[self.count:self.count + n] = labels
+        self.sources.extend(sources if sources is not None else [''] * n)
+        self.count += n
+
+    def close(self):
+        """Flush the image array and write the label index and metadata"""
+        self.images.flush()
+        del self.images
+
+        np.save(self.paths['labels'], self.labels[:self.count])
+
+        with open(self.paths['index'], 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['source', 'label', 'class_name'])
+            for source, label in zip(self.sources, self.labels[:self.count]):
+                writer.writerow([source, int(label), self.class_names[label]])
+
+        meta = {
+            'split': self.split,
+            'count': self.count,
+            'img_height': self.img_height,
+            'img_width': self.img_width,
+            'class_names': self.class_names,
+        }
+        with open(self.paths['meta'], 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        return self.count
+
+
+def list_directory_samples(split_dir):
+    """List (path, label) pairs from a class-per-subdirectory split
+
+    Classes are sorted alphabetically, matching the label indices that
+    Keras' flow_from_directory assigns.
+    """
+    split_dir = Path(split_dir)
+    class_names = sorted(d.name for d in split_dir.iterdir() if d.is_dir())
+
+    samples = []
+    for label, class_name in enumerate(class_names):
+        for file in sorted(os.listdir(split_dir / class_name)):
+            if file.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((str(split_dir / class_name / file), label))
+
+    return samples, class_names
+
+
+def pack_samples(samples, class_names, output_dir, split, img_height=224, img_width=224, seed=42):
+    """Decode, resize and pack a list of (path, label) samples into one split
+
+    Samples are written in a seeded random order (None keeps the given
+    order), so contiguous reads of a class-sorted listing still mix classes.
+    """
+    import cv2
+
+    if seed is not None:
+        samples = [samples[i] for i in np.random.RandomState(seed).permutation(len(samples))]
+
+    writer = PackedDatasetWriter(output_dir, split, len(samples), class_names,
+                                 img_height=img_height, img_width=img_width)
+    skipped = 0
+
+    for path, label in samples:
+        img = cv2.imread(path)
+        if img is None:
+            skipped += 1
+            continue
+        writer.add(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), label, source=path)
+
+    count = writer.close()
+    if skipped:
+        print(f"Skipped {skipped} unreadable images while packing '{split}'")
+    return count
+
+
+def load_packed_split(packed_dir, split):
+    """Open a packed split read-only
+
+    Returns (images, labels, class_names) where images is a memory-mapped
+    uint8 array, so nothing is read from disk until it is indexed.
+    """
+    paths = _split_paths(packed_dir, split)
+    with open(paths['meta']) as f:
+        meta = json.load(f)
+
+    images = np.load(paths['images'], mmap_mode='r')[:meta['count']]
+    labels = np.load(paths['labels'])
+    return images, labels, meta['class_names']
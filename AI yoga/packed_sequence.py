@@ -0,0 +1,55 @@
+"""
+Keras batch generator over a packed (memory-mapped) dataset split
+Kept separate from chair_pose_classifier.py so TensorFlow is only imported
+on the code paths that actually stream packed data.
+"""
+
+import numpy as np
+import tensorflow as tf
+
+
+class PackedImageSequence(tf.keras.utils.Sequence):
+    """Batches from a memory-mapped packed split
+
+    Without shuffle each batch is one contiguous slice of the packed array.
+    With shuffle every epoch draws its batches from a fresh permutation of
+    all samples, so batches mix classes however the file is ordered; each
+    batch's indices are sorted so its reads still move forward through the file.
+    """
+    def __init__(self, images, labels, batch_size=32, shuffle=False, datagen=None):
+        self.images = images
+        self.labels = labels
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.datagen = datagen
+        self.classes = np.asarray(labels)
+        self.samples = len(labels)
+        self.indices = np.arange(self.samples)
+        if self.shuffle:
+            np.random.shuffle(self.indices)
+
+    def __len__(self):
+        return int(np.ceil(self.samples / self.batch_size))
+
+    def __getitem__(self, index):
+        start = index * self.batch_size
+        end = min(start + self.batch_size, self.samples)
+
+        if self.shuffle:
+            batch = np.sort(self.indices[start:end])
+        else:
+            batch = slice(start, end)
+        x = np.asarray(self.images[batch], dtype=np.float32)
+        y = np.asarray(self.labels[batch], dtype=np.float32)
+
+        if self.datagen is not None:
+            for i in range(len(x)):
+                x[i] = self.datagen.standardize(self.datagen.random_transform(x[i]))
+        else:
+            x /= 255.0
+
+        return x, y
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            np.random.shuffle(self.indices)
@@ -0,0 +1,109 @@
+"""
+Lightweight runtime for exported pose classification models
+Loads a .tflite model with the standalone TFLite interpreter when it is
+installed (tflite-runtime or ai-edge-litert), so kiosks can classify images
+without importing full TensorFlow. Falls back to tf.lite otherwise.
+"""
+
+import numpy as np
+
+
+def _interpreter_class():
+    """Return the lightest available TFLite Interpreter class"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class TFLitePoseModel:
+    """Run an exported (optionally int8-quantized) pose model
+
+    Mirrors the parts of the Keras model API used for evaluation:
+    predict() accepts an image batch or a Keras-style batch generator and
+    output_shape describes the classifier head.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self.interpreter = _interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self.batch_size = 1
+
+    @property
+    def input_shape(self):
+        return tuple(self.input_details['shape'])
+
+    @property
+    def output_shape(self):
+        return (None, int(self.output_details['shape'][-1]))
+
+    def _quantize_input(self, images):
+        """Convert images to the model's input dtype
+
+        Float input is expected in [0, 1] like the training generators;
+        uint8 input is treated as raw pixels.
+        """
+        images = np.asarray(images)
+        dtype = self.input_details['dtype']
+        if images.dtype == np.uint8 and dtype == np.uint8:
+            scale, zero_point = self.input_details['quantization']
+            if zero_point == 0 and abs(scale * 255 - 1) < 1e-3:
+                # Calibrated on [0, 1] input: raw pixels are already quantized
+                return images
+
+        if images.dtype == np.uint8:
+            images = images.astype(np.float32) / 255.0
+
+        if dtype in (np.uint8, np.int8):
+            scale, zero_point = self.input_details['quantization']
+            info = np.iinfo(dtype)
+            return np.clip(np.round(images / scale + zero_point), info.min, info.max).astype(dtype)
+        return images.astype(dtype)
+
+    def _dequantize_output(self, output):
+        if self.output_details['dtype'] in (np.uint8, np.int8):
+            scale, zero_point = self.output_details['quantization']
+            return (output.astype(np.float32) - zero_point) * scale
+        return output
+
+    def predict_batch(self, images):
+        """Predict class probabilities for a batch of images"""
+        images = self._quantize_input(images)
+        if len(images) != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_details['index'], images.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = len(images)
+
+        self.interpreter.set_tensor(self.input_details['index'], images)
+        self.interpreter.invoke()
+        return self._dequantize_output(self.interpreter.get_tensor(self.output_details['index']))
+
+    # Keras name, used by the streaming evaluation loop
+    predict_on_batch = predict_batch
+
+    def predict(self, data, verbose=0):
+        """Predict for an image array or every batch of a Keras-style generator"""
+        if isinstance(data, np.ndarray):
+            return self.predict_batch(data)
+
+        outputs = []
+        for i in range(len(data)):
+            batch = data[i]
+            x = batch[0] if isinstance(batch, tuple) else batch
+            outputs.append(self.predict_batch(x))
+            if verbose:
+                print(f"\rBatch {i + 1}/{len(data)}", end='')
+        if verbose:
+            print()
+        return np.concatenate(outputs, axis=0)
@@ -1,12 +1,89 @@
 import os
+import sys
+import csv
+import hashlib
 import zipfile
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import requests
 import cv2
 import numpy as np
 from PIL import Image
 import pandas as pd
+from packed_dataset import list_directory_samples, pack_samples
+from dedup_index import compute_image_hashes, find_duplicate_groups
+from split_manifest import assign_splits, load_split_manifest, save_split_manifest, split_frame
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CHAIR_POSE_KEYWORDS = ['chair', 'utkatasana']
+
+# Filename/directory keywords for every pose in the catalog, checked in order
+POSE_CATALOG_KEYWORDS = {
+    'chair_pose': CHAIR_POSE_KEYWORDS,
+    'mountain': ['mountain', 'tadasana'],
+    'tree': ['tree', 'vriksasana', 'vrikshasana', 'vrksasana'],
+    'sukasana': ['sukasana', 'sukhasana', 'easy_pose'],
+    'childs_pose': ['child', 'balasana'],
+    'warrior2': ['warrior2', 'warrior_ii', 'warrior ii', 'virabhadrasana_ii', 'virabhadrasana ii'],
+}
+MANIFEST_FIELDS = ['path', 'size', 'mtime', 'sha1', 'label', 'output']
+
+def _init_extraction_worker():
+    """Keep OpenCV single-threaded inside each worker process"""
+    cv2.setNumThreads(1)
+
+def _extract_image(task):
+    """Hash, decode, resize and write one source image
+
+    Runs in a worker process. The output file is named after the content
+    hash, so re-processing an unchanged image rewrites nothing and exact
+    duplicates across sources collapse onto one output file.
+    """
+    file_path, size, mtime, label = task
+    record = {'path': file_path, 'size': size, 'mtime': mtime,
+              'sha1': '', 'label': '', 'output': ''}
+
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        record['sha1'] = hashlib.sha1(data).hexdigest()
+
+        # Decode from the bytes already read for hashing
+        img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            return record, "could not decode image"
+
+        record['label'] = label
+        prefix = label.split('_')[0]
+        target_path = f"data/train/{label}/{prefix}_{record['sha1'][:16]}.jpg"
+
+        if not os.path.exists(target_path):
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            img_resized = cv2.resize(img, (224, 224))
+            ok, encoded = cv2.imencode('.jpg', img_resized)
+            if not ok:
+                return record, "could not encode image"
+            # Write under a temporary, non-image name and rename, so a run killed
+            # mid-write never leaves a truncated JPEG that a resume would skip
+            partial = f"{target_path}.{os.getpid()}.partial"
+            with open(partial, 'wb') as f:
+                f.write(encoded.tobytes())
+            os.replace(partial, target_path)
+        record['output'] = target_path
+        return record, None
+
+    except Exception as e:
+        return record, str(e)
+
+def load_extraction_manifest(manifest_path):
+    """Load the extraction manifest as {source path: latest record}"""
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, newline='') as f:
+            for row in csv.DictReader(f):
+                manifest[row['path']] = row
+    return manifest
 
 class DatasetPreparation:
     def __init__(self):
@@ -46,85 +123,264 @@ class DatasetPreparation:
         print("1. Run: git clone https://github.com/Manoj-2702/Yoga_Poses-Dataset.git")
         print("2. Move contents to data/raw/github/")
         
-    def extract_chair_poses(self, source_dir):
-        """Extract chair pose images from the dataset"""
-        chair_pose_count = 0
-        other_pose_count = 0
+    def extract_chair_poses(self, source_dir, workers=None, manifest_path="data/extraction_manifest.csv",
+                            label_keywords=None, default_label='other_poses'):
+        """Extract chair pose images from the dataset
+
+        Images are processed by a pool of worker processes (one per core by
+        default, workers=1 runs in-process). Every processed source file is
+        recorded in the manifest with its size, mtime and content hash, so a
+        re-run only processes new or changed files and an interrupted run
+        resumes where it stopped.
+
+        By default images are labelled chair_pose or other_poses. Pass
+        label_keywords=POSE_CATALOG_KEYWORDS to extract one class per
+        catalog pose for the multi-class model; images matching no pose go
+        to default_label, or are skipped when it is None.
+        """
+        if label_keywords is None:
+            label_keywords = {'chair_pose': CHAIR_POSE_KEYWORDS}
+        
+        manifest = load_extraction_manifest(manifest_path)
+        tasks = []
+        unchanged = 0
         
         # Look for chair pose images (usually named with 'chair' or similar)
         for root, dirs, files in os.walk(source_dir):
             for file in files:
                 if file.lower().endswith(('.jpg', '.jpeg', '.png')):
                     file_path = os.path.join(root, file)
+                    stat = os.stat(file_path)
                     
-                    # Check if it's a chair pose based on filename or directory
-                    is_chair_pose = any(keyword in file.lower() or keyword in root.lower() 
-                                      for keyword in ['chair', 'utkatasana'])
+                    # Skip files already processed with the same size and mtime
+                    previous = manifest.get(file_path)
+                    if (previous and previous['output'] and int(previous['size']) == stat.st_size
+                            and float(previous['mtime']) == stat.st_mtime):
+                        unchanged += 1
+                        continue
                     
-                    try:
-                        # Load and validate image
-                        img = cv2.imread(file_path)
-                        if img is not None:
-                            # Resize image to standard size
-                            img_resized = cv2.resize(img, (224, 224))
-                            
-                            if is_chair_pose:
-                                # This is a chair pose
-                                target_path = f"data/train/chair_pose/chair_{chair_pose_count}.jpg"
-                                cv2.imwrite(target_path, img_resized)
-                                chair_pose_count += 1
-                            else:
-                                # This is another pose
-                                target_path = f"data/train/other_poses/other_{other_pose_count}.jpg"
-                                cv2.imwrite(target_path, img_resized)
-                                other_pose_count += 1
-                                
-                    except Exception as e:
-                        print(f"Error processing {file_path}: {e}")
-                        
-        print(f"Extracted {chair_pose_count} chair pose images")
-        print(f"Extracted {other_pose_count} other pose images")
+                    # Find the pose based on filename or directory
+                    label = next((pose for pose, keywords in label_keywords.items()
+                                  if any(keyword in file.lower() or keyword in root.lower()
+                                         for keyword in keywords)), default_label)
+                    if label is None:
+                        continue
+                    tasks.append((file_path, stat.st_size, stat.st_mtime, label))
         
-    def split_data(self):
-        """Split data into train/validation/test sets"""
-        import random
+        print(f"{len(tasks)} new or changed images to process, {unchanged} unchanged")
+        if not tasks:
+            return
         
-        # Split chair poses
-        chair_files = os.listdir("data/train/chair_pose")
-        random.shuffle(chair_files)
+        workers = workers or os.cpu_count() or 1
+        # Several chunks per worker keeps the pool balanced without per-file IPC
+        chunksize = max(1, min(64, len(tasks) // (workers * 4)))
         
-        chair_train = chair_files[:int(0.7 * len(chair_files))]
-        chair_val = chair_files[int(0.7 * len(chair_files)):int(0.85 * len(chair_files))]
-        chair_test = chair_files[int(0.85 * len(chair_files)):]
+        label_counts = {}
+        write_header = not os.path.exists(manifest_path)
         
-        # Move validation files
-        for file in chair_val:
-            shutil.move(f"data/train/chair_pose/{file}", f"data/validation/chair_pose/{file}")
+        with open(manifest_path, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS)
+            if write_header:
+                writer.writeheader()
             
-        # Move test files  
-        for file in chair_test:
-            shutil.move(f"data/train/chair_pose/{file}", f"data/test/chair_pose/{file}")
+            if workers == 1:
+                _init_extraction_worker()
+                results = map(_extract_image, tasks)
+                executor = None
+            else:
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_extraction_worker)
+                results = executor.map(_extract_image, tasks, chunksize=chunksize)
             
-        # Split other poses
-        other_files = os.listdir("data/train/other_poses")
-        random.shuffle(other_files)
+            try:
+                for i, (record, error) in enumerate(results, 1):
+                    if error:
+                        print(f"Error processing {record['path']}: {error}")
+                        continue
+                    
+                    writer.writerow(record)
+                    label_counts[record['label']] = label_counts.get(record['label'], 0) + 1
+                    
+                    # Flush regularly so an interrupted run can resume
+                    if i % chunksize == 0:
+                        f.flush()
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+                        
+        for label, count in sorted(label_counts.items()):
+            print(f"Extracted {count} {label.replace('_', ' ')} images")
         
-        other_train = other_files[:int(0.7 * len(other_files))]
-        other_val = other_files[int(0.7 * len(other_files)):int(0.85 * len(other_files))]
-        other_test = other_files[int(0.85 * len(other_files)):]
+    def deduplicate(self, class_dirs=None, max_distance=4, drop=True,
+                    index_path="data/dedup_index.csv", workers=None):
+        """Find exact and near-duplicate images before splitting
+
+        Writes an index of every image with its content hash, perceptual
+        hash and duplicate group. With drop=True every image except the
+        group representative is deleted, so duplicates can no longer leak
+        between the train, validation and test splits.
+        """
+        if class_dirs is None:
+            train_dir = self.base_dir / "train"
+            class_dirs = [str(d) for d in sorted(train_dir.iterdir()) if d.is_dir()] if train_dir.exists() else []
         
-        # Move validation files
-        for file in other_val:
-            shutil.move(f"data/train/other_poses/{file}", f"data/validation/other_poses/{file}")
-            
-        # Move test files
-        for file in other_test:
-            shutil.move(f"data/train/other_poses/{file}", f"data/test/other_poses/{file}")
-            
-        print("Data split completed!")
-        print(f"Training: {len(chair_train)} chair poses, {len(other_train)} other poses")
-        print(f"Validation: {len(chair_val)} chair poses, {len(other_val)} other poses") 
-        print(f"Test: {len(chair_test)} chair poses, {len(other_test)} other poses")
+        paths = []
+        for class_dir in class_dirs:
+            if os.path.exists(class_dir):
+                paths.extend(os.path.join(class_dir, f) for f in sorted(os.listdir(class_dir))
+                             if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+        
+        hashed_images = compute_image_hashes(paths, workers=workers)
+        groups = find_duplicate_groups(hashed_images, max_distance=max_distance)
+        
+        duplicates = [path for path, representative in groups.items() if path != representative]
+        cross_label = sum(1 for path in duplicates
+                          if os.path.dirname(path) != os.path.dirname(groups[path]))
+        
+        with open(index_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['path', 'sha1', 'phash', 'group', 'keep'])
+            for path, sha1, phash in hashed_images:
+                if sha1 is None:
+                    continue
+                representative = groups[path]
+                writer.writerow([path, sha1, f"{phash:016x}", representative, path == representative])
+        
+        print(f"Found {len(duplicates)} duplicates of {len(groups)} images "
+              f"in {len(set(groups.values()))} groups")
+        if cross_label:
+            print(f"Warning: {cross_label} duplicates carry a different label than their group")
+        
+        if drop:
+            for path in duplicates:
+                os.remove(path)
+            print(f"Removed {len(duplicates)} duplicate images")
+        
+        return groups
+        
+    def list_split_images(self):
+        """List every image under data/<split>/<class>/ as a DataFrame of path, label, split"""
+        rows = []
+        for split in ['train', 'validation', 'test']:
+            split_dir = self.base_dir / split
+            if not split_dir.exists():
+                continue
+            for class_dir in sorted(d for d in split_dir.iterdir() if d.is_dir()):
+                for file in sorted(os.listdir(class_dir)):
+                    if file.lower().endswith(('.jpg', '.jpeg', '.png')):
+                        rows.append({'path': (class_dir / file).as_posix(),
+                                     'label': class_dir.name, 'split': split})
+        return pd.DataFrame(rows, columns=['path', 'label', 'split'])
+        
+    def split_data(self, seed=42, train_ratio=0.7, val_ratio=0.15, k_folds=5,
+                   manifest_path="data/splits.csv", dedup_index_path="data/dedup_index.csv"):
+        """Split data into train/validation/test sets
+
+        Writes a seeded split manifest (path, label, split, fold, group)
+        instead of moving files, so re-splitting or switching cross-validation
+        folds only touches metadata. Images are collected from every split
+        directory, and duplicate groups from deduplicate() stay together.
+        """
+        samples = self.list_split_images()[['path', 'label']]
+        if os.path.exists(dedup_index_path):
+            dedup = pd.read_csv(dedup_index_path)
+            groups = dict(zip(dedup['path'].map(lambda p: Path(p).as_posix()),
+                              dedup['group'].map(lambda p: Path(p).as_posix())))
+            samples['group'] = samples['path'].map(groups).fillna(samples['path'])
+        
+        manifest = assign_splits(samples, seed=seed, train_ratio=train_ratio,
+                                 val_ratio=val_ratio, k_folds=k_folds)
+        save_split_manifest(manifest, manifest_path)
+        
+        counts = manifest.groupby(['split', 'label']).size()
+        print(f"Data split completed! Manifest written to {manifest_path}")
+        for split in ['train', 'validation', 'test']:
+            if split in counts:
+                summary = ", ".join(f"{n} {label}" for label, n in counts[split].items())
+                print(f"{split.title()}: {summary}")
+
+    def cache_landmarks(self, manifest_path="data/splits.csv", cache_path="data/landmarks.npz"):
+        """Extract MediaPipe pose landmarks once per image and cache them
+
+        The cache holds a (N, 33, 4) landmark array with the path, label and
+        split of every image, and feeds the landmark-based classifier in
+        landmark_classifier.py. Images already in the cache are not
+        processed again.
+        """
+        if str(REPO_ROOT) not in sys.path:
+            sys.path.insert(0, str(REPO_ROOT))
+        from pose_detector import pooled_detector
+        from landmark_classifier import NUM_LANDMARKS, landmarks_to_array, load_landmark_cache
+        
+        if os.path.exists(manifest_path):
+            samples = load_split_manifest(manifest_path)
+        else:
+            samples = self.list_split_images()
+        
+        cached = {}
+        if os.path.exists(cache_path):
+            previous = load_landmark_cache(cache_path)
+            for i, path in enumerate(previous['paths']):
+                cached[str(path)] = (previous['landmarks'][i], previous['aspect_ratio'][i],
+                                     previous['detected'][i])
+        
+        n = len(samples)
+        landmarks = np.zeros((n, NUM_LANDMARKS, 4), dtype=np.float32)
+        aspect_ratio = np.ones(n, dtype=np.float32)
+        detected = np.zeros(n, dtype=bool)
+        processed = 0
+        
+        # Unrelated still images: image mode, so no tracking state leaks between them
+        with pooled_detector() as detector:
+            for i, path in enumerate(samples['path']):
+                if path in cached:
+                    landmarks[i], aspect_ratio[i], detected[i] = cached[path]
+                    continue
+                
+                img = cv2.imread(path)
+                processed += 1
+                if img is None:
+                    continue
+                
+                results = detector.detect_pose(img)
+                points = landmarks_to_array(results)
+                aspect_ratio[i] = img.shape[1] / img.shape[0]
+                if points is not None:
+                    landmarks[i] = points
+                    detected[i] = True
+        
+        np.savez(cache_path, paths=samples['path'].to_numpy(dtype=str),
+                 labels=samples['label'].to_numpy(dtype=str),
+                 splits=samples['split'].to_numpy(dtype=str),
+                 landmarks=landmarks, aspect_ratio=aspect_ratio, detected=detected)
+        
+        print(f"Cached landmarks for {n} images in {cache_path} "
+              f"({processed} newly processed, {int(detected.sum())} with a detected pose)")
+        
+    def export_packed_dataset(self, output_dir="data/packed", img_height=224, img_width=224,
+                              manifest_path="data/splits.csv"):
+        """Pack the train/validation/test splits into memory-mapped arrays
+
+        Splits come from the split manifest when one exists, otherwise from
+        the train/validation/test directories.
+        """
+        manifest = load_split_manifest(manifest_path) if os.path.exists(manifest_path) else None
+        
+        for split in ['train', 'validation', 'test']:
+            if manifest is not None:
+                class_names = sorted(manifest['label'].unique())
+                rows = split_frame(manifest, split)
+                samples = [(path, class_names.index(label))
+                           for path, label in zip(rows['path'], rows['label'])]
+            else:
+                split_dir = self.base_dir / split
+                if not split_dir.exists():
+                    print(f"Skipping {split}: {split_dir} not found")
+                    continue
+                samples, class_names = list_directory_samples(split_dir)
+
+            count = pack_samples(samples, class_names, output_dir, split,
+                                 img_height=img_height, img_width=img_width)
+            print(f"Packed {count} {split} images into {output_dir}/{split}_images.npy")
 
 def create_sample_images():
     """Create some sample synthetic images for testing"""
@@ -187,6 +443,8 @@ def main():
     print("   - Place chair pose images in: data/raw/chair_poses/")
     print("   - Place other pose images in: data/raw/other_poses/")
     print("   - Then run the extract_chair_poses() method")
+    print("   - Pass label_keywords=POSE_CATALOG_KEYWORDS to extract every catalog pose")
+    print("   - Run deduplicate() before split_data() to drop duplicate images")
     print()
     print("2. To download from online sources:")
     prep.download_kaggle_dataset()
@@ -195,15 +453,30 @@ def main():
     print()
     print("3. For quick testing with synthetic data:")
     print("   - Run create_sample_images() to generate synthetic poses")
+    print()
+    print("4. To pack the prepared images for faster training:")
+    print("   - Writes memory-mapped arrays to data/packed/")
+    print()
+    print("5. For load and scaling tests:")
+    print("   - Renders stick-figure poses straight into data/packed/ (see synthetic_poses.py)")
     print("="*60)
     
     # Ask user what they want to do
-    choice = input("\nChoose option (1/2/3) or press Enter to create synthetic data for testing: ").strip()
+    choice = input("\nChoose option (1/2/3/4/5) or press Enter to create synthetic data for testing: ").strip()
     
     if choice == "1":
         print("Please organize your images in the specified directories and run extract_chair_poses()")
     elif choice == "2":
         print("Please follow the download instructions above")
+    elif choice == "4":
+        print("Packing dataset...")
+        prep.export_packed_dataset()
+        print("\nPacked dataset ready! python chair_pose_classifier.py will use it automatically.")
+    elif choice == "5":
+        from synthetic_poses import generate_synthetic_dataset
+        print("Generating synthetic pose dataset...")
+        generate_synthetic_dataset('data/packed')
+        print("\nPacked dataset ready! python chair_pose_classifier.py will use it automatically.")
     else:
         print("Creating synthetic dataset for testing...")
         create_sample_images()
@@ -0,0 +1,80 @@
+"""
+Manifest-based dataset splits
+A split manifest is a CSV index of image path -> label -> split (plus a
+cross-validation fold and a duplicate group), so re-splitting or picking a
+different fold only rewrites metadata and never moves image files.
+"""
+
+import numpy as np
+import pandas as pd
+
+SPLITS = ['train', 'validation', 'test']
+MANIFEST_COLUMNS = ['path', 'label', 'split', 'fold', 'group']
+
+
+def assign_splits(samples, seed=42, train_ratio=0.7, val_ratio=0.15, k_folds=5):
+    """Assign a deterministic split and fold to every sample
+
+    samples is a DataFrame with 'path' and 'label' columns and an optional
+    'group' column; samples sharing a group (e.g. duplicates) always land in
+    the same split. Splitting is stratified per label and seeded, so the
+    same inputs and seed always give the same manifest.
+    """
+    samples = samples.copy()
+    if 'group' not in samples.columns:
+        samples['group'] = samples['path']
+    samples = samples.sort_values('path').reset_index(drop=True)
+
+    rng = np.random.RandomState(seed)
+    group_split = {}
+    group_fold = {}
+
+    for label in sorted(samples['label'].unique()):
+        groups = np.array(sorted(samples.loc[samples['label'] == label, 'group'].unique()))
+        groups = groups[rng.permutation(len(groups))]
+
+        n_train = int(train_ratio * len(groups))
+        n_val = int((train_ratio + val_ratio) * len(groups)) - n_train
+
+        for position, group in enumerate(groups):
+            if group in group_split:
+                # Group already placed through another label
+                continue
+            if position < n_train + n_val:
+                group_split[group] = 'train' if position < n_train else 'validation'
+                group_fold[group] = position % k_folds
+            else:
+                group_split[group] = 'test'
+                group_fold[group] = -1
+
+    samples['split'] = samples['group'].map(group_split)
+    samples['fold'] = samples['group'].map(group_fold).astype(int)
+    return samples[MANIFEST_COLUMNS]
+
+
+def save_split_manifest(manifest, manifest_path):
+    """Write a split manifest to CSV"""
+    manifest.to_csv(manifest_path, index=False)
+
+
+def load_split_manifest(manifest_path):
+    """Read a split manifest written by save_split_manifest"""
+    return pd.read_csv(manifest_path, dtype={'path': str, 'label': str, 'split': str, 'group': str})
+
+
+def select_fold(manifest, fold):
+    """Return the manifest re-split for one cross-validation fold
+
+    Test rows are left untouched; every other row becomes validation when
+    it belongs to the given fold and train otherwise.
+    """
+    manifest = manifest.copy()
+    held_out = manifest['split'] != 'test'
+    manifest.loc[held_out, 'split'] = np.where(manifest.loc[held_out, 'fold'] == fold,
+                                               'validation', 'train')
+    return manifest
+
+
+def split_frame(manifest, split):
+    """Rows of one split"""
+    return manifest[manifest['split'] == split].reset_index(drop=True)
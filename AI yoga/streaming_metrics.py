@@ -0,0 +1,190 @@
+"""
+Streaming classification metrics
+Accumulators that are updated one prediction batch at a time and only keep
+confusion counts, so evaluation memory is O(bins) (binary models) or
+O(classes^2) (multi-class models) however large the test set is, and
+running metrics are available while prediction is still in progress.
+"""
+
+import numpy as np
+
+
+def _safe_divide(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape),
+                     where=denominator > 0)
+
+
+def _precision_recall_f1(tp, fp, fn):
+    precision = _safe_divide(tp, tp + fp)
+    recall = _safe_divide(tp, tp + fn)
+    f1 = _safe_divide(2 * precision * recall, precision + recall)
+    return precision, recall, f1
+
+
+def format_report(cm, target_names, digits=2):
+    """Per-class precision/recall/F1/support table computed from a confusion matrix
+
+    Laid out like sklearn's classification_report.
+    """
+    cm = np.asarray(cm)
+    tp = np.diag(cm)
+    support = cm.sum(axis=1)
+    precision, recall, f1 = _precision_recall_f1(tp, cm.sum(axis=0) - tp, support - tp)
+    total = int(support.sum())
+
+    width = max(len('weighted avg'), *(len(name) for name in target_names))
+    header = f"{'':>{width}} {'precision':>9} {'recall':>9} {'f1-score':>9} {'support':>9}"
+    row = "{:>{width}} {:>9.{d}f} {:>9.{d}f} {:>9.{d}f} {:>9}"
+
+    lines = [header, '']
+    for i, name in enumerate(target_names):
+        lines.append(row.format(name, precision[i], recall[i], f1[i], int(support[i]), width=width, d=digits))
+    lines.append('')
+    accuracy = tp.sum() / total if total else 0.0
+    lines.append(f"{'accuracy':>{width}} {'':>9} {'':>9} {accuracy:>9.{digits}f} {total:>9}")
+    lines.append(row.format('macro avg', precision.mean(), recall.mean(), f1.mean(), total,
+                            width=width, d=digits))
+    weights = support / total if total else np.zeros(len(support))
+    lines.append(row.format('weighted avg', precision @ weights, recall @ weights, f1 @ weights, total,
+                            width=width, d=digits))
+    return '\n'.join(lines) + '\n'
+
+
+class BinaryMetricsAccumulator:
+    """Confusion counts of a sigmoid classifier at every threshold bin
+
+    Scores are bucketed into num_bins equal-width bins over [0, 1]; bin k
+    holds scores in (k/num_bins, (k+1)/num_bins], so "score > k/num_bins"
+    is exactly "bin >= k". Metrics can then be read at any threshold on a
+    bin edge, or swept over many thresholds, without revisiting predictions.
+    """
+    average = 'binary'
+
+    def __init__(self, num_bins=100):
+        self.num_bins = num_bins
+        self.positives = np.zeros(num_bins, dtype=np.int64)
+        self.negatives = np.zeros(num_bins, dtype=np.int64)
+
+    @property
+    def count(self):
+        return int(self.positives.sum() + self.negatives.sum())
+
+    def update(self, y_true, scores):
+        """Add a batch of 0/1 labels and sigmoid scores (or hard 0/1 predictions)"""
+        y_true = np.asarray(y_true).reshape(-1) > 0.5
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        bins = np.clip(np.ceil(scores * self.num_bins).astype(np.int64) - 1, 0, self.num_bins - 1)
+
+        self.positives += np.bincount(bins[y_true], minlength=self.num_bins)
+        self.negatives += np.bincount(bins[~y_true], minlength=self.num_bins)
+        return self
+
+    def confusion_counts(self, thresholds=0.5):
+        """(tp, fp, fn, tn) for "score > threshold", thresholds rounded to bin edges"""
+        edges = np.clip(np.round(np.asarray(thresholds, dtype=float) * self.num_bins).astype(np.int64),
+                        0, self.num_bins)
+        # Samples in bin k or above, for k = 0..num_bins
+        positives_above = np.append(np.cumsum(self.positives[::-1])[::-1], 0)
+        negatives_above = np.append(np.cumsum(self.negatives[::-1])[::-1], 0)
+
+        tp = positives_above[edges]
+        fp = negatives_above[edges]
+        return tp, fp, self.positives.sum() - tp, self.negatives.sum() - fp
+
+    def confusion_matrix(self, threshold=0.5):
+        tp, fp, fn, tn = self.confusion_counts(threshold)
+        return np.array([[tn, fp], [fn, tp]], dtype=np.int64)
+
+    def sweep(self, thresholds=None):
+        """Accuracy, precision, recall and F1 at every threshold (default: every bin edge)"""
+        if thresholds is None:
+            thresholds = np.arange(1, self.num_bins) / self.num_bins
+        tp, fp, fn, tn = self.confusion_counts(thresholds)
+        precision, recall, f1 = _precision_recall_f1(tp, fp, fn)
+        return {
+            'threshold': np.asarray(thresholds, dtype=float),
+            'accuracy': _safe_divide(tp + tn, self.count),
+            'precision': precision,
+            'recall': recall,
+            'f1_score': f1,
+        }
+
+    def metrics(self, threshold=0.5):
+        return {key: float(values) for key, values in self.sweep(threshold).items() if key != 'threshold'}
+
+    def roc_auc(self):
+        """Area under the ROC curve, resolved to the bin width"""
+        tp, fp, _, _ = self.confusion_counts(np.arange(self.num_bins, -1, -1) / self.num_bins)
+        tpr = _safe_divide(tp, self.positives.sum())
+        fpr = _safe_divide(fp, self.negatives.sum())
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+    def report(self, target_names, threshold=0.5):
+        return format_report(self.confusion_matrix(threshold), target_names)
+
+
+class ConfusionMatrixAccumulator:
+    """Running confusion matrix of a multi-class (softmax) classifier"""
+    average = 'macro'
+
+    def __init__(self, num_classes):
+        self.num_classes = num_classes
+        self.matrix = np.zeros((num_classes, num_classes), dtype=np.int64)
+
+    @property
+    def count(self):
+        return int(self.matrix.sum())
+
+    def update(self, y_true, outputs):
+        """Add a batch of class labels and class probabilities (or predicted labels)"""
+        y_true = np.asarray(y_true).reshape(-1).astype(np.int64)
+        outputs = np.asarray(outputs)
+        y_pred = np.argmax(outputs, axis=1) if outputs.ndim == 2 else outputs.astype(np.int64)
+
+        self.matrix += np.bincount(y_true * self.num_classes + y_pred,
+                                   minlength=self.num_classes ** 2).reshape(self.num_classes, -1)
+        return self
+
+    def confusion_matrix(self):
+        return self.matrix.copy()
+
+    def metrics(self):
+        """Accuracy plus macro-averaged precision, recall and F1"""
+        tp = np.diag(self.matrix)
+        precision, recall, f1 = _precision_recall_f1(tp, self.matrix.sum(axis=0) - tp,
+                                                     self.matrix.sum(axis=1) - tp)
+        return {
+            'accuracy': float(_safe_divide(tp.sum(), self.count)),
+            'precision': float(precision.mean()),
+            'recall': float(recall.mean()),
+            'f1_score': float(f1.mean()),
+        }
+
+    def report(self, target_names):
+        return format_report(self.matrix, target_names)
+
+
+def metrics_accumulator(num_outputs, num_bins=100):
+    """Accumulator for a model head: one sigmoid unit is binary, wider heads are multi-class"""
+    if num_outputs == 1:
+        return BinaryMetricsAccumulator(num_bins)
+    return ConfusionMatrixAccumulator(num_outputs)
+
+
+def accumulate_predictions(model, batches, accumulator, verbose=1):
+    """Predict a Keras-style batch generator one batch at a time into an accumulator
+
+    Only the current batch of predictions is held in memory; with verbose
+    the running accuracy is printed as each batch finishes.
+    """
+    for i in range(len(batches)):
+        x, y = batches[i][:2]
+        accumulator.update(y, model.predict_on_batch(x))
+        if verbose:
+            accuracy = accumulator.metrics()['accuracy']
+            print(f"\rBatch {i + 1}/{len(batches)} - running accuracy {accuracy:.4f}", end='')
+    if verbose:
+        print()
+    return accumulator
@@ -0,0 +1,220 @@
+"""
+Synthetic yoga pose images for load and scaling tests
+Stick-figure silhouettes are rendered from parametric skeletons of each
+catalog pose. Skeleton sampling, jitter, framing and backgrounds are
+computed for a whole batch at once with NumPy; only the final rasterization
+is per image (OpenCV line/polygon fills, a few microseconds each). Batches
+are written straight into the packed dataset format, so millions of
+labelled samples can be produced without touching JPEG files.
+"""
+
+import argparse
+
+import numpy as np
+
+from packed_dataset import PackedDatasetWriter
+
+# Segment directions in degrees: 0 points down, 180 up, 90 towards image right.
+# Arms are (upper arm, forearm), legs (thigh, shin); 'a' is the image-right side.
+# width scales shoulder/hip breadth (small values give a side view).
+POSE_SKELETONS = {
+    'chair_pose': {'torso': 150, 'arm_a': (160, 160), 'arm_b': (155, 155),
+                   'leg_a': (60, -20), 'leg_b': (55, -25), 'width': 0.25},
+    'mountain': {'torso': 180, 'arm_a': (8, 3), 'arm_b': (-8, -3),
+                 'leg_a': (3, 0), 'leg_b': (-3, 0), 'width': 1.0},
+    'tree': {'torso': 180, 'arm_a': (160, 200), 'arm_b': (-160, -200),
+             'leg_a': (60, -60), 'leg_b': (-2, 0), 'width': 1.0},
+    'sukasana': {'torso': 180, 'arm_a': (20, 60), 'arm_b': (-20, -60),
+                 'leg_a': (75, -100), 'leg_b': (-75, 100), 'width': 1.0},
+    'childs_pose': {'torso': -100, 'arm_a': (-95, -90), 'arm_b': (-92, -88),
+                    'leg_a': (-10, 95), 'leg_b': (-15, 92), 'width': 0.25},
+    'warrior2': {'torso': 180, 'arm_a': (90, 90), 'arm_b': (-90, -90),
+                 'leg_a': (80, 0), 'leg_b': (-40, -40), 'width': 1.0},
+}
+
+# Catch-all class: every angle drawn uniformly at random
+OTHER_POSES = 'other_poses'
+
+# Body proportions in units of standing height
+TORSO, UPPER_ARM, FOREARM, THIGH, SHIN = 0.30, 0.15, 0.14, 0.23, 0.23
+SHOULDER_HALF_WIDTH, HIP_HALF_WIDTH, NECK, HEAD_RADIUS = 0.10, 0.06, 0.05, 0.065
+
+# Joint order of the skeleton arrays
+JOINTS = ['head', 'shoulder_a', 'shoulder_b', 'elbow_a', 'elbow_b', 'wrist_a', 'wrist_b',
+          'hip_a', 'hip_b', 'knee_a', 'knee_b', 'ankle_a', 'ankle_b']
+LIMBS = [(1, 3), (3, 5), (2, 4), (4, 6), (7, 9), (9, 11), (8, 10), (10, 12)]
+TORSO_POLYGON = [1, 2, 8, 7]
+
+# Angle parameter order: torso, arm_a, arm_b, leg_a, leg_b
+_ANGLE_KEYS = [('torso', None), ('arm_a', 0), ('arm_a', 1), ('arm_b', 0), ('arm_b', 1),
+               ('leg_a', 0), ('leg_a', 1), ('leg_b', 0), ('leg_b', 1)]
+
+
+def default_class_names():
+    """Catalog poses plus the catch-all class, in label-index order"""
+    return sorted(list(POSE_SKELETONS) + [OTHER_POSES])
+
+
+def _pose_table(class_names):
+    """(num_classes, 9) angle table in radians and (num_classes,) width factors"""
+    angles = np.zeros((len(class_names), len(_ANGLE_KEYS)), dtype=np.float32)
+    widths = np.ones(len(class_names), dtype=np.float32)
+    for i, name in enumerate(class_names):
+        if name not in POSE_SKELETONS:
+            continue
+        skeleton = POSE_SKELETONS[name]
+        angles[i] = [skeleton[key] if index is None else skeleton[key][index] for key, index in _ANGLE_KEYS]
+        widths[i] = skeleton['width']
+    return np.radians(angles), widths
+
+
+def sample_skeletons(labels, class_names, rng, jitter_degrees=8.0):
+    """Joint positions (N, 13, 2) in body units for a batch of class labels
+
+    Each sample gets Gaussian jitter on every segment angle, randomised
+    body proportions and a random horizontal mirror. Labels of classes
+    without a skeleton get uniformly random angles.
+    """
+    n = len(labels)
+    table, widths = _pose_table(class_names)
+    known = np.array([name in POSE_SKELETONS for name in class_names])[labels]
+
+    angles = table[labels] + np.radians(jitter_degrees) * rng.standard_normal((n, len(_ANGLE_KEYS)))
+    angles[~known] = rng.uniform(-np.pi, np.pi, (np.count_nonzero(~known), len(_ANGLE_KEYS)))
+    width = widths[labels] * rng.uniform(0.85, 1.15, n)
+    scale = rng.uniform(0.9, 1.1, (n, 5))
+
+    def direction(angle):
+        return np.stack([np.sin(angle), np.cos(angle)], axis=-1)
+
+    torso_dir = direction(angles[:, 0])
+    # Perpendicular to the torso, pointing to the image-right side when upright
+    across = np.stack([torso_dir[:, 1], -torso_dir[:, 0]], axis=-1) * -1
+
+    hip_center = np.zeros((n, 2))
+    shoulder_center = hip_center + TORSO * scale[:, :1] * torso_dir
+    w = width[:, None]
+
+    joints = np.empty((n, len(JOINTS), 2))
+    joints[:, 0] = shoulder_center + (NECK + HEAD_RADIUS) * torso_dir
+    joints[:, 1] = shoulder_center + SHOULDER_HALF_WIDTH * w * across
+    joints[:, 2] = shoulder_center - SHOULDER_HALF_WIDTH * w * across
+    joints[:, 7] = hip_center + HIP_HALF_WIDTH * w * across
+    joints[:, 8] = hip_center - HIP_HALF_WIDTH * w * across
+
+    # Two-segment chains: (root joint, middle joint, end joint, angle columns, lengths)
+    chains = [(1, 3, 5, (1, 2), (UPPER_ARM, FOREARM), 1), (2, 4, 6, (3, 4), (UPPER_ARM, FOREARM), 2),
+              (7, 9, 11, (5, 6), (THIGH, SHIN), 3), (8, 10, 12, (7, 8), (THIGH, SHIN), 4)]
+    for root, middle, end, (first, second), (length1, length2), s in chains:
+        joints[:, middle] = joints[:, root] + length1 * scale[:, s:s + 1] * direction(angles[:, first])
+        joints[:, end] = joints[:, middle] + length2 * scale[:, s:s + 1] * direction(angles[:, second])
+
+    mirror = rng.random(n) < 0.5
+    joints[mirror, :, 0] *= -1
+    return joints
+
+
+def fit_to_frame(joints, img_height, img_width, rng):
+    """Scale and place each skeleton at a random size and position inside the image"""
+    lo = joints.min(axis=1) - HEAD_RADIUS
+    hi = joints.max(axis=1) + HEAD_RADIUS
+    extent = hi - lo
+
+    frame = np.array([img_width, img_height], dtype=float)
+    fill = rng.uniform(0.55, 0.9, len(joints))
+    scale = fill * np.min(frame / extent, axis=1)
+    margin = frame - extent * scale[:, None]
+    offset = rng.uniform(0, 1, (len(joints), 2)) * margin - lo * scale[:, None]
+
+    return joints * scale[:, None, None] + offset[:, None, :], scale
+
+
+def render_backgrounds(n, img_height, img_width, rng, noise=12):
+    """Random two-colour vertical gradients with pixel noise, as one array op"""
+    top = rng.integers(0, 256, (n, 1, 1, 3))
+    bottom = rng.integers(0, 256, (n, 1, 1, 3))
+    ramp = np.linspace(0, 1, img_height, dtype=np.float32)[None, :, None, None]
+    images = top + (bottom - top) * ramp
+    images = rng.integers(-noise, noise + 1, (n, img_height, img_width, 3), dtype=np.int16) + images
+    # C-contiguous uint8, so each image can be drawn on by OpenCV in place
+    return np.clip(images, 0, 255).astype(np.uint8, order='C')
+
+
+def render_batch(joints, scale, images, rng):
+    """Draw filled stick-figure silhouettes onto a batch of images in place"""
+    import cv2
+
+    colors = rng.integers(0, 256, (len(joints), 3))
+    thickness = np.maximum(2, (0.06 * scale).astype(int))
+    head_radius = np.maximum(2, (HEAD_RADIUS * scale).astype(int))
+    points = np.round(joints).astype(np.int32)
+
+    for i in range(len(joints)):
+        img, p = images[i], points[i]
+        color = tuple(int(c) for c in colors[i])
+        cv2.fillConvexPoly(img, p[TORSO_POLYGON], color, lineType=cv2.LINE_AA)
+        for a, b in LIMBS:
+            cv2.line(img, tuple(p[a]), tuple(p[b]), color, int(thickness[i]), lineType=cv2.LINE_AA)
+        cv2.circle(img, tuple(p[0]), int(head_radius[i]), color, -1, lineType=cv2.LINE_AA)
+    return images
+
+
+def generate_batch(labels, class_names, rng, img_height=224, img_width=224, jitter_degrees=8.0):
+    """Images (N, H, W, 3) uint8 RGB and pixel joint positions for a batch of labels"""
+    joints, scale = fit_to_frame(sample_skeletons(labels, class_names, rng, jitter_degrees),
+                                 img_height, img_width, rng)
+    images = render_backgrounds(len(labels), img_height, img_width, rng)
+    return render_batch(joints, scale, images, rng), joints
+
+
+def generate_synthetic_dataset(output_dir='data/packed', samples_per_class=1000, class_names=None,
+                               img_height=224, img_width=224, batch_size=1024, seed=42,
+                               split_ratios=(('train', 0.7), ('validation', 0.15), ('test', 0.15))):
+    """Write a balanced synthetic pose dataset in the packed format
+
+    Returns the number of samples written per split.
+    """
+    class_names = list(class_names) if class_names else default_class_names()
+    rng = np.random.default_rng(seed)
+    counts = {}
+
+    for split, ratio in split_ratios:
+        total = int(round(samples_per_class * ratio)) * len(class_names)
+        writer = PackedDatasetWriter(output_dir, split, total, class_names,
+                                     img_height=img_height, img_width=img_width)
+        labels = rng.permutation(np.arange(total) % len(class_names))
+
+        for start in range(0, total, batch_size):
+            batch_labels = labels[start:start + batch_size]
+            images, _ = generate_batch(batch_labels, class_names, rng, img_height, img_width)
+            writer.add_batch(images, batch_labels,
+                             sources=[f"synthetic:{split}:{start + i}" for i in range(len(batch_labels))])
+            print(f"\r{split}: {min(start + batch_size, total)}/{total}", end='')
+        print()
+        counts[split] = writer.close()
+
+    print(f"Synthetic dataset with {len(class_names)} classes written to {output_dir}")
+    return counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a packed synthetic yoga pose dataset")
+    parser.add_argument('--output', default='data/packed', help="Packed dataset directory")
+    parser.add_argument('--samples-per-class', type=int, default=1000,
+                        help="Samples per class before the train/validation/test split")
+    parser.add_argument('--img-size', type=int, default=224, help="Image height and width")
+    parser.add_argument('--classes', nargs='+', default=None,
+                        help=f"Class names (default: {' '.join(default_class_names())})")
+    parser.add_argument('--batch-size', type=int, default=1024, help="Images generated per batch")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    generate_synthetic_dataset(args.output, args.samples_per_class, args.classes,
+                               args.img_size, args.img_size, args.batch_size, args.seed)
+
+
+if __name__ == "__main__":
+    main()
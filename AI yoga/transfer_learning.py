@@ -0,0 +1,177 @@
+"""
+Transfer learning with cached bottleneck features
+A pretrained backbone (weights read from a local file, never downloaded) is
+run once over every split and its pooled features are cached under
+data/bottleneck. Only a small classification head is then trained on the
+cached features, so repeated experiments skip all convolution work.
+"""
+
+import json
+import os
+
+import numpy as np
+
+# Keras application, and the scale/offset mapping [0, 1] pixels to its input range
+BACKBONES = {
+    'mobilenet_v2': ('MobileNetV2', 2.0, -1.0),
+    'mobilenet_v3_small': ('MobileNetV3Small', 255.0, 0.0),
+    'mobilenet_v3_large': ('MobileNetV3Large', 255.0, 0.0),
+    'efficientnet_b0': ('EfficientNetB0', 255.0, 0.0),
+}
+
+
+def build_feature_extractor(backbone, weights_path, img_height=224, img_width=224):
+    """Frozen backbone mapping [0, 1] RGB batches to pooled feature vectors
+
+    weights_path is a local "no top" weights file for the backbone, e.g.
+    mobilenet_v2_weights_tf_dim_ordering_tf_kernels_1.0_224_no_top.h5.
+    """
+    import tensorflow as tf
+
+    if backbone not in BACKBONES:
+        raise ValueError(f"Unknown backbone '{backbone}', choose from {', '.join(BACKBONES)}")
+    if not os.path.exists(weights_path):
+        raise FileNotFoundError(f"Backbone weights not found: {weights_path}")
+
+    application, scale, offset = BACKBONES[backbone]
+    base = getattr(tf.keras.applications, application)(
+        include_top=False, weights=weights_path, input_shape=(img_height, img_width, 3), pooling='avg'
+    )
+    base.trainable = False
+
+    inputs = tf.keras.Input(shape=(img_height, img_width, 3))
+    # Same [0, 1] input as the training generators, rescaled to what the backbone expects
+    x = tf.keras.layers.Rescaling(scale, offset=offset)(inputs)
+    outputs = base(x, training=False)
+    return tf.keras.Model(inputs, outputs, name=f"{backbone}_features")
+
+
+def _cache_paths(cache_dir, split):
+    return {
+        'features': os.path.join(cache_dir, f"{split}_features.npy"),
+        'labels': os.path.join(cache_dir, f"{split}_labels.npy"),
+        'meta': os.path.join(cache_dir, f"{split}_meta.json"),
+    }
+
+
+def cached_bottleneck_features(extractor, batches, cache_dir, split, signature):
+    """Features and labels of one split, computed once and then read from cache_dir
+
+    signature describes the backbone weights and the data the features came
+    from; the cache is rebuilt whenever it changes. Features are written
+    batch by batch into a memory-mapped array.
+    """
+    paths = _cache_paths(cache_dir, split)
+
+    if os.path.exists(paths['meta']):
+        with open(paths['meta']) as f:
+            if json.load(f).get('signature') == signature:
+                print(f"Using cached {split} bottleneck features from {cache_dir}")
+                return np.load(paths['features'], mmap_mode='r'), np.load(paths['labels'])
+
+    os.makedirs(cache_dir, exist_ok=True)
+    print(f"Extracting {split} bottleneck features ({len(batches)} batches)...")
+
+    features = None
+    labels = []
+    count = 0
+    for i in range(len(batches)):
+        x, y = batches[i][:2]
+        batch_features = np.asarray(extractor.predict_on_batch(x), dtype=np.float32)
+        if features is None:
+            features = np.lib.format.open_memmap(paths['features'], mode='w+', dtype=np.float32,
+                                                 shape=(batches.samples, batch_features.shape[1]))
+        features[count:count + len(batch_features)] = batch_features
+        labels.append(np.asarray(y))
+        count += len(batch_features)
+        print(f"\rBatch {i + 1}/{len(batches)}", end='')
+    print()
+
+    features.flush()
+    del features
+    np.save(paths['labels'], np.concatenate(labels))
+    with open(paths['meta'], 'w') as f:
+        json.dump({'signature': signature, 'count': count}, f, indent=2)
+
+    return np.load(paths['features'], mmap_mode='r'), np.load(paths['labels'])
+
+
+def create_head(feature_dim, num_classes):
+    """Small classification head trained on bottleneck features"""
+    import tensorflow as tf
+    from tensorflow.keras import layers, models
+
+    if num_classes == 2:
+        output_layer = layers.Dense(1, activation='sigmoid', dtype='float32')
+        loss = 'binary_crossentropy'
+    else:
+        output_layer = layers.Dense(num_classes, activation='softmax', dtype='float32')
+        loss = 'sparse_categorical_crossentropy'
+
+    head = models.Sequential([
+        layers.Input(shape=(feature_dim,)),
+        layers.Dropout(0.3),
+        layers.Dense(128, activation='relu'),
+        layers.Dropout(0.3),
+        output_layer
+    ])
+    head.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=0.001), loss=loss, metrics=['accuracy'])
+    return head
+
+
+def train_head(head, train_features, train_labels, val_features, val_labels, epochs=100, batch_size=64):
+    """Fit the head on cached features (seconds per epoch, no convolutions)"""
+    import tensorflow as tf
+
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=10,
+                                                      restore_best_weights=True)
+    return head.fit(
+        np.asarray(train_features), train_labels,
+        epochs=epochs,
+        batch_size=batch_size,
+        validation_data=(np.asarray(val_features), val_labels),
+        callbacks=[early_stopping],
+        verbose=2
+    )
+
+
+def combine_model(extractor, head):
+    """Single image-in, probabilities-out model for evaluation, export and the live app"""
+    import tensorflow as tf
+
+    inputs = tf.keras.Input(shape=extractor.input_shape[1:])
+    model = tf.keras.Model(inputs, head(extractor(inputs)), name='transfer_pose_classifier')
+    model.compile(loss=head.loss, metrics=['accuracy'])
+    return model
+
+
+def _source_mtime(data_path, split):
+    """Modification time of whatever defines a split's contents"""
+    from packed_dataset import is_packed_dataset
+
+    if is_packed_dataset(data_path, split):
+        return os.path.getmtime(os.path.join(data_path, f"{split}_meta.json"))
+    if data_path.endswith('.csv'):
+        return os.path.getmtime(data_path)
+    split_dir = os.path.join(data_path, split)
+    # Adding or removing images updates the class folders' mtimes
+    return max([os.path.getmtime(split_dir)] +
+               [entry.stat().st_mtime for entry in os.scandir(split_dir) if entry.is_dir()])
+
+
+def bottleneck_signature(backbone, weights_path, data_path, split, batches, class_names, img_height, img_width):
+    """Everything the cached features of one split depend on"""
+    weights = os.stat(weights_path)
+    return {
+        'backbone': backbone,
+        'weights': [os.path.abspath(weights_path), weights.st_size, weights.st_mtime_ns],
+        'data': [os.path.abspath(data_path), split, int(batches.samples), _source_mtime(data_path, split)],
+        'class_names': list(class_names) if class_names else None,
+        'image_size': [img_height, img_width],
+    }
+
+
+def feature_batches(features, labels, batch_size=256):
+    """Cached features as a list of (x, y) batches, the shape evaluation loops expect"""
+    return [(np.asarray(features[start:start + batch_size]), labels[start:start + batch_size])
+            for start in range(0, len(labels), batch_size)]
@@ -0,0 +1,49 @@
+"""
+Preallocated frame buffers for the live video loop
+Capture, mirroring, colour conversion and the UI overlay all write into
+buffers allocated once, and stages hand each other a slot index instead
+of freshly allocated frames. At 1080p that removes several 6 MB
+allocations (and the memory traffic of zeroing them) per frame.
+"""
+
+import cv2
+import numpy as np
+
+
+class FrameRing:
+    """Round-robin slots of camera, display (mirrored BGR) and RGB frames"""
+
+    def __init__(self, height: int, width: int, slots=2):
+        self.slots = slots
+        self._allocate(height, width)
+        self.index = -1
+
+    def _allocate(self, height, width):
+        self.shape = (height, width, 3)
+        self.raw = np.empty((self.slots,) + self.shape, dtype=np.uint8)
+        self.frames = np.empty_like(self.raw)
+        self.rgb = np.empty_like(self.raw)
+        # Scratch copy for semi-transparent UI panels, shared by every slot
+        self.overlay = np.empty(self.shape, dtype=np.uint8)
+
+    def next_slot(self) -> int:
+        self.index = (self.index + 1) % self.slots
+        return self.index
+
+    def capture(self, video_capture, slot: int) -> bool:
+        """Read the next camera frame into a slot
+
+        OpenCV decodes straight into the slot when the frame size matches;
+        a camera that delivers another size reallocates the ring once.
+        """
+        ret, frame = video_capture.read(self.raw[slot])
+        if not ret:
+            return False
+        if frame.shape != self.shape:
+            self._allocate(*frame.shape[:2])
+            np.copyto(self.raw[slot], frame)
+        return True
+
+    def mirror(self, slot: int, dst=None) -> np.ndarray:
+        """Horizontally flipped camera frame, written into dst or the slot's display buffer"""
+        return cv2.flip(self.raw[slot], 1, dst=self.frames[slot] if dst is None else dst)
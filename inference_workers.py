@@ -0,0 +1,244 @@
+"""
+Multi-process pose inference
+Frames are written straight into a block of shared memory slots and only
+the slot index goes over a queue to a pool of worker processes, each with
+its own PoseDetector. Workers write the 33 landmarks back into a small
+shared (slots, 33, 4) array, so nothing is pickled per frame and MediaPipe
+runs on as many cores as there are workers, outside the GIL of the
+capture / UI process.
+
+    python inference_workers.py yoga.mp4 --workers 1 2 4 8
+"""
+
+import argparse
+import collections
+import multiprocessing
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+NUM_LANDMARKS = 33
+
+
+def _serve(frame_name, landmark_name, shape, slots, tasks, done, detector_kwargs):
+    """Worker process: run pose detection on shared frame slots until a None task arrives"""
+    try:
+        from landmark_classifier import landmarks_to_array
+        from pose_detector import PoseDetector
+
+        frame_memory = shared_memory.SharedMemory(name=frame_name)
+        landmark_memory = shared_memory.SharedMemory(name=landmark_name)
+        frames = np.ndarray((slots,) + shape, dtype=np.uint8, buffer=frame_memory.buf)
+        landmarks = np.ndarray((slots, NUM_LANDMARKS, 4), dtype=np.float32, buffer=landmark_memory.buf)
+        detector = PoseDetector(**detector_kwargs)
+    except Exception as e:
+        done.put(('error', f"{type(e).__name__}: {e}"))
+        return
+    done.put(('ready', None))
+
+    while True:
+        slot = tasks.get()
+        if slot is None:
+            break
+        try:
+            points = landmarks_to_array(detector.detect_pose(frames[slot]))
+        except Exception as e:
+            # One bad frame is reported as "no pose" instead of taking the worker down
+            print(f"Inference worker error on slot {slot}: {e}")
+            points = None
+        if points is not None:
+            landmarks[slot] = points
+        done.put((slot, points is not None))
+
+    detector.close()
+    del frames, landmarks
+    frame_memory.close()
+    landmark_memory.close()
+
+
+class InferencePool:
+    """Worker processes running PoseDetector on frames in shared memory
+
+    Frames are returned in submission order. A caller fills a slot from
+    acquire_slot() through frame(), hands it over with submit(), later gets
+    it back with next_result() and returns it with release_slot().
+    """
+
+    def __init__(self, shape: Tuple[int, int, int], workers: Optional[int] = None, slots: Optional[int] = None,
+                 start_timeout=60.0, **detector_kwargs):
+        # Leave one core for capture, analysis and drawing
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        # Every worker busy, plus one slot being filled and one being displayed
+        self.slots = slots or self.workers + 2
+        self.shape = tuple(shape)
+
+        frame_bytes = self.slots * int(np.prod(self.shape))
+        self._frame_memory = shared_memory.SharedMemory(create=True, size=frame_bytes)
+        self._landmark_memory = shared_memory.SharedMemory(create=True, size=self.slots * NUM_LANDMARKS * 4 * 4)
+        self.frames = np.ndarray((self.slots,) + self.shape, dtype=np.uint8, buffer=self._frame_memory.buf)
+        self.landmarks = np.ndarray((self.slots, NUM_LANDMARKS, 4), dtype=np.float32,
+                                    buffer=self._landmark_memory.buf)
+
+        self._free = collections.deque(range(self.slots))
+        self._in_flight = collections.deque()
+        self._finished = {}
+
+        # spawn: workers must not inherit the parent's camera, windows or threads
+        context = multiprocessing.get_context('spawn')
+        self._tasks = context.Queue()
+        self._done = context.Queue()
+        self.processes = [context.Process(target=_serve, daemon=True, name=f"pose-worker-{i}",
+                                          args=(self._frame_memory.name, self._landmark_memory.name, self.shape,
+                                                self.slots, self._tasks, self._done, detector_kwargs))
+                          for i in range(self.workers)]
+        for process in self.processes:
+            process.start()
+
+        end = time.monotonic() + start_timeout
+        ready = 0
+        while ready < self.workers:
+            try:
+                status, detail = self._done.get(timeout=1.0)
+            except queue.Empty:
+                # A worker that crashed outright (not via an exception) never reports
+                if not all(process.is_alive() for process in self.processes):
+                    status, detail = 'error', "a worker exited during start-up"
+                elif time.monotonic() >= end:
+                    status, detail = 'error', f"no response within {start_timeout:.0f}s"
+                else:
+                    continue
+            if status != 'ready':
+                self.close(timeout=0)
+                raise RuntimeError(f"Inference worker failed to start: {detail}")
+            ready += 1
+
+    @property
+    def pending(self) -> int:
+        """Frames submitted and not yet returned by next_result"""
+        return len(self._in_flight)
+
+    @property
+    def full(self) -> bool:
+        """True when every worker has a frame, so the next result is worth waiting for"""
+        return len(self._in_flight) >= self.workers
+
+    def acquire_slot(self) -> int:
+        """A free frame slot; when all are in flight, call next_result and release_slot first"""
+        if not self._free:
+            raise RuntimeError("No free frame slot: release a slot returned by next_result first")
+        return self._free.popleft()
+
+    def frame(self, slot: int) -> np.ndarray:
+        """Shared-memory frame buffer of a slot, to write into or draw on"""
+        return self.frames[slot]
+
+    def submit(self, slot: int):
+        """Queue a filled slot for pose detection"""
+        self._in_flight.append(slot)
+        self._tasks.put(slot)
+
+    def next_result(self, timeout: Optional[float] = None):
+        """Wait for the oldest submitted frame: (slot, results), with results as from detect_pose"""
+        from landmark_classifier import array_to_results
+
+        slot = self._in_flight[0]
+        end = time.monotonic() + timeout if timeout is not None else None
+        while slot not in self._finished:
+            remaining = end - time.monotonic() if end is not None else None
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"Frame slot {slot} not processed within {timeout}s")
+            try:
+                done_slot, found = self._done.get(timeout=min(remaining, 1.0) if remaining is not None else 1.0)
+            except queue.Empty:
+                # A dead worker never reports the slot it held, so waiting could last forever
+                if not all(process.is_alive() for process in self.processes):
+                    raise RuntimeError("An inference worker exited with frames in flight")
+                continue
+            self._finished[done_slot] = found
+
+        self._in_flight.popleft()
+        found = self._finished.pop(slot)
+        return slot, array_to_results(self.landmarks[slot].copy() if found else None)
+
+    def release_slot(self, slot: int):
+        self._free.append(slot)
+
+    def close(self, timeout=2.0):
+        """Stop the workers and free the shared memory"""
+        for process in self.processes:
+            if process.is_alive():
+                self._tasks.put(None)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout)
+
+        del self.frames, self.landmarks
+        for memory in (self._frame_memory, self._landmark_memory):
+            memory.close()
+            memory.unlink()
+
+
+def benchmark(source: str, workers: int, max_frames=300) -> float:
+    """Frames per second of an InferencePool with this many workers over a video file"""
+    import cv2
+
+    capture = cv2.VideoCapture(source)
+    ok, first = capture.read()
+    if not ok:
+        raise RuntimeError(f"Could not read video source {source!r}")
+
+    from pose_detector import IMAGE_MODE
+    pool = InferencePool(first.shape, workers, mode=IMAGE_MODE)
+    frames = 0
+    start = time.perf_counter()
+    try:
+        frame = first
+        while frame is not None and frame.shape == pool.shape and frames < max_frames:
+            if pool.full:
+                slot, _ = pool.next_result()
+                pool.release_slot(slot)
+            slot = pool.acquire_slot()
+            np.copyto(pool.frame(slot), frame)
+            pool.submit(slot)
+            frames += 1
+            ok, frame = capture.read()
+            if not ok:
+                frame = None
+        while pool.pending:
+            pool.release_slot(pool.next_result()[0])
+    finally:
+        elapsed = time.perf_counter() - start
+        pool.close()
+        capture.release()
+    return frames / elapsed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure pose inference throughput with N worker processes")
+    parser.add_argument('video', help="Video file to run pose detection on")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help="Worker counts to compare (default: 1 2 4)")
+    parser.add_argument('--frames', type=int, default=300, help="Frames per run (default: 300)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"Pose inference throughput on {args.video} ({os.cpu_count()} cores)")
+    for workers in args.workers:
+        try:
+            fps = benchmark(args.video, workers, args.frames)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            return
+        print(f"  {workers:2d} workers: {fps:6.1f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Multi-camera kiosk server
+One process serves N camera streams (one per mat). Each stream has a
+capture thread that keeps only its newest frame, its own YogaAnalyzer and
+a PoseSession counting hold time and repetitions.
+Streams waiting for inference sit in one FIFO queue, at most once each,
+and a fixed pool of worker threads, each owning a PoseDetector, takes them
+in turn. Every stream therefore gets an equal share of the workers, and a
+stream never has more than one frame waiting, so latency stays bounded
+however many streams there are.
+
+    python kiosk_server.py 0 1 2 --workers 3 --display
+    python kiosk_server.py mat1.mp4 mat2.mp4 --no-pace
+"""
+
+import argparse
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional
+
+import cv2
+
+from main import draw_ui_elements
+
+# YogaAnalyzer / PoseDetector (MediaPipe) are imported when the server starts
+
+
+class CameraStream:
+    """One source: its capture thread, newest-frame slot and per-stream analysis state"""
+
+    def __init__(self, stream_id: int, source, target_pose='mountain', pace=True, slots=3, min_hold=2.0):
+        from frame_ring import FrameRing
+        from pose_session import PoseSession
+
+        self.stream_id = stream_id
+        self.source = source
+        self.target_pose = target_pose
+        self.capture = cv2.VideoCapture(source)
+        if not self.capture.isOpened():
+            raise RuntimeError(f"Could not open video source {source!r}")
+
+        self.is_file = not isinstance(source, int)
+        fps = self.capture.get(cv2.CAP_PROP_FPS)
+        # Files are played at their frame rate like a camera; unpaced files hand over every frame
+        self.frame_interval = 1.0 / fps if pace and self.is_file and fps > 0 else 0.0
+        self.lossless = self.is_file and not pace
+
+        height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or 480
+        width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or 640
+        # Triple buffering: one slot being captured, one waiting, one being analyzed
+        self.ring = FrameRing(height, width, slots=slots)
+
+        self.analyzer = None
+        # Updated only by the worker holding this stream, one frame at a time in capture order
+        self.session = PoseSession(min_hold=min_hold)
+        self.on_frame: Optional[Callable[['CameraStream'], None]] = None
+        self.cond = threading.Condition()
+        self.latest = None          # (slot, capture time) of the newest unprocessed frame
+        self.processing = None      # slot a worker is analyzing
+        self.scheduled = False      # queued for (or held by) a worker
+        self.finished = False
+        self.running = True
+
+        self.last_result = None
+        self.display_frame = None
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True,
+                                        name=f"capture-{stream_id}")
+
+    def start(self):
+        self._thread.start()
+
+    def _free_slot(self) -> int:
+        busy = {self.processing, self.latest[0] if self.latest else None}
+        slot = self.ring.index
+        while True:
+            slot = (slot + 1) % self.ring.slots
+            if slot not in busy:
+                self.ring.index = slot
+                return slot
+
+    def _capture_loop(self):
+        next_time = time.monotonic()
+        while self.running:
+            with self.cond:
+                if self.lossless:
+                    while self.latest is not None and self.running:
+                        self.cond.wait(0.1)
+                slot = self._free_slot()
+
+            if not self.ring.capture(self.capture, slot):
+                break
+
+            with self.cond:
+                if self.latest is not None:
+                    self.dropped += 1
+                self.latest = (slot, time.monotonic())
+                self.captured += 1
+            if self.on_frame:
+                self.on_frame(self)
+
+            if self.frame_interval:
+                next_time += self.frame_interval
+                time.sleep(max(0.0, next_time - time.monotonic()))
+
+        with self.cond:
+            self.finished = True
+            self.cond.notify_all()
+        if self.on_frame:
+            self.on_frame(self)
+
+    def take_frame(self):
+        """Claim the newest frame: (mirrored frame, capture time), or None if there is none"""
+        with self.cond:
+            if self.latest is None:
+                return None
+            slot, captured_at = self.latest
+            self.latest = None
+            self.processing = slot
+            self.cond.notify_all()
+        return self.ring.mirror(slot), captured_at
+
+    def finish_frame(self, results, analysis, latency, display_frame=None):
+        """Record a worker's result for the frame claimed by take_frame"""
+        with self.cond:
+            self.processing = None
+            self.last_result = (results, analysis)
+            if display_frame is not None:
+                self.display_frame = display_frame
+            self.processed += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+    def fail_frame(self):
+        """Release the frame claimed by take_frame after processing it failed"""
+        with self.cond:
+            self.processing = None
+            self.errors += 1
+
+    @property
+    def done(self) -> bool:
+        return self.finished and self.latest is None and self.processing is None
+
+    def stats(self) -> dict:
+        return {
+            'stream': self.stream_id,
+            'source': self.source,
+            'captured': self.captured,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'mean_latency_ms': 1000 * self.latency_total / max(self.processed, 1),
+            'max_latency_ms': 1000 * self.latency_max,
+            'reps': self.session.reps,
+            'best_hold': self.session.best_hold,
+        }
+
+    def stop(self):
+        self.running = False
+        with self.cond:
+            self.cond.notify_all()
+        self._thread.join(timeout=2)
+        self.capture.release()
+
+
+class KioskServer:
+    """Fair scheduling of N camera streams over a fixed pool of inference workers"""
+
+    def __init__(self, sources: List, workers: Optional[int] = None, target_pose='mountain', pace=True,
+                 display=False, on_result: Optional[Callable] = None, min_hold=2.0):
+        self.streams = [CameraStream(i, source, target_pose, pace, min_hold=min_hold)
+                        for i, source in enumerate(sources)]
+        self.num_workers = workers or min(len(self.streams), os.cpu_count() or 1)
+        self.display = display
+        self.on_result = on_result
+        self.ready = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._detectors = []
+        self.started_at = None
+
+    def _schedule(self, stream: CameraStream):
+        """Queue a stream for a worker if it has a frame and is not queued already"""
+        with self._lock:
+            if stream.scheduled or stream.latest is None:
+                return
+            stream.scheduled = True
+        self.ready.put(stream)
+
+    def _process_frame(self, stream: CameraStream, detector, frame, captured_at):
+        results = detector.detect_pose(frame)
+        analysis = stream.analyzer.analyze_results(results, frame.shape, stream.target_pose)
+        stream.session.update(analysis, captured_at)
+
+        display_frame = None
+        if self.display:
+            display_frame = detector.draw_landmarks(frame.copy(), results)
+            display_frame = draw_ui_elements(display_frame, analysis, stream.target_pose, [], 0,
+                                             session=stream.session)
+
+        stream.finish_frame(results, analysis, time.monotonic() - captured_at, display_frame)
+        if self.on_result:
+            self.on_result(stream, results, analysis)
+
+    def _worker_loop(self, detector):
+        while True:
+            stream = self.ready.get()
+            if stream is None:
+                break
+            try:
+                claimed = stream.take_frame()
+                if claimed is not None:
+                    try:
+                        self._process_frame(stream, detector, *claimed)
+                    except Exception as e:
+                        # One bad frame must not take the worker down or leave the stream claimed
+                        print(f"Error processing stream {stream.stream_id} ({stream.source}): {e}")
+                        stream.fail_frame()
+            finally:
+                with self._lock:
+                    stream.scheduled = False
+                # A frame that arrived meanwhile goes to the back of the queue, behind the other streams
+                self._schedule(stream)
+
+    def start(self):
+        from pose_detector import IMAGE_MODE, detector_pool
+        from yoga_analyzer import YogaAnalyzer
+
+        # Workers interleave frames from different streams, so their detectors
+        # run in image mode and carry no tracking state between frames
+        self._detectors = [detector_pool.acquire(IMAGE_MODE) for _ in range(self.num_workers)]
+        for stream in self.streams:
+            # The analyzer only uses the detector's landmark and angle helpers here
+            stream.analyzer = YogaAnalyzer(self._detectors[0])
+            stream.on_frame = self._schedule
+
+        self._workers = [threading.Thread(target=self._worker_loop, args=(detector,), daemon=True,
+                                          name=f"inference-{i}")
+                         for i, detector in enumerate(self._detectors)]
+        for worker in self._workers:
+            worker.start()
+        self.started_at = time.monotonic()
+        for stream in self.streams:
+            stream.start()
+        print(f"✓ Serving {len(self.streams)} streams with {self.num_workers} inference workers")
+
+    @property
+    def done(self) -> bool:
+        return all(stream.done for stream in self.streams)
+
+    def stats(self) -> List[dict]:
+        return [stream.stats() for stream in self.streams]
+
+    def print_stats(self):
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        total = 0
+        for row in self.stats():
+            total += row['processed']
+            print(f"  stream {row['stream']} ({row['source']}): {row['processed'] / elapsed:5.1f} fps, "
+                  f"{row['dropped']} dropped, {row['errors']} errors, latency {row['mean_latency_ms']:.0f} ms mean / "
+                  f"{row['max_latency_ms']:.0f} ms max, {row['reps']} reps (best hold {row['best_hold']:.1f}s)")
+        print(f"  total: {total / elapsed:.1f} frames/s over {elapsed:.1f}s")
+
+    def stop(self):
+        from pose_detector import detector_pool
+
+        for stream in self.streams:
+            stream.stop()
+        for _ in self._workers:
+            self.ready.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+        for detector in self._detectors:
+            detector_pool.release(detector)
+
+
+def parse_source(source: str):
+    return int(source) if source.isdigit() else source
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve several camera streams from one kiosk process")
+    parser.add_argument('sources', nargs='+', help="Camera indices or video files, one per mat")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Inference worker threads (default: one per stream, at most one per core)")
+    parser.add_argument('--pose', default='mountain', help="Target pose for every stream")
+    parser.add_argument('--min-hold', type=float, default=2.0,
+                        help="Seconds a pose must be held to count as a repetition (default: 2)")
+    parser.add_argument('--display', action='store_true', help="Show one window per stream")
+    parser.add_argument('--no-pace', action='store_true',
+                        help="Process every frame of video files as fast as possible (throughput test)")
+    parser.add_argument('--duration', type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument('--stats-interval', type=float, default=5.0, help="Seconds between stats reports")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    try:
+        server = KioskServer([parse_source(source) for source in args.sources], args.workers, args.pose,
+                             pace=not args.no_pace, display=args.display, min_hold=args.min_hold)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return
+
+    server.start()
+    last_stats = time.monotonic()
+    try:
+        while not server.done:
+            if args.duration and time.monotonic() - server.started_at > args.duration:
+                break
+            if args.display:
+                for stream in server.streams:
+                    if stream.display_frame is not None:
+                        cv2.imshow(f"Mat {stream.stream_id + 1}", stream.display_frame)
+                if cv2.waitKey(15) & 0xFF == ord('q'):
+                    break
+            else:
+                time.sleep(0.05)
+            if time.monotonic() - last_stats > args.stats_interval:
+                server.print_stats()
+                last_stats = time.monotonic()
+    except KeyboardInterrupt:
+        print("\nExiting...")
+    finally:
+        server.stop()
+        if args.display:
+            cv2.destroyAllWindows()
+        print("Final stats:")
+        server.print_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+NUM_LANDMARKS = 33
+
+# Joint angles used as features: (first point, vertex, third point)
+ANGLE_TRIPLETS = {
+    'left_elbow': (11, 13, 15),
+    'right_elbow': (12, 14, 16),
+    'left_shoulder': (13, 11, 23),
+    'right_shoulder': (14, 12, 24),
+    'left_hip': (11, 23, 25),
+    'right_hip': (12, 24, 26),
+    'left_knee': (23, 25, 27),
+    'right_knee': (24, 26, 28),
+}
+
+def landmarks_to_array(results) -> Optional[np.ndarray]:
+    """Convert MediaPipe pose results to a (33, 4) array of x, y, z, visibility"""
+    if not results.pose_landmarks:
+        return None
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility)
+                     for lm in results.pose_landmarks.landmark], dtype=np.float32)
+
+def array_to_results(points: Optional[np.ndarray]):
+    """Inverse of landmarks_to_array: a MediaPipe-style results object for analysis and drawing"""
+    from types import SimpleNamespace
+    from mediapipe.framework.formats import landmark_pb2
+
+    if points is None:
+        return SimpleNamespace(pose_landmarks=None)
+    landmarks = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in points.tolist():
+        landmarks.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return SimpleNamespace(pose_landmarks=landmarks)
+
+def landmark_features(landmarks: np.ndarray, aspect_ratio=1.0) -> np.ndarray:
+    """Build pose feature vectors from normalized landmarks
+
+    Accepts one (33, 4) array or a batch of shape (N, 33, 4). Coordinates
+    are centred on the hips and scaled by torso length, so features do not
+    depend on where the person stands or how far they are from the camera.
+    aspect_ratio (image width / height) restores square pixel geometry
+    before angles are measured.
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    single = landmarks.ndim == 2
+    if single:
+        landmarks = landmarks[None]
+
+    aspect_ratio = np.asarray(aspect_ratio, dtype=np.float32).reshape(-1, 1)
+    xy = landmarks[:, :, :2].copy()
+    xy[:, :, 0] *= aspect_ratio
+    visibility = landmarks[:, :, 3]
+
+    hip_center = (xy[:, 23] + xy[:, 24]) / 2
+    shoulder_center = (xy[:, 11] + xy[:, 12]) / 2
+    torso = np.linalg.norm(shoulder_center - hip_center, axis=1, keepdims=True)
+    torso = np.maximum(torso, 1e-6)
+
+    coords = (xy - hip_center[:, None, :]) / torso[:, None, :]
+
+    a = xy[:, [t[0] for t in ANGLE_TRIPLETS.values()]]
+    b = xy[:, [t[1] for t in ANGLE_TRIPLETS.values()]]
+    c = xy[:, [t[2] for t in ANGLE_TRIPLETS.values()]]
+    ba, bc = a - b, c - b
+    cosine = np.sum(ba * bc, axis=2) / np.maximum(
+        np.linalg.norm(ba, axis=2) * np.linalg.norm(bc, axis=2), 1e-6)
+    angles = np.arccos(np.clip(cosine, -1.0, 1.0)) / np.pi
+
+    features = np.concatenate([coords.reshape(len(xy), -1), visibility, angles], axis=1)
+    return features[0] if single else features
+
+class LandmarkPoseClassifier:
+    """Small MLP over landmark features with a NumPy-only forward pass
+
+    Training uses scikit-learn; inference only needs NumPy and takes
+    microseconds per frame, so it can run inside the live camera loop.
+    """
+    def __init__(self, hidden_layer_sizes: Sequence[int] = (64, 32)):
+        self.hidden_layer_sizes = tuple(hidden_layer_sizes)
+        self.classes: List[str] = []
+        self.weights: List[np.ndarray] = []
+        self.biases: List[np.ndarray] = []
+        self.mean = None
+        self.std = None
+
+    def fit(self, features: np.ndarray, labels: Sequence[str], max_iter=500, random_state=42):
+        """Train the MLP on feature vectors and string labels"""
+        from sklearn.neural_network import MLPClassifier
+
+        features = np.asarray(features, dtype=np.float32)
+        self.mean = features.mean(axis=0)
+        self.std = features.std(axis=0) + 1e-6
+
+        mlp = MLPClassifier(hidden_layer_sizes=self.hidden_layer_sizes, max_iter=max_iter,
+                            early_stopping=len(features) >= 50, random_state=random_state)
+        mlp.fit((features - self.mean) / self.std, labels)
+
+        self.classes = [str(c) for c in mlp.classes_]
+        self.weights = [w.astype(np.float32) for w in mlp.coefs_]
+        self.biases = [b.astype(np.float32) for b in mlp.intercepts_]
+        return self
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """Class probabilities for one feature vector or a batch"""
+        x = (np.asarray(features, dtype=np.float32) - self.mean) / self.std
+        single = x.ndim == 1
+        if single:
+            x = x[None]
+
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            x = np.maximum(x @ w + b, 0)
+        logits = x @ self.weights[-1] + self.biases[-1]
+
+        if logits.shape[1] == 1:
+            # scikit-learn uses a single logistic output for two classes
+            p = 1 / (1 + np.exp(-logits[:, 0]))
+            proba = np.stack([1 - p, p], axis=1)
+        else:
+            logits = logits - logits.max(axis=1, keepdims=True)
+            proba = np.exp(logits)
+            proba /= proba.sum(axis=1, keepdims=True)
+
+        return proba[0] if single else proba
+
+    def predict_landmarks(self, landmarks: np.ndarray, image_shape) -> Tuple[str, float]:
+        """Predict the pose label and confidence for one (33, 4) landmark array"""
+        h, w = image_shape[:2]
+        proba = self.predict_proba(landmark_features(landmarks, aspect_ratio=w / h))
+        best = int(np.argmax(proba))
+        return self.classes[best], float(proba[best])
+
+    def save(self, path: str):
+        """Save the classifier as a NumPy .npz archive"""
+        arrays = {'classes': np.array(self.classes), 'mean': self.mean, 'std': self.std,
+                  'hidden_layer_sizes': np.array(self.hidden_layer_sizes)}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'weight_{i}'] = w
+            arrays[f'bias_{i}'] = b
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'LandmarkPoseClassifier':
+        """Load a classifier saved with save()"""
+        data = np.load(path)
+        model = cls(hidden_layer_sizes=data['hidden_layer_sizes'].tolist())
+        model.classes = [str(c) for c in data['classes']]
+        model.mean = data['mean']
+        model.std = data['std']
+        n_layers = len(model.hidden_layer_sizes) + 1
+        model.weights = [data[f'weight_{i}'] for i in range(n_layers)]
+        model.biases = [data[f'bias_{i}'] for i in range(n_layers)]
+        return model
+
+def load_landmark_cache(cache_path: str) -> Dict[str, np.ndarray]:
+    """Load a landmark cache written by the dataset tooling"""
+    data = np.load(cache_path)
+    return {key: data[key] for key in data.files}
+
+def train_from_cache(cache_path: str, model_path: str, hidden_layer_sizes=(64, 32)) -> Dict[str, float]:
+    """Train a landmark classifier from cached landmarks and report split accuracy"""
+    cache = load_landmark_cache(cache_path)
+    detected = cache['detected']
+    features = landmark_features(cache['landmarks'][detected], cache['aspect_ratio'][detected])
+    labels = cache['labels'][detected]
+    splits = cache['splits'][detected]
+
+    train = splits == 'train'
+    model = LandmarkPoseClassifier(hidden_layer_sizes).fit(features[train], labels[train])
+    model.save(model_path)
+
+    accuracy = {}
+    for split in ['train', 'validation', 'test']:
+        mask = splits == split
+        if mask.any():
+            predicted = np.array(model.classes)[np.argmax(model.predict_proba(features[mask]), axis=1)]
+            accuracy[split] = float(np.mean(predicted == labels[mask]))
+            print(f"{split.title()} accuracy: {accuracy[split]:.4f} ({mask.sum()} samples)")
+
+    print(f"Landmark classifier saved to {model_path}")
+    return accuracy
+
+if __name__ == "__main__":
+    import sys
+
+    cache_path = sys.argv[1] if len(sys.argv) > 1 else "AI yoga/data/landmarks.npz"
+    model_path = sys.argv[2] if len(sys.argv) > 2 else "landmark_pose_model.npz"
+    train_from_cache(cache_path, model_path)
@@ -1,17 +1,31 @@
+import argparse
 import cv2
 import numpy as np
+import os
 import time
-from pose_detector import PoseDetector
-from yoga_analyzer import YogaAnalyzer
-from voice_guide import VoiceGuide
 
+# MediaPipe (pose_detector, yoga_analyzer) and pyttsx3 (voice_guide) are
+# imported in main() once the camera is open, so --help and camera errors
+# return immediately.
 
-def draw_ui_elements(frame, analysis_result, target_pose, pose_list, current_pose_index):
-    """Draw UI elements on the frame"""
+LANDMARK_MODEL_PATH = 'landmark_pose_model.npz'
+
+
+def draw_ui_elements(frame, analysis_result, target_pose, pose_list, current_pose_index,
+                     detected_pose=None, overlay=None, session=None):
+    """Draw UI elements on the frame
+    
+    overlay is an optional preallocated scratch frame for the
+    semi-transparent panels; without it a copy of the frame is made.
+    session is an optional PoseSession whose hold time and reps are shown.
+    """
     height, width = frame.shape[:2]
     
     # Create semi-transparent overlay for UI
-    overlay = frame.copy()
+    if overlay is None:
+        overlay = frame.copy()
+    else:
+        np.copyto(overlay, frame)
     
     # Draw pose selection area
     cv2.rectangle(overlay, (10, 10), (400, 120), (0, 0, 0), -1)
@@ -28,10 +42,22 @@ def draw_ui_elements(frame, analysis_result, target_pose, pose_list, current_pos
     cv2.putText(frame, f"Score: {score}/100", (20, 70), 
                 cv2.FONT_HERSHEY_SIMPLEX, 0.8, score_color, 2)
     
+    # Hold timer and repetitions
+    if session is not None:
+        hold_color = (0, 255, 0) if session.holding else (200, 200, 200)
+        cv2.putText(frame, f"Hold: {session.hold_time:.1f}s  Reps: {session.reps}", (230, 70),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, hold_color, 2)
+    
     # Instructions
     cv2.putText(frame, "Press 'n' for next pose, 'p' for previous, 'q' to quit", (20, 100), 
                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
     
+    # Pose recognized by the landmark classifier
+    if detected_pose is not None:
+        label, confidence = detected_pose
+        cv2.putText(frame, f"Detected: {label.replace('_', ' ').title()} ({confidence*100:.0f}%)",
+                    (20, 145), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    
     # Feedback area
     if analysis_result.get('pose_detected', False):
         feedback = analysis_result.get('feedback', '')
@@ -80,33 +106,92 @@ def draw_ui_elements(frame, analysis_result, target_pose, pose_list, current_pos
     return frame
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="AI Yoga Instructor - real-time pose feedback")
+    parser.add_argument('--camera', default='0',
+                        help="Camera index or path to a video file (default: 0)")
+    parser.add_argument('--width', type=int, default=640, help="Capture width")
+    parser.add_argument('--height', type=int, default=480, help="Capture height")
+    parser.add_argument('--roi', action='store_true',
+                        help="Track the person and run pose detection on a downscaled crop around them")
+    inference = parser.add_mutually_exclusive_group()
+    inference.add_argument('--multi-person', action='store_true',
+                           help="Detect, track and score every person in view (group classes)")
+    inference.add_argument('--workers', type=int, default=0,
+                           help="Run pose detection in this many worker processes (multi-core kiosks)")
+    parser.add_argument('--hold-target', type=float, default=15.0,
+                        help="Seconds to hold each pose before the guide says it is well held (default: 15)")
+    parser.add_argument('--speech-cache', default='speech_cache',
+                        help="Directory of pre-synthesized speech clips (default: speech_cache)")
+    parser.add_argument('--no-speech-cache', action='store_true',
+                        help="Synthesize every phrase instead of replaying cached clips")
+    parser.add_argument('--speech-process', action='store_true',
+                        help="Run speech synthesis and playback in a separate process")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     print("Starting AI Yoga Instructor...")
     print("Make sure you have a webcam connected and positioned to see your full body.")
+
+    # Start capturing from webcam before loading the heavy modules
+    source = int(args.camera) if args.camera.isdigit() else args.camera
+    video_capture = cv2.VideoCapture(source)
+
+    if not video_capture.isOpened():
+        print("Error: Could not open video stream. Please check your webcam.")
+        return
+    
+    print("✓ Webcam connected successfully")
+    
+    from frame_ring import FrameRing
+    from pose_session import HOLD_STARTED, REP_COMPLETED, TARGET_REACHED, PoseSession
     
     # Initialize modules
     try:
-        detector = PoseDetector()
-        analyzer = YogaAnalyzer()
-        voice_guide = VoiceGuide()
+        from pose_detector import LIVE_MODE, PoseDetector
+        from yoga_analyzer import YogaAnalyzer
+        from voice_guide import VoiceGuide, catalog_phrases
+        
+        multi_person = None
+        if args.multi_person:
+            from multi_person import NO_PERSON, MultiPersonAnalyzer, draw_people, primary_person
+            multi_person = MultiPersonAnalyzer()
+            detector = multi_person.detector
+        elif args.workers:
+            from pose_detector import IMAGE_MODE
+            # Detection runs in the worker processes; this one only analyzes and draws
+            detector = PoseDetector(mode=IMAGE_MODE)
+        else:
+            # One live-mode graph tracks the camera stream for both detection and analysis
+            detector = PoseDetector(mode=LIVE_MODE, roi_tracking=args.roi)
+        analyzer = YogaAnalyzer(detector)
+        speech_cache = None if args.no_speech_cache else args.speech_cache
+        if args.speech_process:
+            from speech_service import SpeechService
+            voice_guide = SpeechService(cache_dir=speech_cache)
+        else:
+            voice_guide = VoiceGuide(cache_dir=speech_cache)
         print("✓ Modules initialized successfully")
     except Exception as e:
         print(f"Error initializing modules: {e}")
+        video_capture.release()
         return
 
+    # Optional landmark-based pose classifier (trained with landmark_classifier.py)
+    pose_classifier = None
+    if os.path.exists(LANDMARK_MODEL_PATH):
+        from landmark_classifier import LandmarkPoseClassifier, landmarks_to_array
+        pose_classifier = LandmarkPoseClassifier.load(LANDMARK_MODEL_PATH)
+        print(f"✓ Landmark pose classifier loaded ({', '.join(pose_classifier.classes)})")
+
     # Available poses - 5 asanas
     pose_list = ['mountain', 'tree', 'sukasana', 'childs_pose', 'warrior2']
     current_pose_index = 0
     target_pose = pose_list[current_pose_index]
 
-    # Start capturing from webcam
-    video_capture = cv2.VideoCapture(0)
-
-    if not video_capture.isOpened():
-        print("Error: Could not open video stream. Please check your webcam.")
-        return
-    
-    print("✓ Webcam connected successfully")
     print("\nStarting yoga session...")
     print("Controls:")
     print("- 'n': Next pose")
@@ -115,10 +200,31 @@ def main():
     print("- 'q': Quit")
     
     # Set video properties for better performance
-    video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+    video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, args.width)
+    video_capture.set(cv2.CAP_PROP_FRAME_HEIGHT, args.height)
     video_capture.set(cv2.CAP_PROP_FPS, 30)
+    
+    # Frames, their RGB copies and the UI overlay live in buffers allocated once
+    ring = FrameRing(args.height, args.width)
 
+    inference = None
+    if args.workers:
+        from inference_workers import InferencePool
+        from pose_detector import IMAGE_MODE
+        height = int(video_capture.get(cv2.CAP_PROP_FRAME_HEIGHT)) or args.height
+        width = int(video_capture.get(cv2.CAP_PROP_FRAME_WIDTH)) or args.width
+        try:
+            # Only a single worker sees consecutive frames, so only it can track the person
+            single = args.workers == 1
+            inference = InferencePool((height, width, 3), args.workers,
+                                      mode=LIVE_MODE if single else IMAGE_MODE, roi_tracking=args.roi and single)
+            print(f"✓ {args.workers} inference worker(s) started")
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            print("Running pose detection in this process instead")
+
+    # Render the fixed phrases in the background; a prior `python speech_cache.py` makes this a no-op
+    voice_guide.prerender(catalog_phrases(analyzer))
     voice_guide.speak_session_start()
     
     # Get initial instructions
@@ -129,27 +235,72 @@ def main():
     last_feedback_time = 0
     feedback_interval = 5  # Give feedback every 5 seconds
     last_score = 0
+    
+    # Hold time and repetitions of the current target pose
+    session = PoseSession(target_hold=args.hold_target)
 
     try:
         while video_capture.isOpened():
-            ret, frame = video_capture.read()
-
-            if not ret:
+            slot = ring.next_slot()
+            if not ring.capture(video_capture, slot):
                 print("Error: Failed to capture image from webcam.")
                 break
 
-            # Flip the frame horizontally for mirror view
-            frame = cv2.flip(frame, 1)
+            if inference is not None:
+                if ring.shape != inference.shape:
+                    print("Error: Camera frame size changed; restart to resize the inference workers.")
+                    break
+                # Mirror straight into shared memory; the frame shown is the oldest one the workers finished
+                job = inference.acquire_slot()
+                ring.mirror(slot, dst=inference.frame(job))
+                inference.submit(job)
+                if not inference.full:
+                    continue
+                job, results = inference.next_result()
+                frame = inference.frame(job)
+            else:
+                # Flip the frame horizontally for mirror view
+                frame = ring.mirror(slot)
 
             # Detect and analyze pose
-            results = detector.detect_pose(frame)
-            analysis_result = analyzer.analyze_pose(frame, target_pose)
+            if inference is not None:
+                analysis_result = analyzer.analyze_results(results, frame.shape, target_pose)
+            elif multi_person is not None:
+                # Everyone is scored; the largest person in view drives the panel and the voice
+                people = multi_person.process(frame, target_pose)
+                primary = primary_person(people)
+                results = primary.results if primary else NO_PERSON
+                analysis_result = (primary.analysis if primary
+                                   else analyzer.analyze_results(results, frame.shape, target_pose))
+            else:
+                results = detector.detect_pose(frame, rgb_out=ring.rgb[slot])
+                analysis_result = analyzer.analyze_results(results, frame.shape, target_pose)
+            
+            # Classify the pose from the detected landmarks
+            detected_pose = None
+            if pose_classifier is not None:
+                points = landmarks_to_array(results)
+                if points is not None:
+                    detected_pose = pose_classifier.predict_landmarks(points, frame.shape)
             
             # Draw pose landmarks
-            frame = detector.draw_landmarks(frame, results)
+            if multi_person is not None:
+                frame = draw_people(frame, people, detector.draw_landmarks)
+            else:
+                frame = detector.draw_landmarks(frame, results)
+            
+            # Track holds and repetitions
+            event = session.update(analysis_result)
+            if event == HOLD_STARTED:
+                voice_guide.speak_hold_started()
+            elif event == TARGET_REACHED:
+                voice_guide.speak_target_reached()
+            elif event == REP_COMPLETED:
+                voice_guide.speak_rep_completed(session.reps, session.last_hold)
             
             # Draw UI elements
-            frame = draw_ui_elements(frame, analysis_result, target_pose, pose_list, current_pose_index)
+            frame = draw_ui_elements(frame, analysis_result, target_pose, pose_list, current_pose_index,
+                                     detected_pose, overlay=ring.overlay, session=session)
             
             # Provide voice feedback periodically
             current_time = time.time()
@@ -161,13 +312,16 @@ def main():
                     voice_guide.speak_feedback(analysis_result['feedback'], score)
                     
                     if analysis_result['corrections']:
-                        voice_guide.speak_corrections(analysis_result['corrections'])
+                        voice_guide.speak_corrections(analysis_result['corrections'],
+                                                      analysis_result.get('correction_joints'))
                 
                 last_feedback_time = current_time
                 last_score = score
 
             # Display the frame
             cv2.imshow('AI Yoga Instructor', frame)
+            if inference is not None:
+                inference.release_slot(job)
 
             # Handle key presses
             key = cv2.waitKey(1) & 0xFF
@@ -181,6 +335,7 @@ def main():
                 pose_name = analyzer.yoga_poses[target_pose]['name']
                 voice_guide.speak_pose_instructions(pose_name, instructions)
                 last_feedback_time = 0  # Reset feedback timer
+                session.reset()
             elif key == ord('p'):  # Previous pose
                 current_pose_index = (current_pose_index - 1) % len(pose_list)
                 target_pose = pose_list[current_pose_index]
@@ -188,6 +343,7 @@ def main():
                 pose_name = analyzer.yoga_poses[target_pose]['name']
                 voice_guide.speak_pose_instructions(pose_name, instructions)
                 last_feedback_time = 0  # Reset feedback timer
+                session.reset()
             elif key == ord('i'):  # Get instructions
                 instructions = analyzer.get_pose_instructions(target_pose)
                 pose_name = analyzer.yoga_poses[target_pose]['name']
@@ -200,9 +356,15 @@ def main():
 
     finally:
         print("\nEnding yoga session...")
+        if session.reps:
+            print(f"✓ {session.reps} repetitions of {target_pose}, best hold {session.best_hold:.1f}s")
         voice_guide.speak_session_end()
         time.sleep(2)  # Give time for final speech
-        voice_guide.stop_all_speech()
+        voice_guide.close()
+        if multi_person is not None:
+            multi_person.close()
+        if inference is not None:
+            inference.close()
         video_capture.release()
         cv2.destroyAllWindows()
         print("✓ Session ended successfully")
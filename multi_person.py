@@ -0,0 +1,242 @@
+"""
+Multi-person pose scoring
+MediaPipe Pose follows a single person, so group classes are handled here:
+people are found with OpenCV's HOG person detector plus a full-frame
+MediaPipe search, each person's crop goes through an image-mode
+PoseDetector borrowed from the shared pool (crops run concurrently, the
+graphs release the GIL), and a tracker keeps person IDs stable across
+frames. Every ID has its own YogaAnalyzer.
+
+HOG's default detector is trained on upright pedestrians and rarely finds
+someone seated, bent or on all fours, so it cannot be the only way a track
+starts. MediaPipe finds one person per pass in any posture; the search
+masks out everyone already found and repeats up to pose_search_passes
+times per detection pass.
+
+Person detection runs only every few frames; in between, each track is
+cropped around its previous landmarks, so the per-frame cost is dominated
+by small landmark crops rather than full-frame searches.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from pose_detector import IMAGE_MODE, detector_pool, landmark_bounds, padded_box
+
+Box = Tuple[int, int, int, int]
+
+# Stand-in for MediaPipe results when nobody is in view
+NO_PERSON = SimpleNamespace(pose_landmarks=None)
+
+
+def box_overlap(boxes_a: np.ndarray, boxes_b: np.ndarray, over_smaller=False) -> np.ndarray:
+    """Pairwise IoU of two (N, 4) and (M, 4) arrays of x0, y0, x1, y1 boxes
+
+    With over_smaller the intersection is divided by the smaller box instead,
+    so a box nested inside another counts as a full match.
+    """
+    a = np.asarray(boxes_a, dtype=float)[:, None, :]
+    b = np.asarray(boxes_b, dtype=float)[None, :, :]
+    width = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    height = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = width * height
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    if over_smaller:
+        return intersection / np.maximum(np.minimum(area_a, area_b), 1e-9)
+    return intersection / np.maximum(area_a + area_b - intersection, 1e-9)
+
+
+class PersonDetector:
+    """OpenCV HOG + linear SVM people detector, run on a downscaled frame"""
+
+    def __init__(self, max_width=640, min_score=0.3, nms_threshold=0.4):
+        self.hog = cv2.HOGDescriptor()
+        self.hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+        self.max_width = max_width
+        self.min_score = min_score
+        self.nms_threshold = nms_threshold
+
+    def detect(self, image) -> List[Box]:
+        """Person boxes in full-image pixel coordinates"""
+        scale = min(1.0, self.max_width / image.shape[1])
+        small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else image
+        rects, weights = self.hog.detectMultiScale(small, winStride=(8, 8), padding=(8, 8), scale=1.05)
+        if len(rects) == 0:
+            return []
+
+        scores = np.asarray(weights, dtype=float).reshape(-1)
+        keep = cv2.dnn.NMSBoxes([list(map(int, rect)) for rect in rects], scores.tolist(),
+                                self.min_score, self.nms_threshold)
+        boxes = []
+        for i in np.asarray(keep).reshape(-1):
+            x, y, w, h = rects[i] / scale
+            boxes.append((int(x), int(y), int(x + w), int(y + h)))
+        return boxes
+
+
+class PersonTrack:
+    """One tracked person: box, missed frames and scoring state"""
+
+    def __init__(self, track_id: int, box: Box, analyzer):
+        self.track_id = track_id
+        self.box = box
+        self.analyzer = analyzer
+        self.misses = 0
+        self.results = None
+        self.analysis = None
+
+
+class PersonTracker:
+    """Matches detections to tracks by box overlap with the Hungarian algorithm
+
+    Overlap is measured against the smaller box: a landmark box is usually
+    tighter than the person detector's box for the same person.
+    """
+
+    def __init__(self, min_overlap=0.5, max_misses=10):
+        self.min_overlap = min_overlap
+        self.max_misses = max_misses
+        self.tracks: Dict[int, PersonTrack] = {}
+        self._next_id = 1
+
+    def update(self, boxes: List[Box], new_analyzer):
+        """Move matched tracks to their detections and start a track for every unmatched one"""
+        from scipy.optimize import linear_sum_assignment
+
+        tracks = list(self.tracks.values())
+        unmatched_boxes = set(range(len(boxes)))
+        if tracks and boxes:
+            overlap = box_overlap([track.box for track in tracks], boxes, over_smaller=True)
+            rows, cols = linear_sum_assignment(-overlap)
+            for row, col in zip(rows, cols):
+                if overlap[row, col] >= self.min_overlap:
+                    tracks[row].box = boxes[col]
+                    unmatched_boxes.discard(col)
+
+        for col in sorted(unmatched_boxes):
+            track = PersonTrack(self._next_id, boxes[col], new_analyzer())
+            self.tracks[track.track_id] = track
+            self._next_id += 1
+
+    def miss(self, track: PersonTrack):
+        """Count a frame without landmarks; the track is dropped after max_misses in a row"""
+        track.misses += 1
+        if track.misses > self.max_misses:
+            self.tracks.pop(track.track_id, None)
+
+    def suppress_duplicates(self, max_overlap=0.8):
+        """Drop newer tracks that converged onto the same person as an older one"""
+        kept = []
+        for track in sorted(self.tracks.values(), key=lambda track: track.track_id):
+            if kept and box_overlap([track.box], [other.box for other in kept], True).max() > max_overlap:
+                del self.tracks[track.track_id]
+            else:
+                kept.append(track)
+
+
+class MultiPersonAnalyzer:
+    """Per-person landmarks, IDs and YogaAnalyzer scores for every frame"""
+
+    def __init__(self, detect_interval=5, max_people=8, crop_max_side=256, box_padding=0.15, workers=4,
+                 pose_search_passes=2):
+        try:
+            self.person_detector = PersonDetector()
+        except AttributeError:
+            # Some OpenCV builds ship without the HOG people detector
+            print("HOG person detector unavailable; finding people with MediaPipe only")
+            self.person_detector = None
+        self.pose_search_passes = pose_search_passes
+        self.tracker = PersonTracker()
+        self.detect_interval = detect_interval
+        self.max_people = max_people
+        self.crop_max_side = crop_max_side
+        self.box_padding = box_padding
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='person-pose')
+        self.frame_index = 0
+        # Analyzers and drawing only use this detector's landmark and angle helpers
+        self.detector = detector_pool.acquire(IMAGE_MODE)
+
+    def _new_analyzer(self):
+        from yoga_analyzer import YogaAnalyzer
+        return YogaAnalyzer(self.detector)
+
+    def _estimate(self, image, box):
+        with detector_pool.detector(IMAGE_MODE) as detector:
+            return detector.detect_in_region(image, box, self.crop_max_side)
+
+    def _find_people(self, image) -> List[Box]:
+        """Person boxes from HOG, plus people in any posture found by a masked MediaPipe search"""
+        boxes = self.person_detector.detect(image) if self.person_detector is not None else []
+        masked = None
+        for _ in range(self.pose_search_passes):
+            if len(boxes) >= self.max_people:
+                break
+            if masked is None:
+                # Hide everyone already found or tracked so each pass finds someone new
+                masked = image.copy()
+                for x0, y0, x1, y1 in boxes + [track.box for track in self.tracker.tracks.values()]:
+                    masked[y0:y1, x0:x1] = 0
+            with detector_pool.detector(IMAGE_MODE) as detector:
+                results = detector.detect_pose(masked)
+            box = (padded_box(landmark_bounds(results, image.shape), image.shape, self.box_padding)
+                   if results.pose_landmarks else None)
+            if box is None:
+                break
+            boxes.append(box)
+            masked[box[1]:box[3], box[0]:box[2]] = 0
+        return boxes[:self.max_people]
+
+    def process(self, image, target_pose='mountain') -> List[PersonTrack]:
+        """Update every person in a BGR frame; returns the tracks seen in this frame"""
+        if self.frame_index % self.detect_interval == 0 or not self.tracker.tracks:
+            self.tracker.update(self._find_people(image), self._new_analyzer)
+        self.frame_index += 1
+        # Tracks the person detector missed this time are still estimated from their last box
+        tracks = list(self.tracker.tracks.values())
+
+        futures = [self.executor.submit(self._estimate, image, track.box) for track in tracks]
+        seen = []
+        for track, future in zip(tracks, futures):
+            results = future.result()
+            if not results.pose_landmarks:
+                self.tracker.miss(track)
+                continue
+            track.misses = 0
+            track.results = results
+            track.analysis = track.analyzer.analyze_results(results, image.shape, target_pose)
+            # Follow the person with a box around their landmarks until the next detection pass
+            track.box = padded_box(landmark_bounds(results, image.shape), image.shape, self.box_padding) or track.box
+            seen.append(track)
+
+        self.tracker.suppress_duplicates()
+        return [track for track in seen if track.track_id in self.tracker.tracks]
+
+    def close(self):
+        self.executor.shutdown()
+        detector_pool.release(self.detector)
+
+
+def draw_people(frame, tracks: List[PersonTrack], draw_landmarks=None):
+    """Box, ID and score of every person, plus their landmarks when a drawing function is given"""
+    for track in tracks:
+        x0, y0, x1, y1 = track.box
+        score = track.analysis.get('score', 0) if track.analysis else 0
+        color = (0, 255, 0) if score >= 80 else (0, 255, 255) if score >= 60 else (0, 0, 255)
+        if draw_landmarks is not None and track.results is not None:
+            draw_landmarks(frame, track.results)
+        cv2.rectangle(frame, (x0, y0), (x1, y1), color, 2)
+        cv2.putText(frame, f"#{track.track_id}: {score}/100", (x0 + 5, max(20, y0 - 8)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    return frame
+
+
+def primary_person(tracks: List[PersonTrack]) -> Optional[PersonTrack]:
+    """The largest person in view, who gets the spoken feedback"""
+    if not tracks:
+        return None
+    return max(tracks, key=lambda track: (track.box[2] - track.box[0]) * (track.box[3] - track.box[1]))
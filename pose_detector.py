@@ -2,25 +2,154 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import math
+import threading
+from contextlib import contextmanager
 from typing import List, Tuple, Dict, Optional
 
+# Live mode tracks the person from frame to frame of one video stream;
+# image mode runs full detection on every call, for unrelated still images.
+LIVE_MODE = 'live'
+IMAGE_MODE = 'image'
+POSE_MODES = [LIVE_MODE, IMAGE_MODE]
+
+# Region-of-interest tracking: landmarks at least this visible define the person's box
+ROI_MIN_VISIBILITY = 0.5
+# The crop is kept while the person stays this far (fraction of the crop) from its edges
+ROI_EDGE_MARGIN = 0.05
+# ...and still fills at least this fraction of it (otherwise they walked away)
+ROI_MIN_FILL = 0.15
+
+
+def landmark_bounds(results, image_shape):
+    """(x_min, y_min, x_max, y_max) pixel bounds of the visible landmarks"""
+    h, w = image_shape[:2]
+    points = np.array([(lm.x * w, lm.y * h, lm.visibility) for lm in results.pose_landmarks.landmark])
+    visible = points[points[:, 2] >= ROI_MIN_VISIBILITY, :2]
+    if len(visible) < 2:
+        visible = points[:, :2]
+    (x_min, y_min), (x_max, y_max) = visible.min(axis=0), visible.max(axis=0)
+    return x_min, y_min, x_max, y_max
+
+
+def padded_box(bounds, image_shape, padding=0.25):
+    """Integer (x0, y0, x1, y1) box around bounds, padded by a fraction of its longer side and clipped
+    
+    Returns None when the clipped box is degenerate.
+    """
+    h, w = image_shape[:2]
+    x_min, y_min, x_max, y_max = bounds
+    pad = padding * max(x_max - x_min, y_max - y_min)
+    box = (int(max(0, x_min - pad)), int(max(0, y_min - pad)),
+           int(min(w, math.ceil(x_max + pad))), int(min(h, math.ceil(y_max + pad))))
+    if box[2] - box[0] < 2 or box[3] - box[1] < 2:
+        return None
+    return box
+
+
 class PoseDetector:
-    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5):
-        """Initialize MediaPipe pose detection"""
+    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5, mode=LIVE_MODE,
+                 model_complexity=1, roi_tracking=False, roi_padding=0.25, roi_max_side=320):
+        """Initialize MediaPipe pose detection in live-stream or batch-image mode
+        
+        With roi_tracking (live mode only) each frame is cropped to a padded
+        box around the previous frame's landmarks, scaled so its longer
+        side is at most roi_max_side pixels, and the landmarks are mapped
+        back to full-frame coordinates. Losing the person falls back to
+        full-frame detection.
+        """
+        if mode not in POSE_MODES:
+            raise ValueError(f"Unknown pose detector mode '{mode}', choose from {', '.join(POSE_MODES)}")
+        
+        self.mode = mode
+        self.settings = (mode, min_detection_confidence, min_tracking_confidence, model_complexity,
+                         roi_tracking)
+        self.roi_tracking = roi_tracking and mode == LIVE_MODE
+        self.roi_padding = roi_padding
+        self.roi_max_side = roi_max_side
+        self.roi: Optional[Tuple[int, int, int, int]] = None  # x0, y0, x1, y1 in frame pixels
         self.mp_pose = mp.solutions.pose
         self.pose = self.mp_pose.Pose(
+            static_image_mode=(mode == IMAGE_MODE),
+            model_complexity=model_complexity,
             min_detection_confidence=min_detection_confidence,
             min_tracking_confidence=min_tracking_confidence
         )
         self.mp_drawing = mp.solutions.drawing_utils
+    
+    def reset(self):
+        """Drop tracking state so the next frame starts a new stream"""
+        self.roi = None
+        self.pose.reset()
+    
+    def close(self):
+        """Release the MediaPipe graph"""
+        self.pose.close()
+        
+    def detect_pose(self, image, rgb_out=None):
+        """Detect pose landmarks in the image
+        
+        rgb_out is an optional preallocated buffer, the size of image, that
+        receives the full-frame RGB conversion instead of a new array.
+        """
+        if self.roi is not None:
+            results = self.detect_in_region(image, self.roi, self.roi_max_side)
+            if results.pose_landmarks:
+                self._update_roi(results, image.shape)
+                return results
+            # Tracking lost: search the whole frame again
+            self.reset()
         
-    def detect_pose(self, image):
-        """Detect pose landmarks in the image"""
         # Convert BGR to RGB
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb_out)
         results = self.pose.process(rgb_image)
+        if self.roi_tracking and results.pose_landmarks:
+            self._update_roi(results, image.shape)
+        return results
+    
+    def detect_in_region(self, image, region, max_side=None):
+        """Detect the pose inside an (x0, y0, x1, y1) pixel region of a BGR image
+        
+        The crop is downscaled so its longer side is at most max_side, and
+        the landmarks are mapped back to normalized full-image coordinates.
+        """
+        x0, y0, x1, y1 = region
+        crop = image[y0:y1, x0:x1]
+        crop_h, crop_w = crop.shape[:2]
+        
+        scale = max_side / max(crop_h, crop_w) if max_side else 1.0
+        if scale < 1.0:
+            crop = cv2.resize(crop, (max(1, round(crop_w * scale)), max(1, round(crop_h * scale))),
+                              interpolation=cv2.INTER_AREA)
+        results = self.pose.process(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+        
+        if results.pose_landmarks:
+            # Resizing keeps the aspect ratio, so normalized crop coordinates stay valid
+            h, w = image.shape[:2]
+            for landmark in results.pose_landmarks.landmark:
+                landmark.x = (x0 + landmark.x * crop_w) / w
+                landmark.y = (y0 + landmark.y * crop_h) / h
+                landmark.z = landmark.z * crop_w / w
         return results
     
+    def _update_roi(self, results, image_shape):
+        """Keep the crop while the person stays well inside it, otherwise re-centre it"""
+        h, w = image_shape[:2]
+        bounds = landmark_bounds(results, image_shape)
+        x_min, y_min, x_max, y_max = bounds
+        
+        if self.roi is not None:
+            rx0, ry0, rx1, ry1 = self.roi
+            margin = ROI_EDGE_MARGIN * max(rx1 - rx0, ry1 - ry0)
+            inside = (x_min >= rx0 + margin or rx0 == 0) and (y_min >= ry0 + margin or ry0 == 0) and \
+                     (x_max <= rx1 - margin or rx1 == w) and (y_max <= ry1 - margin or ry1 == h)
+            fill = (x_max - x_min) * (y_max - y_min) / ((rx1 - rx0) * (ry1 - ry0))
+            if inside and fill >= ROI_MIN_FILL:
+                return
+        
+        # MediaPipe's tracking state is in the old crop's coordinates
+        self.roi = padded_box(bounds, image_shape, self.roi_padding)
+        self.pose.reset()
+    
     def draw_landmarks(self, image, results):
         """Draw pose landmarks on the image"""
         if results.pose_landmarks:
@@ -69,3 +198,60 @@ class PoseDetector:
                 y = int(landmark.y * h)
                 landmarks[i] = (x, y, landmark.visibility)
         return landmarks
+
+
+class PoseDetectorPool:
+    """Initialized PoseDetector graphs kept for reuse, grouped by their settings
+    
+    A detector is lent to one caller at a time: MediaPipe graphs are not
+    thread-safe, and a live-mode detector holds one stream's tracking state,
+    which is reset when it is returned.
+    """
+    
+    def __init__(self):
+        self._idle: Dict[tuple, List[PoseDetector]] = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, mode=IMAGE_MODE, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                model_complexity=1, roi_tracking=False) -> PoseDetector:
+        """Take an idle detector with these settings, building one only if none is free"""
+        settings = (mode, min_detection_confidence, min_tracking_confidence, model_complexity, roi_tracking)
+        with self._lock:
+            idle = self._idle.get(settings)
+            if idle:
+                return idle.pop()
+        return PoseDetector(min_detection_confidence, min_tracking_confidence, mode, model_complexity,
+                            roi_tracking)
+    
+    def release(self, detector: PoseDetector):
+        """Return a detector to the pool"""
+        if detector.mode == LIVE_MODE:
+            detector.reset()
+        with self._lock:
+            self._idle.setdefault(detector.settings, []).append(detector)
+    
+    @contextmanager
+    def detector(self, mode=IMAGE_MODE, **settings):
+        """Borrow a detector for the duration of a with block"""
+        detector = self.acquire(mode, **settings)
+        try:
+            yield detector
+        finally:
+            self.release(detector)
+    
+    def close(self):
+        """Release every idle detector's graph"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for detectors in idle.values():
+            for detector in detectors:
+                detector.close()
+
+
+# Process-wide pool shared by the live app, dataset tools and servers
+detector_pool = PoseDetectorPool()
+
+
+def pooled_detector(mode=IMAGE_MODE, **settings):
+    """Borrow an initialized detector from the shared pool: with pooled_detector() as detector: ..."""
+    return detector_pool.detector(mode, **settings)
@@ -0,0 +1,156 @@
+"""
+Hold timing and repetition counting over the score stream
+PoseSession is a small state machine fed one YogaAnalyzer result at a time.
+It tracks whether the person is entering, holding or leaving the target
+pose, how long they held it above the score threshold, and how many
+repetitions (completed holds) they did. Only running sums and the current
+state are kept, so memory per stream is constant however long the session
+runs, and a server can keep one PoseSession for every concurrent stream.
+"""
+
+import time
+from typing import Optional
+
+IDLE = 'idle'           # not in the pose
+ENTERING = 'entering'   # above the threshold, not yet for enter_time seconds
+HOLDING = 'holding'     # holding the pose
+EXITING = 'exiting'     # below the exit threshold, for less than exit_grace seconds
+
+# Events returned by PoseSession.update
+HOLD_STARTED = 'hold_started'
+TARGET_REACHED = 'target_reached'
+REP_COMPLETED = 'rep_completed'
+HOLD_ABANDONED = 'hold_abandoned'
+
+
+class PoseSession:
+    """Enter / hold / exit state machine with hold timing and rep counting
+
+    Scores are smoothed with an exponential moving average, and there is
+    hysteresis both in score (hold_threshold to enter, exit_threshold to
+    leave) and in time (enter_time to start a hold, exit_grace before a dip
+    ends it), so a jittery score does not start and end holds every frame.
+    A hold counts as a repetition once it lasted min_hold seconds.
+    """
+
+    def __init__(self, hold_threshold=70, exit_threshold: Optional[float] = None, enter_time=0.5,
+                 exit_grace=1.0, min_hold=2.0, target_hold: Optional[float] = None, smoothing=0.3):
+        self.hold_threshold = hold_threshold
+        self.exit_threshold = hold_threshold - 10 if exit_threshold is None else exit_threshold
+        self.enter_time = enter_time
+        self.exit_grace = exit_grace
+        self.min_hold = min_hold
+        self.target_hold = target_hold
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self):
+        """Start over, e.g. when the target pose changes"""
+        self.state = IDLE
+        self.score = 0.0           # smoothed score
+        self.last_time = None
+        self.state_since = None    # when the current state was entered
+        self.hold_start = None
+        self.exit_start = None
+        self.target_announced = False
+
+        self.reps = 0
+        self.best_hold = 0.0
+        self.last_hold = 0.0
+        self.total_hold = 0.0      # seconds spent in completed repetitions
+        self.hold_score_sum = 0.0  # time-weighted score while holding
+        self.hold_score_time = 0.0
+        self.frames = 0
+
+    @property
+    def holding(self) -> bool:
+        return self.state == HOLDING
+
+    @property
+    def hold_time(self) -> float:
+        """Seconds the current hold has lasted (0 when not holding)"""
+        if self.hold_start is None or self.last_time is None:
+            return 0.0
+        end = self.exit_start if self.state == EXITING else self.last_time
+        return max(0.0, end - self.hold_start)
+
+    @property
+    def mean_hold_score(self) -> float:
+        """Average smoothed score while holding, weighted by time"""
+        return self.hold_score_sum / self.hold_score_time if self.hold_score_time else 0.0
+
+    def _set_state(self, state, now):
+        self.state = state
+        self.state_since = now
+
+    def _end_hold(self, now) -> str:
+        held = self.exit_start - self.hold_start
+        self.hold_start = self.exit_start = None
+        self._set_state(IDLE, now)
+        if held < self.min_hold:
+            return HOLD_ABANDONED
+        self.reps += 1
+        self.last_hold = held
+        self.best_hold = max(self.best_hold, held)
+        self.total_hold += held
+        return REP_COMPLETED
+
+    def update(self, analysis: dict, timestamp: Optional[float] = None) -> Optional[str]:
+        """Feed one frame's YogaAnalyzer result; returns the event it caused, if any
+
+        timestamp is in seconds (time.monotonic() when omitted). Frames
+        without a detected pose count as a score of 0.
+        """
+        now = time.monotonic() if timestamp is None else timestamp
+        raw = analysis.get('score', 0) if analysis.get('pose_detected', False) else 0
+        dt = now - self.last_time if self.last_time is not None else 0.0
+        self.score = raw if self.frames == 0 else self.score + self.smoothing * (raw - self.score)
+        self.last_time = now
+        self.frames += 1
+
+        if self.state == HOLDING:
+            self.hold_score_sum += self.score * dt
+            self.hold_score_time += dt
+
+        event = None
+        if self.state == IDLE:
+            if self.score >= self.hold_threshold:
+                self._set_state(ENTERING, now)
+        elif self.state == ENTERING:
+            if self.score < self.exit_threshold:
+                self._set_state(IDLE, now)
+            elif now - self.state_since >= self.enter_time:
+                # The hold is timed from when the score first crossed the threshold
+                self.hold_start = self.state_since
+                self.target_announced = False
+                self._set_state(HOLDING, now)
+                event = HOLD_STARTED
+        elif self.state == HOLDING:
+            if self.score < self.exit_threshold:
+                self.exit_start = now
+                self._set_state(EXITING, now)
+        elif self.state == EXITING:
+            if self.score >= self.hold_threshold:
+                # Back in the pose within the grace period: the dip was part of the hold
+                self.exit_start = None
+                self._set_state(HOLDING, now)
+            elif now - self.state_since >= self.exit_grace:
+                event = self._end_hold(now)
+
+        if (event is None and self.state == HOLDING and self.target_hold is not None
+                and not self.target_announced and self.hold_time >= self.target_hold):
+            self.target_announced = True
+            event = TARGET_REACHED
+        return event
+
+    def summary(self) -> dict:
+        return {
+            'state': self.state,
+            'score': round(self.score),
+            'hold_time': self.hold_time,
+            'reps': self.reps,
+            'last_hold': self.last_hold,
+            'best_hold': self.best_hold,
+            'total_hold': self.total_hold,
+            'mean_hold_score': self.mean_hold_score,
+        }
@@ -0,0 +1,176 @@
+"""
+Pre-synthesized speech clips for VoiceGuide
+Phrases are synthesized once with pyttsx3 into audio files keyed by text,
+voice and rate, then played back through pygame.mixer from memory. The
+static catalog (welcome text, pose feedback, instruction steps) can be
+rendered ahead of time with `python speech_cache.py`; other phrases go
+through a bounded LRU.
+"""
+
+import argparse
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+
+class PhraseCache:
+    """Audio files of synthesized phrases for one pyttsx3 engine
+
+    Static phrases are kept for good; at most max_dynamic other phrases are
+    kept, least recently used first out, and evicted files are deleted.
+    Clips already in cache_dir (earlier runs, other voices or rates) start
+    out as the oldest dynamic entries, so they are evicted like any other.
+    """
+
+    def __init__(self, engine, cache_dir='speech_cache', max_dynamic=64, lock=None):
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.max_dynamic = max_dynamic
+        # pyttsx3 engines cannot run two loops at once; share the lock with other engine users
+        self.lock = lock or threading.RLock()
+        self.static = set()
+        self.dynamic = OrderedDict()
+        self.on_evict: Optional[Callable[[str], None]] = None
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """Drop interrupted syntheses and queue earlier clips for eviction, oldest first"""
+        clips = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if name.endswith('.partial.wav'):
+                    os.remove(path)
+                elif name.endswith('.wav'):
+                    clips.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        for _, path in sorted(clips):
+            # The text is unknown, but eviction only needs the path
+            self.dynamic[path] = ''
+
+    def path(self, text: str) -> str:
+        """Clip file of a phrase for the engine's current voice and rate"""
+        voice = self.engine.getProperty('voice')
+        rate = self.engine.getProperty('rate')
+        key = hashlib.sha1(f"{voice}|{rate}|{text}".encode()).hexdigest()[:20]
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def synthesize(self, text: str, path: str):
+        """Render a phrase to an audio file"""
+        partial = path[:-len('.wav')] + '.partial.wav'
+        with self.lock:
+            self.engine.save_to_file(text, partial)
+            self.engine.runAndWait()
+        if not os.path.exists(partial):
+            raise RuntimeError(f"speech engine wrote no audio for '{text}'")
+        os.replace(partial, path)
+
+    def clip(self, text: str, static=False) -> str:
+        """Path of a phrase's clip, synthesizing it on a miss
+
+        Safe to call from several threads (e.g. prerender and the speech
+        worker): the bookkeeping and the exists / synthesize check run under
+        the lock, so a phrase is never synthesized twice.
+        """
+        with self.lock:
+            path = self.path(text)
+            if static:
+                self.static.add(path)
+                self.dynamic.pop(path, None)
+            elif path not in self.static:
+                self.dynamic[path] = text
+                self.dynamic.move_to_end(path)
+
+            if os.path.exists(path):
+                self.hits += 1
+            else:
+                self.misses += 1
+                self.synthesize(text, path)
+
+            self._evict()
+            return path
+
+    def _evict(self):
+        """Delete least recently used dynamic clips beyond max_dynamic"""
+        with self.lock:
+            while len(self.dynamic) > self.max_dynamic:
+                evicted, _ = self.dynamic.popitem(last=False)
+                if self.on_evict:
+                    self.on_evict(evicted)
+                try:
+                    os.remove(evicted)
+                except OSError:
+                    pass
+
+    def prerender(self, texts: Iterable[str]) -> int:
+        """Synthesize any missing static phrases; returns how many were rendered"""
+        misses = self.misses
+        for text in texts:
+            self.clip(text, static=True)
+        # Catalog clips from earlier runs are static now; trim what is left over
+        self._evict()
+        return self.misses - misses
+
+
+class AudioPlayer:
+    """Plays clip files through pygame.mixer, keeping decoded clips in memory"""
+
+    def __init__(self, volume=0.8):
+        import pygame
+        pygame.mixer.init()
+        self.mixer = pygame.mixer
+        self.volume = volume
+        self.sounds = {}
+
+    def play(self, path: str, wait=True, stop_event=None):
+        """Play a clip, by default blocking until it finishes or stop_event is set"""
+        sound = self.sounds.get(path)
+        if sound is None:
+            sound = self.sounds[path] = self.mixer.Sound(path)
+        sound.set_volume(self.volume)
+        channel = sound.play()
+        while wait and channel is not None and channel.get_busy():
+            if stop_event is not None and stop_event.is_set():
+                channel.stop()
+                break
+            time.sleep(0.01)
+        return channel
+
+    def forget(self, path: str):
+        """Drop a decoded clip, e.g. after its file was evicted"""
+        self.sounds.pop(path, None)
+
+    def stop(self):
+        self.mixer.stop()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render the voice guide's phrase catalog to audio clips")
+    parser.add_argument('--cache-dir', default='speech_cache', help="Where clips are stored")
+    parser.add_argument('--rate', type=int, default=150, help="Speech rate (words per minute)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from voice_guide import VoiceGuide, catalog_phrases
+    from yoga_analyzer import YogaAnalyzer
+
+    voice_guide = VoiceGuide(rate=args.rate, cache_dir=args.cache_dir)
+    if voice_guide.phrase_cache is None:
+        return
+    phrases = catalog_phrases(YogaAnalyzer())
+    rendered = voice_guide.phrase_cache.prerender(phrases)
+    print(f"✓ {len(phrases)} catalog phrases cached in {args.cache_dir} ({rendered} newly synthesized)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Priority scheduling of VoiceGuide utterances
+Every utterance has a priority, an optional deadline after which it is
+dropped as stale, and an optional coalescing key: a newer utterance with the
+same key replaces the queued one. A higher-priority utterance interrupts the
+one being spoken, and the queue is bounded, so speech never lags the session
+by more than a few phrases.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Optional
+
+PRIORITY_LOW = 0      # encouragement
+PRIORITY_NORMAL = 1   # score feedback and corrections
+PRIORITY_HIGH = 2     # pose instructions, session start and end
+
+
+class SpeechItem:
+    """One queued utterance"""
+
+    def __init__(self, text, priority, deadline, key, seq):
+        self.text = text
+        self.priority = priority
+        self.deadline = deadline
+        self.key = key
+        self.seq = seq
+        self.cancelled = False
+        # Set when the utterance should stop mid-playback
+        self.interrupted = threading.Event()
+
+    def __lt__(self, other):
+        # Highest priority first, then first come first served
+        return (-self.priority, self.seq) < (-other.priority, other.seq)
+
+    def expired(self, now=None) -> bool:
+        return self.deadline is not None and (now or time.monotonic()) > self.deadline
+
+
+class SpeechScheduler:
+    """Thread-safe priority queue of utterances with deadlines, coalescing and preemption"""
+
+    def __init__(self, max_pending=16):
+        self.max_pending = max_pending
+        self.current: Optional[SpeechItem] = None
+        # Called after the current utterance was interrupted, e.g. to stop a speech engine
+        self.on_preempt: Optional[Callable[[], None]] = None
+        self.dropped = 0
+        self._heap = []
+        self._pending = {}  # seq -> live queued item
+        self._keys = {}     # coalescing key -> live queued item
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def _forget(self, item: SpeechItem):
+        self._pending.pop(item.seq, None)
+        if item.key is not None and self._keys.get(item.key) is item:
+            del self._keys[item.key]
+
+    def _remove(self, item: SpeechItem):
+        item.cancelled = True
+        self._forget(item)
+
+    def _interrupt_current(self) -> bool:
+        if self.current is None or self.current.interrupted.is_set():
+            return False
+        self.current.interrupted.set()
+        return True
+
+    def submit(self, text, priority=PRIORITY_NORMAL, ttl: Optional[float] = None,
+               key: Optional[str] = None) -> SpeechItem:
+        """Queue an utterance; it is dropped if not started within ttl seconds"""
+        now = time.monotonic()
+        with self._cond:
+            item = SpeechItem(text, priority, now + ttl if ttl is not None else None, key, next(self._seq))
+            if key is not None and key in self._keys:
+                self._remove(self._keys[key])
+                self.dropped += 1
+
+            heapq.heappush(self._heap, item)
+            self._pending[item.seq] = item
+            if key is not None:
+                self._keys[key] = item
+
+            # Over the bound: drop expired items, then the lowest-priority, oldest one
+            if len(self._pending) > self.max_pending:
+                for queued in [queued for queued in self._pending.values() if queued.expired(now)]:
+                    self._remove(queued)
+                    self.dropped += 1
+            if len(self._pending) > self.max_pending:
+                self._remove(min(self._pending.values(), key=lambda queued: (queued.priority, queued.seq)))
+                self.dropped += 1
+            # Cancelled entries are skipped lazily; compact once they dominate the heap
+            if len(self._heap) > 4 * self.max_pending:
+                self._heap = list(self._pending.values())
+                heapq.heapify(self._heap)
+
+            preempted = self.current is not None and priority > self.current.priority and self._interrupt_current()
+            self._cond.notify()
+
+        if preempted and self.on_preempt:
+            self.on_preempt()
+        return item
+
+    def next(self, timeout: Optional[float] = None) -> Optional[SpeechItem]:
+        """Block until the most urgent live utterance is available; None after timeout"""
+        end = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            self.current = None
+            while True:
+                while self._heap:
+                    item = heapq.heappop(self._heap)
+                    if item.cancelled:
+                        continue
+                    self._forget(item)
+                    if item.expired():
+                        self.dropped += 1
+                        continue
+                    self.current = item
+                    return item
+
+                remaining = end - time.monotonic() if end is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def cancel(self, key_prefix: str):
+        """Drop queued utterances whose key starts with key_prefix and interrupt a matching current one"""
+        with self._cond:
+            for item in [item for item in self._pending.values()
+                         if item.key is not None and item.key.startswith(key_prefix)]:
+                self._remove(item)
+            current = self.current
+            interrupted = (current is not None and current.key is not None
+                           and current.key.startswith(key_prefix) and self._interrupt_current())
+        if interrupted and self.on_preempt:
+            self.on_preempt()
+
+    def clear(self):
+        """Drop everything queued and interrupt the current utterance"""
+        with self._cond:
+            for item in list(self._pending.values()):
+                self._remove(item)
+            self._heap = []
+            interrupted = self._interrupt_current()
+        if interrupted and self.on_preempt:
+            self.on_preempt()
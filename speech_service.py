@@ -0,0 +1,153 @@
+"""
+Out-of-process speech for the live session
+SpeechService runs a VoiceGuide (pyttsx3 synthesis, scheduling, playback)
+in its own process and offers the same API to the frame loop. Calls only
+put a small message on a multiprocessing queue, so speech never competes
+with OpenCV and MediaPipe for the GIL, and a hung audio driver stalls the
+speech process instead of the UI.
+"""
+
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from typing import List, Optional
+
+
+def _serve(requests, replies, speaking, guide_kwargs):
+    """Speech process: run forwarded VoiceGuide calls until a None request arrives"""
+    from voice_guide import VoiceGuide
+
+    try:
+        guide = VoiceGuide(**guide_kwargs)
+    except Exception as e:
+        replies.put(('error', str(e)))
+        return
+    replies.put(('ready', None))
+
+    def mirror_speaking():
+        while True:
+            speaking.value = guide.is_speaking
+            time.sleep(0.05)
+
+    threading.Thread(target=mirror_speaking, daemon=True).start()
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        call_id, name, args, kwargs = request
+        error = None
+        try:
+            getattr(guide, name)(*args, **kwargs)
+        except Exception as e:
+            error = str(e)
+            print(f"Speech service error in {name}: {e}")
+        if call_id is not None:
+            replies.put((call_id, error))
+
+    guide.close()
+
+
+class SpeechService:
+    """VoiceGuide API backed by a separate speech process"""
+
+    def __init__(self, rate=150, volume=0.8, cache_dir: Optional[str] = 'speech_cache',
+                 max_dynamic_phrases=64, start_timeout=30.0):
+        # spawn: the child must not inherit the parent's camera, MediaPipe graphs or threads
+        context = multiprocessing.get_context('spawn')
+        self._requests = context.Queue()
+        self._replies = context.Queue()
+        self._speaking = context.Value('b', False, lock=False)
+        self._call_ids = itertools.count()
+        guide_kwargs = dict(rate=rate, volume=volume, cache_dir=cache_dir,
+                            max_dynamic_phrases=max_dynamic_phrases)
+        self.process = context.Process(target=_serve, daemon=True,
+                                       args=(self._requests, self._replies, self._speaking, guide_kwargs))
+        self.process.start()
+
+        try:
+            status, detail = self._replies.get(timeout=start_timeout)
+        except queue.Empty:
+            status, detail = 'error', f"no response within {start_timeout:.0f}s"
+        if status != 'ready':
+            self.close(timeout=0)
+            raise RuntimeError(f"Speech process failed to start: {detail}")
+
+    @property
+    def is_speaking(self) -> bool:
+        return bool(self._speaking.value)
+
+    def _send(self, name, *args, call_id=None, **kwargs):
+        if self.process.is_alive():
+            self._requests.put((call_id, name, args, kwargs))
+
+    def speak_async(self, text, priority=False, key: Optional[str] = None, ttl: Optional[float] = None):
+        self._send('speak_async', text, priority, key, ttl)
+
+    def speak_immediate(self, text, timeout: Optional[float] = 30.0):
+        """Speak text and wait until it has been spoken, at most timeout seconds"""
+        call_id = next(self._call_ids)
+        self._send('speak_immediate', text, call_id=call_id)
+        end = time.monotonic() + timeout if timeout is not None else None
+        while self.process.is_alive():
+            remaining = end - time.monotonic() if end is not None else None
+            if remaining is not None and remaining <= 0:
+                return
+            try:
+                reply_id, _ = self._replies.get(timeout=remaining)
+            except queue.Empty:
+                return
+            # Replies to calls that already timed out are discarded
+            if reply_id == call_id:
+                return
+
+    def speak_pose_instructions(self, pose_name: str, instructions: List[str]):
+        self._send('speak_pose_instructions', pose_name, list(instructions))
+
+    def speak_feedback(self, feedback: str, score: int):
+        self._send('speak_feedback', feedback, int(score))
+
+    def speak_corrections(self, corrections: List[str], joints: Optional[List[str]] = None):
+        self._send('speak_corrections', list(corrections), list(joints) if joints else None)
+
+    def speak_encouragement(self, score: int):
+        self._send('speak_encouragement', int(score))
+
+    def speak_hold_started(self):
+        self._send('speak_hold_started')
+
+    def speak_target_reached(self):
+        self._send('speak_target_reached')
+
+    def speak_rep_completed(self, reps: int, hold_seconds: float):
+        self._send('speak_rep_completed', int(reps), float(hold_seconds))
+
+    def speak_session_start(self):
+        self._send('speak_session_start')
+
+    def speak_session_end(self):
+        self._send('speak_session_end')
+
+    def prerender(self, phrases: List[str], background=True):
+        self._send('prerender', list(phrases), background)
+
+    def stop_all_speech(self):
+        self._send('stop_all_speech')
+
+    def set_rate(self, rate: int):
+        self._send('set_rate', rate)
+
+    def set_volume(self, volume: float):
+        self._send('set_volume', volume)
+
+    def close(self, timeout=2.0):
+        """Stop the speech process, killing it if it does not exit within timeout seconds"""
+        self._send('stop_all_speech')
+        if self.process.is_alive():
+            self._requests.put(None)
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
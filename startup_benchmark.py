@@ -0,0 +1,97 @@
+"""
+Startup benchmark for the command-line entry points
+Runs every entry point with --help in a fresh interpreter, measures the
+time spent beyond bare interpreter startup and checks it against a budget.
+It also reports any heavy dependency that was imported on the way, since
+--help should never load TensorFlow, MediaPipe or the TTS engine.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+AI_YOGA_DIR = os.path.join(REPO_ROOT, 'AI yoga')
+
+# (working directory, script, import-time budget in seconds)
+ENTRY_POINTS = [
+    (REPO_ROOT, 'main.py', 0.5),
+    (REPO_ROOT, 'speech_cache.py', 0.5),
+    (REPO_ROOT, 'kiosk_server.py', 0.5),
+    (REPO_ROOT, 'inference_workers.py', 0.5),
+    (AI_YOGA_DIR, 'chair_pose_classifier.py', 0.5),
+    (AI_YOGA_DIR, 'evaluate_metrics.py', 0.5),
+    (AI_YOGA_DIR, 'checkpoint_sweep.py', 0.5),
+    (AI_YOGA_DIR, 'export_tflite.py', 0.5),
+    (AI_YOGA_DIR, 'synthetic_poses.py', 0.5),
+]
+
+HEAVY_MODULES = ['tensorflow', 'mediapipe', 'pyttsx3', 'matplotlib', 'seaborn', 'pandas', 'sklearn']
+
+# Runs a script's __main__ with --help and prints the heavy modules it imported
+HELP_RUNNER = """
+import runpy, sys
+sys.argv = [sys.argv[1], '--help']
+sys.path.insert(0, '.')
+try:
+    runpy.run_path(sys.argv[0], run_name='__main__')
+except SystemExit:
+    pass
+heavy = {heavy!r}
+print('HEAVY:' + ','.join(m for m in heavy if m in sys.modules))
+"""
+
+
+def time_command(args, cwd, repeats):
+    """Median wall time of a command over several runs, plus its last output"""
+    timings = []
+    output = ''
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run(args, cwd=cwd, capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        output = result.stdout
+    return statistics.median(timings), output
+
+
+def run_benchmark(repeats=5):
+    """Benchmark every entry point; returns True when all stay within budget"""
+    baseline, _ = time_command([sys.executable, '-c', 'pass'], REPO_ROOT, repeats)
+    print(f"Interpreter startup: {baseline * 1000:.0f} ms (subtracted below)")
+    print(f"{'Entry point':<28} {'Import time':>12} {'Budget':>8}  Result")
+
+    all_ok = True
+    runner = HELP_RUNNER.format(heavy=HEAVY_MODULES)
+    for cwd, script, budget in ENTRY_POINTS:
+        elapsed, output = time_command([sys.executable, '-c', runner, script], cwd, repeats)
+        import_time = max(0.0, elapsed - baseline)
+
+        heavy = ''
+        for line in output.splitlines():
+            if line.startswith('HEAVY:'):
+                heavy = line[len('HEAVY:'):]
+
+        ok = import_time <= budget and not heavy
+        all_ok = all_ok and ok
+        result = "OK" if ok else "FAIL"
+        if heavy:
+            result += f" (imported {heavy})"
+        print(f"{script:<28} {import_time * 1000:>9.0f} ms {budget * 1000:>5.0f} ms  {result}")
+
+    return all_ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure --help startup time of the entry points")
+    parser.add_argument('--repeats', type=int, default=5, help="Runs per entry point (median is reported)")
+    args = parser.parse_args(argv)
+
+    if not run_benchmark(args.repeats):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,92 @@
-import pyttsx3
 import threading
-import queue
-import time
-from typing import List, Optional
+from typing import List, Optional, Sequence, Union
+from speech_scheduler import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, SpeechScheduler
+
+WELCOME_TEXT = ("Welcome to your AI yoga instructor! "
+                "I'll guide you through poses and help improve your form. "
+                "Remember to breathe deeply and listen to your body. "
+                "Let's begin!")
+CLOSING_TEXT = ("Great session! Remember, yoga is about progress, not perfection. "
+                "Take a moment to appreciate your practice today. Namaste!")
+
+# Score prefixes from the highest threshold down; the score itself is spoken as its own clip
+SCORE_PREFIXES = [(80, "Great! Your score is"), (60, "Good effort! Your score is"),
+                  (0, "Keep practicing! Your score is")]
+CORRECTION_PREFIX = "Try this:"
+CORRECTIONS_PREFIX = "Here are some adjustments:"
+ENCOURAGEMENT_MESSAGES = {
+    90: ["Excellent form! You're a natural!",
+         "Perfect! Your alignment is beautiful!",
+         "Outstanding! You've mastered this pose!"],
+    70: ["Great job! You're getting better!",
+         "Nice work! Keep focusing on your breath!",
+         "Good progress! Feel the strength in your pose!"],
+    0: ["Keep practicing! Every attempt makes you stronger!",
+        "Don't worry, yoga is a journey. You're doing great!",
+        "Remember to breathe and listen to your body!"],
+}
+
+HOLD_STARTED_TEXT = "Good. Now hold the pose."
+TARGET_REACHED_TEXT = "Well held! You can release when you're ready."
+REP_PREFIX = "That's repetition"
+HOLD_PREFIX = "You held it for"
+SECONDS_SUFFIX = "seconds."
+
+# Seconds an utterance may wait before it is dropped as stale (None: never)
+DEFAULT_TTL = {PRIORITY_LOW: 3.0, PRIORITY_NORMAL: 5.0, PRIORITY_HIGH: None}
+
+# An utterance is one phrase or a sequence of phrases spoken back to back
+Utterance = Union[str, Sequence[str]]
+
+
+def feedback_segments(feedback: str, score: int) -> List[str]:
+    """Score feedback as reusable phrases: prefix, score number, catalog feedback"""
+    prefix = next(text for threshold, text in SCORE_PREFIXES if score >= threshold)
+    return [prefix, f"{score}.", feedback]
+
+
+def correction_segments(corrections: List[str]) -> List[str]:
+    """Corrections as a shared prefix followed by one phrase per correction"""
+    if len(corrections) == 1:
+        return [CORRECTION_PREFIX, corrections[0]]
+    return [CORRECTIONS_PREFIX] + [f"{correction}." for correction in corrections]
+
+
+def rep_segments(reps: int, hold_seconds: float) -> List[str]:
+    """Completed repetition as reusable phrases: rep number and hold time"""
+    return [REP_PREFIX, f"{reps}.", HOLD_PREFIX, f"{round(hold_seconds)}.", SECONDS_SUFFIX]
+
+
+def instruction_phrases(pose_name: str, instructions: List[str]) -> List[str]:
+    """Spoken intro and numbered steps for a pose"""
+    return ([f"Let's practice {pose_name}. Here are the steps:"] +
+            [f"Step {i}: {instruction}" for i, instruction in enumerate(instructions, 1)])
+
+
+def catalog_phrases(analyzer) -> List[str]:
+    """Every fixed phrase the guide can say for a YogaAnalyzer's pose catalog"""
+    phrases = [WELCOME_TEXT, CLOSING_TEXT, CORRECTION_PREFIX, CORRECTIONS_PREFIX,
+               HOLD_STARTED_TEXT, TARGET_REACHED_TEXT, REP_PREFIX, HOLD_PREFIX, SECONDS_SUFFIX]
+    phrases.extend(text for _, text in SCORE_PREFIXES)
+    phrases.extend(f"{score}." for score in range(101))
+    for messages in ENCOURAGEMENT_MESSAGES.values():
+        phrases.extend(messages)
+    for pose_type, pose_info in analyzer.yoga_poses.items():
+        phrases.extend(pose_info['feedback'].values())
+        phrases.extend(instruction_phrases(pose_info['name'], analyzer.get_pose_instructions(pose_type)))
+    return list(dict.fromkeys(phrases))
+
 
 class VoiceGuide:
-    def __init__(self, rate=150, volume=0.8):
-        """Initialize text-to-speech engine"""
+    def __init__(self, rate=150, volume=0.8, cache_dir: Optional[str] = 'speech_cache',
+                 max_dynamic_phrases=64):
+        """Initialize text-to-speech engine
+        
+        With cache_dir set, phrases are synthesized once to audio clips and
+        replayed from the speech cache; None synthesizes every phrase anew.
+        """
+        import pyttsx3
+        
         self.engine = pyttsx3.init()
         self.engine.setProperty('rate', rate)
         self.engine.setProperty('volume', volume)
@@ -20,30 +100,38 @@ class VoiceGuide:
                     self.engine.setProperty('voice', voice.id)
                     break
         
-        self.speech_queue = queue.Queue()
+        self.scheduler = SpeechScheduler()
+        self.scheduler.on_preempt = self._interrupt_engine
         self.is_speaking = False
         self.speech_thread = None
-        self.last_feedback_time = 0
-        self.feedback_interval = 3  # Minimum seconds between feedback
         
-    def speak_async(self, text: str, priority: bool = False):
-        """Add text to speech queue"""
-        current_time = time.time()
-        
-        # Avoid too frequent feedback unless it's high priority
-        if not priority and (current_time - self.last_feedback_time) < self.feedback_interval:
-            return
+        self.engine_lock = threading.RLock()
+        self.phrase_cache = None
+        self.player = None
+        if cache_dir:
+            try:
+                from speech_cache import AudioPlayer, PhraseCache
+                self.player = AudioPlayer(volume)
+                self.phrase_cache = PhraseCache(self.engine, cache_dir, max_dynamic_phrases, self.engine_lock)
+                self.phrase_cache.on_evict = self.player.forget
+            except Exception as e:
+                print(f"Speech cache unavailable ({e}), synthesizing every phrase")
+                self.player = None
         
-        if priority:
-            # Clear queue for high priority messages
-            while not self.speech_queue.empty():
-                try:
-                    self.speech_queue.get_nowait()
-                except queue.Empty:
-                    break
+    def speak_async(self, text: Utterance, priority: Union[bool, int] = False, key: Optional[str] = None,
+                    ttl: Optional[float] = None):
+        """Schedule text (or a sequence of phrases) for speech
         
-        self.speech_queue.put(text)
-        self.last_feedback_time = current_time
+        priority True/False maps to PRIORITY_HIGH/PRIORITY_NORMAL. A queued
+        utterance with the same key is replaced, one still waiting after
+        ttl seconds (default per priority) is dropped, and a higher
+        priority interrupts the utterance being spoken.
+        """
+        if isinstance(priority, bool):
+            priority = PRIORITY_HIGH if priority else PRIORITY_NORMAL
+        if ttl is None:
+            ttl = DEFAULT_TTL.get(priority)
+        self.scheduler.submit(text, priority, ttl, key)
         
         # Start speech thread if not running
         if not self.speech_thread or not self.speech_thread.is_alive():
@@ -54,105 +142,119 @@ class VoiceGuide:
     def _speech_worker(self):
         """Worker thread for text-to-speech"""
         while True:
+            item = self.scheduler.next(timeout=1)
+            if item is None:
+                break
             try:
-                text = self.speech_queue.get(timeout=1)
                 self.is_speaking = True
-                self.engine.say(text)
-                self.engine.runAndWait()
-                self.is_speaking = False
-                self.speech_queue.task_done()
-            except queue.Empty:
-                break
+                self._say(item.text, item.interrupted)
             except Exception as e:
                 print(f"Speech error: {e}")
+            finally:
                 self.is_speaking = False
     
-    def speak_immediate(self, text: str):
+    def _interrupt_engine(self):
+        """Cut off direct synthesis when a more urgent utterance arrives"""
+        if self.phrase_cache is None:
+            self.engine.stop()
+    
+    def _say(self, text: Utterance, interrupted: Optional[threading.Event] = None):
+        """Play each phrase's cached clip, or synthesize the text directly without a cache"""
+        segments = [text] if isinstance(text, str) else list(text)
+        if self.phrase_cache is not None:
+            try:
+                for segment in segments:
+                    if interrupted is not None and interrupted.is_set():
+                        return
+                    self.player.play(self.phrase_cache.clip(segment), stop_event=interrupted)
+                return
+            except Exception as e:
+                print(f"Speech cache disabled ({e}), synthesizing every phrase")
+                self.phrase_cache = None
+        
+        with self.engine_lock:
+            self.engine.say(" ".join(segments))
+            self.engine.runAndWait()
+    
+    def prerender(self, phrases: List[str], background=True):
+        """Synthesize fixed phrases into the cache ahead of use"""
+        if self.phrase_cache is None:
+            return
+        if background:
+            threading.Thread(target=self.phrase_cache.prerender, args=(phrases,), daemon=True).start()
+        else:
+            self.phrase_cache.prerender(phrases)
+    
+    def speak_immediate(self, text: Utterance):
         """Speak text immediately (blocking)"""
-        self.engine.say(text)
-        self.engine.runAndWait()
+        self._say(text)
     
     def speak_pose_instructions(self, pose_name: str, instructions: List[str]):
         """Speak instructions for a yoga pose"""
-        intro_text = f"Let's practice {pose_name}. Here are the steps:"
-        self.speak_async(intro_text, priority=True)
-        
-        time.sleep(2)  # Brief pause
-        
-        for i, instruction in enumerate(instructions, 1):
-            instruction_text = f"Step {i}: {instruction}"
-            self.speak_async(instruction_text, priority=True)
-            time.sleep(1)  # Pause between instructions
+        # A new pose's instructions replace whatever is left of the previous pose's
+        self.scheduler.cancel('instructions')
+        for i, phrase in enumerate(instruction_phrases(pose_name, instructions)):
+            self.speak_async(phrase, PRIORITY_HIGH, key=f'instructions:{i}')
     
     def speak_feedback(self, feedback: str, score: int):
         """Speak pose feedback"""
-        if score >= 80:
-            feedback_text = f"Great! Your score is {score}. {feedback}"
-        elif score >= 60:
-            feedback_text = f"Good effort! Your score is {score}. {feedback}"
-        else:
-            feedback_text = f"Keep practicing! Your score is {score}. {feedback}"
-        
-        self.speak_async(feedback_text)
+        # Prefix, score and feedback are separate clips, so no score needs its own synthesis
+        self.speak_async(feedback_segments(feedback, score), PRIORITY_NORMAL, key='feedback')
     
-    def speak_corrections(self, corrections: List[str]):
-        """Speak pose corrections"""
+    def speak_corrections(self, corrections: List[str], joints: Optional[List[str]] = None):
+        """Speak pose corrections
+        
+        With joints (the analyzer's correction_joints) each correction is
+        queued on its own, and a newer correction for the same joint
+        replaces one still waiting.
+        """
         if not corrections:
             return
         
-        if len(corrections) == 1:
-            correction_text = f"Try this: {corrections[0]}"
+        if joints:
+            for joint, correction in zip(joints, corrections):
+                self.speak_async(correction_segments([correction]), PRIORITY_NORMAL, key=f'correction:{joint}')
         else:
-            correction_text = "Here are some adjustments: " + ". ".join(corrections)
-        
-        self.speak_async(correction_text)
+            self.speak_async(correction_segments(corrections), PRIORITY_NORMAL, key='corrections')
     
     def speak_encouragement(self, score: int):
         """Speak encouraging messages based on score"""
-        if score >= 90:
-            messages = [
-                "Excellent form! You're a natural!",
-                "Perfect! Your alignment is beautiful!",
-                "Outstanding! You've mastered this pose!"
-            ]
-        elif score >= 70:
-            messages = [
-                "Great job! You're getting better!",
-                "Nice work! Keep focusing on your breath!",
-                "Good progress! Feel the strength in your pose!"
-            ]
-        else:
-            messages = [
-                "Keep practicing! Every attempt makes you stronger!",
-                "Don't worry, yoga is a journey. You're doing great!",
-                "Remember to breathe and listen to your body!"
-            ]
+        messages = next(messages for threshold, messages in ENCOURAGEMENT_MESSAGES.items()
+                        if score >= threshold)
         
         import random
-        self.speak_async(random.choice(messages))
+        self.speak_async(random.choice(messages), PRIORITY_LOW, key='encouragement')
+    
+    def speak_hold_started(self):
+        """Cue that the pose is being held"""
+        self.speak_async(HOLD_STARTED_TEXT, PRIORITY_LOW, key='session')
+    
+    def speak_target_reached(self):
+        """Cue that the hold reached its target time"""
+        self.speak_async(TARGET_REACHED_TEXT, PRIORITY_NORMAL, key='session')
+    
+    def speak_rep_completed(self, reps: int, hold_seconds: float):
+        """Announce a completed repetition and how long it was held"""
+        self.speak_async(rep_segments(reps, hold_seconds), PRIORITY_NORMAL, key='session')
     
     def speak_session_start(self):
         """Welcome message for yoga session"""
-        welcome_text = ("Welcome to your AI yoga instructor! "
-                       "I'll guide you through poses and help improve your form. "
-                       "Remember to breathe deeply and listen to your body. "
-                       "Let's begin!")
-        self.speak_async(welcome_text, priority=True)
+        self.speak_async(WELCOME_TEXT, PRIORITY_HIGH)
     
     def speak_session_end(self):
         """Closing message for yoga session"""
-        closing_text = ("Great session! Remember, yoga is about progress, not perfection. "
-                       "Take a moment to appreciate your practice today. Namaste!")
-        self.speak_async(closing_text, priority=True)
+        self.speak_async(CLOSING_TEXT, PRIORITY_HIGH)
     
     def stop_all_speech(self):
         """Stop all speech and clear queue"""
+        self.scheduler.clear()
         self.engine.stop()
-        while not self.speech_queue.empty():
-            try:
-                self.speech_queue.get_nowait()
-            except queue.Empty:
-                break
+        if self.player is not None:
+            self.player.stop()
+    
+    def close(self):
+        """Stop speaking at the end of a session (SpeechService shuts its process down here)"""
+        self.stop_all_speech()
     
     def set_rate(self, rate: int):
         """Set speech rate (words per minute)"""
@@ -161,3 +263,5 @@ class VoiceGuide:
     def set_volume(self, volume: float):
         """Set speech volume (0.0 to 1.0)"""
         self.engine.setProperty('volume', volume)
+        if self.player is not None:
+            self.player.volume = volume
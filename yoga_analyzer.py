@@ -4,8 +4,9 @@ from pose_detector import PoseDetector
 from typing import Dict, List, Tuple, Optional
 
 class YogaAnalyzer:
-    def __init__(self):
-        self.pose_detector = PoseDetector()
+    def __init__(self, pose_detector: Optional[PoseDetector] = None):
+        # Share the caller's detector so each frame goes through one MediaPipe graph
+        self.pose_detector = pose_detector or PoseDetector()
         self.mp_pose = mp.solutions.pose
         
         # Define yoga poses with ideal angles and key points
@@ -105,7 +106,10 @@ class YogaAnalyzer:
     def analyze_pose(self, image, target_pose='mountain'):
         """Analyze the current pose and provide feedback"""
         results = self.pose_detector.detect_pose(image)
-        
+        return self.analyze_results(results, image.shape, target_pose)
+    
+    def analyze_results(self, results, image_shape, target_pose='mountain'):
+        """Analyze pose landmarks the caller has already detected"""
         if not results.pose_landmarks:
             return {
                 'pose_detected': False,
@@ -116,7 +120,7 @@ class YogaAnalyzer:
             }
         
         # Get landmark coordinates
-        landmarks = self.pose_detector.get_all_landmarks(results, image.shape)
+        landmarks = self.pose_detector.get_all_landmarks(results, image_shape)
         
         # Calculate angles based on the target pose
         angles = self.calculate_pose_angles(landmarks, target_pose)
@@ -125,14 +129,16 @@ class YogaAnalyzer:
         score = self.score_pose(angles, target_pose)
         
         # Generate feedback
-        feedback, corrections = self.generate_feedback(angles, target_pose, score)
+        feedback = self.overall_feedback(target_pose, score)
+        correction_items = self.correction_items(angles, target_pose)
         
         return {
             'pose_detected': True,
             'score': score,
             'feedback': feedback,
             'angles': angles,
-            'corrections': corrections,
+            'corrections': [text for _, text in correction_items],
+            'correction_joints': [angle_name for angle_name, _ in correction_items],
             'landmarks': landmarks
         }
     
@@ -246,8 +252,13 @@ class YogaAnalyzer:
     
     def generate_feedback(self, calculated_angles, pose_type, score):
         """Generate feedback and corrections based on pose analysis"""
+        corrections = [text for _, text in self.correction_items(calculated_angles, pose_type)]
+        return self.overall_feedback(pose_type, score), corrections
+    
+    def correction_items(self, calculated_angles, pose_type) -> List[Tuple[str, str]]:
+        """(angle name, correction) for every angle outside its ideal range"""
         if pose_type not in self.yoga_poses:
-            return "Unknown pose", []
+            return []
         
         pose_info = self.yoga_poses[pose_type]
         corrections = []
@@ -259,25 +270,32 @@ class YogaAnalyzer:
                 
                 if actual_angle < min_ideal:
                     if 'arm' in angle_name:
-                        corrections.append(f"Straighten your {angle_name.replace('_', ' ')} more")
+                        corrections.append((angle_name, f"Straighten your {angle_name.replace('_', ' ')} more"))
                     elif 'leg' in angle_name or 'knee' in angle_name:
-                        corrections.append(f"Straighten your {angle_name.replace('_', ' ')} more")
+                        corrections.append((angle_name, f"Straighten your {angle_name.replace('_', ' ')} more"))
                     elif 'spine' in angle_name:
-                        corrections.append("Keep your spine straighter")
+                        corrections.append((angle_name, "Keep your spine straighter"))
                 
                 elif actual_angle > max_ideal:
                     if 'knee' in angle_name and 'front' in angle_name:
-                        corrections.append("Bend your front knee more")
+                        corrections.append((angle_name, "Bend your front knee more"))
                     elif 'arm' in angle_name:
-                        corrections.append(f"Relax your {angle_name.replace('_', ' ')} slightly")
+                        corrections.append((angle_name, f"Relax your {angle_name.replace('_', ' ')} slightly"))
         
-        # Generate overall feedback
+        return corrections
+    
+    def overall_feedback(self, pose_type, score):
+        """Catalog feedback text for a pose at a given score"""
+        if pose_type not in self.yoga_poses:
+            return "Unknown pose"
+        
+        pose_info = self.yoga_poses[pose_type]
         if score >= 80:
             feedback = pose_info['feedback']['good']
         else:
             feedback = pose_info['feedback']['improve']
         
-        return feedback, corrections
+        return feedback
     
     def get_pose_instructions(self, pose_type):
         """Get instructions for a specific pose"""